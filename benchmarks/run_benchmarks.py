@@ -0,0 +1,243 @@
+"""
+Times every analysis stage on synthetic repos of several sizes and compares the
+results with a stored baseline.
+
+    python -m benchmarks.run_benchmarks --scales 1000 10000 --save-baseline
+    python -m benchmarks.run_benchmarks --scales 1000 10000   # exits with 1 on regressions
+
+Run from the repository root. Generated repos are kept in --workdir and reused.
+
+The nested import DAG (build_import_dag, dumped as import_dag.yaml like the
+notebook does) inlines a file at every import, so on a repo with import cycles it
+has no practical bound. Those two stages run on an acyclic copy of each scale
+instead, from the entry whose nested tree is the largest under NESTED_ENTRIES.
+
+A baseline records the machine it was measured on and the tolerance to compare
+with. Timings only compare on similar hardware: when the machine differs, a
+warning is printed, and a local baseline should be recorded with --save-baseline.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import yaml
+
+from benchmarks.synthetic_repo import generate_repo
+from file_tree import FileTreeGraph
+from import_dag import PythonImportDAG
+from graph.current_code import FolderScriptBuilder, ImportAnalyzer, ScriptAnalyzer, ScriptNode, get_dependencies
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+# Allowed slowdown before flagging, unless the baseline or --tolerance sets another one
+DEFAULT_TOLERANCE = 0.2
+# Differences below these are noise, whatever the ratio (tiny stages jitter a lot)
+MIN_DELTA = {"seconds": 0.05, "peak_mib": 1.0}
+# Size of the nested import DAG that is exported, in entries
+NESTED_ENTRIES = 10_000
+STAGES = ["folder_builder", "script_analyzer", "import_analyzer", "get_dependencies", "file_tree", "import_dag",
+          "nested_import_dag", "yaml_export"]
+
+
+def _entry_script(nodes: Dict[str, Any]) -> str:
+    """The last synthetic module: imports point to earlier scripts, so it reaches most of the repo."""
+    scripts = [path for path, node in nodes.items() if isinstance(node, ScriptNode) and node.name.startswith("mod_")]
+    return max(scripts, key=lambda path: int(path.rsplit("mod_", 1)[1][:-len(".py")]))
+
+
+def _nested_entry(repo: str, limit: int = NESTED_ENTRIES) -> str:
+    """
+    The script of an acyclic repo whose nested import DAG is the largest with at most limit entries.
+
+    Without cycles, the nested tree of a file is the file plus the nested trees of its
+    (deduplicated) imports, so its size follows from the flat graph of the whole repo.
+    """
+    graph = PythonImportDAG(repo, "").build_flat_graph(all_scripts=True)  # No entry file needed
+    imports: Dict[int, List[int]] = {node["id"]: [] for node in graph["nodes"]}
+    for edge in graph["edges"]:
+        imports[edge["from"]].append(edge["to"])
+    sizes: Dict[int, int] = {}
+
+    def size(node_id: int) -> int:
+        if node_id not in sizes:
+            sizes[node_id] = 1 + sum(size(target) for target in imports[node_id])
+        return sizes[node_id]
+
+    best = max((size(node["id"]), node["name"]) for node in graph["nodes"] if size(node["id"]) <= limit)
+    return best[1]
+
+
+def _nested_repo(workdir: str, scale: int) -> Tuple[str, str]:
+    """(repo, entry) of the nested import DAG stages: an acyclic synthetic repo of the same scale."""
+    repo = os.path.join(workdir, f"repo_{scale}_acyclic")
+    generate_repo(repo, files=scale, cycle_rate=0.0)
+    return repo, _nested_entry(repo)
+
+
+def _stages(repo: str, nested: Tuple[str, str]) -> List[tuple]:
+    """(name, function) pairs; each function feeds the state the next stages need."""
+    state: Dict[str, Any] = {}
+
+    def folder_builder():
+        state["root"], state["nodes"] = FolderScriptBuilder(repo).build()
+
+    def script_analyzer():
+        state["script_analyzer"] = ScriptAnalyzer(state["nodes"], repo)
+        state["script_analyzer"].analyze()
+
+    def import_analyzer():
+        analyzer = state["script_analyzer"]
+        ImportAnalyzer(repo, state["nodes"], analyzer.ast_cache, summaries=analyzer.summaries).analyze()
+
+    def dependencies():
+        for path, node in state["nodes"].items():
+            if isinstance(node, ScriptNode):
+                get_dependencies(os.path.join(repo, path))
+
+    def file_tree():
+        state["file_tree"] = FileTreeGraph(repo)
+        state["file_tree"].build_graph()
+
+    def import_dag():
+        state["import_dag"] = PythonImportDAG(repo, _entry_script(state["nodes"])).build_flat_graph()
+
+    def nested_import_dag():
+        state["nested_import_dag"] = PythonImportDAG(*nested).build_import_dag()
+
+    def yaml_export():
+        # What the notebook writes to import_dag.yaml
+        yaml.dump(state["nested_import_dag"], io.StringIO())
+
+    return [
+        ("folder_builder", folder_builder), ("script_analyzer", script_analyzer), ("import_analyzer", import_analyzer),
+        ("get_dependencies", dependencies), ("file_tree", file_tree), ("import_dag", import_dag),
+        ("nested_import_dag", nested_import_dag), ("yaml_export", yaml_export),
+    ]
+
+
+def measure(repo: str, nested: Tuple[str, str], repeat: int = 3, memory: bool = True) -> Dict[str, Dict[str, float]]:
+    """
+    Best-of-repeat seconds per stage and end to end; peak traced memory (MiB) from an extra run.
+    nested is the (repo, entry) of the nested import DAG stages.
+    A stage's peak counts what it allocates above the memory held when it starts (the
+    state of earlier stages); end_to_end is the overall peak.
+    """
+    results = {name: {"seconds": float("inf")} for name in STAGES + ["end_to_end"]}
+    for _ in range(repeat):
+        total = 0.0
+        for name, stage in _stages(repo, nested):
+            start = time.perf_counter()
+            stage()
+            elapsed = time.perf_counter() - start
+            total += elapsed
+            results[name]["seconds"] = min(results[name]["seconds"], elapsed)
+        results["end_to_end"]["seconds"] = min(results["end_to_end"]["seconds"], total)
+
+    if memory:
+        # Separate run: tracemalloc slows allocations down too much to time with it on
+        tracemalloc.start()
+        overall = 0
+        for name, stage in _stages(repo, nested):
+            tracemalloc.reset_peak()
+            held = tracemalloc.get_traced_memory()[0]
+            stage()
+            peak = tracemalloc.get_traced_memory()[1]
+            overall = max(overall, peak)
+            results[name]["peak_mib"] = (peak - held) / 2 ** 20
+        results["end_to_end"]["peak_mib"] = overall / 2 ** 20
+        tracemalloc.stop()
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions: measurements more than tolerance (and MIN_DELTA) above the baseline for the same scale."""
+    regressions = []
+    for scale, stages in results.items():
+        for stage, metrics in stages.items():
+            for metric, value in metrics.items():
+                reference = baseline.get(scale, {}).get(stage, {}).get(metric)
+                if reference and value > reference * (1 + tolerance) and value - reference > MIN_DELTA[metric]:
+                    regressions.append(f"{scale} files, {stage}, {metric}: {value:.3f} vs {reference:.3f} (+{value / reference - 1:.0%})")
+    return regressions
+
+
+def machine_info() -> Dict[str, Any]:
+    """What the timings depend on, stored with a baseline."""
+    processor = platform.processor()
+    if os.path.exists("/proc/cpuinfo"):  # platform.processor() is often empty on Linux
+        with open("/proc/cpuinfo", "r") as f:
+            processor = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), processor)
+    return {
+        "python": sys.version.split()[0], "system": platform.platform(), "machine": platform.machine(),
+        "processor": processor, "cpu_count": os.cpu_count(),
+    }
+
+
+def _print_table(results: Dict[str, Any], baseline: Dict[str, Any]):
+    print(f"{'files':>8} {'stage':<18} {'seconds':>9} {'baseline':>9} {'peak MiB':>9}")
+    for scale, stages in results.items():
+        for stage, metrics in stages.items():
+            reference = baseline.get(scale, {}).get(stage, {}).get("seconds")
+            peak = metrics.get("peak_mib")
+            print(f"{scale:>8} {stage:<18} {metrics['seconds']:>9.3f} "
+                     f"{reference if reference is not None else float('nan'):>9.3f} "
+                     f"{peak if peak is not None else float('nan'):>9.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the graph analysis stages on synthetic repos.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Number of files per synthetic repo")
+    parser.add_argument("--workdir", default="/tmp/localrag-benchmarks", help="Where synthetic repos are generated (and reused)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak-memory run")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help=f"Allowed slowdown before flagging (0.2 = 20%%); defaults to the baseline's, else {DEFAULT_TOLERANCE}")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    for scale in args.scales:
+        repo = os.path.join(args.workdir, f"repo_{scale}")
+        start = time.perf_counter()
+        generate_repo(repo, files=scale)
+        print(f"Synthetic repo with {scale} files ready in {time.perf_counter() - start:.1f}s ({repo})")
+        # Large repos run once: a repeat would cost minutes and the noise is small there
+        nested = _nested_repo(args.workdir, scale)
+        results[str(scale)] = measure(repo, nested, repeat=args.repeat if scale < 100_000 else 1, memory=not args.no_memory)
+
+    baseline_path = Path(args.baseline)
+    stored: Dict[str, Any] = {}
+    if baseline_path.exists():
+        with open(baseline_path, "r") as f:
+            stored = json.load(f)
+    baseline = stored.get("results", {})
+    _print_table(results, baseline)
+
+    machine = machine_info()
+    if args.save_baseline:
+        tolerance = args.tolerance if args.tolerance is not None else stored.get("tolerance", DEFAULT_TOLERANCE)
+        with open(baseline_path, "w") as f:
+            json.dump({"machine": machine, "tolerance": tolerance, "results": results}, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if baseline and stored.get("machine") != machine:
+        print(f"WARNING the baseline was recorded on another machine ({stored.get('machine')}); "
+              f"timings may not compare, record a local one with --save-baseline")
+    tolerance = args.tolerance if args.tolerance is not None else stored.get("tolerance", DEFAULT_TOLERANCE)
+    regressions = compare(results, baseline, tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
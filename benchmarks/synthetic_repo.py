@@ -0,0 +1,150 @@
+import json
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Written in the root of a generated repo; a repo is reused only if its parameters match
+PARAMS_FILE = ".synthetic_repo.json"
+
+
+def _folders(files: int, depth: int, files_per_folder: int) -> List[str]:
+    """Folder layout: a balanced tree of the given depth with about files_per_folder scripts per folder."""
+    folders_needed = max(1, -(-files // files_per_folder))
+    branching = 1
+    while sum(branching ** level for level in range(1, depth + 1)) < folders_needed:
+        branching += 1
+    folders = []
+    level = [""]
+    for _ in range(depth):
+        level = [f"{parent}/pkg_{i}" if parent else f"pkg_{i}" for parent in level for i in range(branching)]
+        folders.extend(level)
+    return folders[:folders_needed]
+
+
+def _module_source(index: int, rng: random.Random, modules: List[Tuple[str, str]], imports: List[int],
+                   classes_per_file: int, methods_per_class: int, functions_per_file: int) -> str:
+    """Source of script index, importing the modules listed in imports and calling into them."""
+    folder, module = modules[index]
+    lines = [f'"""Synthetic module {module} ({index})."""', ""]
+    imported = []  # (local name of an imported class, local name of an imported function)
+    for n, target in enumerate(imports):
+        target_folder, target_module = modules[target]
+        style = rng.random()
+        if style < 0.5:
+            lines.append(f"from {target_module} import Class{target}_0 as C{n}, function{target}_0")
+            imported.append((f"C{n}", f"function{target}_0"))
+        elif style < 0.8:
+            lines.append(f"import {target_module} as m{n}")
+            imported.append((f"m{n}.Class{target}_0", f"m{n}.function{target}_0"))
+        elif target_folder == folder:
+            lines.append(f"from . import {target_module.rsplit('.', 1)[-1]} as r{n}")
+            imported.append((f"r{n}.Class{target}_0", f"r{n}.function{target}_0"))
+        else:
+            lines.append(f"import {target_module}")
+            imported.append((f"{target_module}.Class{target}_0", f"{target_module}.function{target}_0"))
+    lines.append("")
+
+    for c in range(classes_per_file):
+        lines += ["", f"class Class{index}_{c}:", f'    """Class {c} of module {index}."""', "", "    def __init__(self):"]
+        lines.append("        self.value = 0")
+        if imported:
+            dependency_class = rng.choice(imported)[0]
+            lines.append(f"        self.dependency = {dependency_class}()")
+        for m in range(methods_per_class):
+            lines += ["", f"    def method_{m}(self, value: int) -> int:"]
+            if imported and m % 2 == 0:
+                lines.append("        result = self.dependency.method_0(value)")
+            else:
+                lines.append(f"        result = value + {m}")
+            if m:
+                lines.append(f"        result = self.method_{m - 1}(result)")
+            lines.append("        return result")
+        lines.append("")
+
+    for f in range(functions_per_file):
+        lines += ["", f"def function{index}_{f}(value: int = 0) -> int:"]
+        if imported:
+            dependency_class, dependency_function = rng.choice(imported)
+            lines.append(f"    instance = {dependency_class}()")
+            lines.append(f"    value = instance.method_0(value)")
+            lines.append(f"    value = {dependency_function}(value)")
+        if classes_per_file:
+            lines.append(f"    value = Class{index}_0().method_0(value)")
+        lines.append("    return value")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def generate_repo(root: str, files: int = 1000, depth: int = 3, files_per_folder: int = 20, classes_per_file: int = 2,
+                  methods_per_class: int = 3, functions_per_file: int = 2, import_fanout: int = 3,
+                  cycle_rate: float = 0.05, seed: int = 0) -> Dict[str, Any]:
+    """
+    Write a synthetic Python repository of `files` scripts under root.
+
+    Scripts live in a package tree of the given depth (every folder has an __init__.py).
+    Each script defines classes with methods and top-level functions that call into
+    the `import_fanout` modules it imports, through "from X import Y as Z",
+    "import X as m", "import X" and relative imports. Imports point to earlier scripts,
+    except that each one points to a later script with probability cycle_rate, which
+    creates import cycles. The same parameters and seed always give the same repo.
+    """
+    params = {
+        "files": files, "depth": depth, "files_per_folder": files_per_folder, "classes_per_file": classes_per_file,
+        "methods_per_class": methods_per_class, "functions_per_file": functions_per_file,
+        "import_fanout": import_fanout, "cycle_rate": cycle_rate, "seed": seed,
+    }
+    root_path = Path(root)
+    params_path = root_path / PARAMS_FILE
+    if params_path.exists():
+        with open(params_path, "r") as f:
+            if json.load(f) == params:
+                return params  # Already generated
+        raise FileExistsError(f"{root} holds a synthetic repo generated with other parameters")
+
+    rng = random.Random(seed)
+    folders = _folders(files, depth, files_per_folder)
+    modules = []
+    for i in range(files):
+        folder = folders[i % len(folders)]
+        modules.append((folder, f"{folder.replace('/', '.')}.mod_{i}"))
+
+    for folder in folders:
+        (root_path / folder).mkdir(parents=True, exist_ok=True)
+        for level in range(1, folder.count("/") + 2):
+            init_path = root_path / "/".join(folder.split("/")[:level]) / "__init__.py"
+            if not init_path.exists():
+                init_path.write_text("")
+
+    for i, (folder, module) in enumerate(modules):
+        imports = []
+        for _ in range(min(import_fanout, files - 1)):
+            if i and rng.random() >= cycle_rate:
+                imports.append(rng.randrange(i))
+            elif i + 1 < files and cycle_rate:  # With cycle_rate=0 the first script imports nothing
+                imports.append(rng.randrange(i + 1, files))
+        source = _module_source(i, rng, modules, sorted(set(imports)), classes_per_file, methods_per_class, functions_per_file)
+        with open(root_path / folder / f"mod_{i}.py", "w") as f:
+            f.write(source)
+
+    root_path.mkdir(parents=True, exist_ok=True)
+    with open(params_path, "w") as f:
+        json.dump(params, f)
+    return params
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic Python repository.")
+    parser.add_argument("root")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--classes-per-file", type=int, default=2)
+    parser.add_argument("--import-fanout", type=int, default=3)
+    parser.add_argument("--cycle-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_repo(args.root, files=args.files, depth=args.depth, classes_per_file=args.classes_per_file,
+                  import_fanout=args.import_fanout, cycle_rate=args.cycle_rate, seed=args.seed)
+    print(f"Synthetic repo written to {os.path.abspath(args.root)}")
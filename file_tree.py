@@ -1,13 +1,18 @@
 import os
 
+from graph.scanner import DEFAULT_EXCLUDES, scan_tree
+
 class FileTreeGraph:
     """
     This class builds a DAG representing the file tree of a given directory.
     Each folder is a node and each file is a leaf node.
     The graph is maintained as two lists: 'nodes' and 'edges'.
+    Entries matched by 'excludes' or by .gitignore files are left out.
     """
-    def __init__(self, root_path):
+    def __init__(self, root_path, excludes=DEFAULT_EXCLUDES, use_gitignore=True):
         self.root_path = os.path.abspath(root_path)
+        self.excludes = excludes
+        self.use_gitignore = use_gitignore
         self.nodes = []
         self.edges = []
         self.node_id = 0  # Unique id for each node
@@ -33,7 +38,7 @@ class FileTreeGraph:
 
     def build_graph(self, current_path=None, parent_id=None):
         """
-        Recursively traverse the directory tree starting from 'current_path'.
+        Traverse the directory tree starting from 'current_path' (iteratively, see scan_tree).
         For each folder or file, add a node (and an edge if it has a parent).
         """
         if current_path is None:
@@ -45,18 +50,11 @@ class FileTreeGraph:
         else:
             current_id = parent_id
 
-        try:
-            for entry in os.listdir(current_path):
-                full_path = os.path.join(current_path, entry)
-                if os.path.isdir(full_path):
-                    # Create a node for the folder, then recursively build its subgraph.
-                    folder_id = self.add_node(entry, "folder", current_id)
-                    self.build_graph(full_path, folder_id)
-                else:
-                    # Create a node for the file.
-                    self.add_node(entry, "file", current_id)
-        except Exception as e:
-            print(f"Error reading directory {current_path}: {e}")
+        folder_ids = {"": current_id}  # Folder path relative to current_path -> node id
+        for folder, entry, is_dir in scan_tree(current_path, self.excludes, self.use_gitignore):
+            entry_id = self.add_node(entry, "folder" if is_dir else "file", folder_ids[folder])
+            if is_dir:
+                folder_ids[f"{folder}/{entry}" if folder else entry] = entry_id
 
     def get_graph(self):
         """
@@ -0,0 +1,231 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from graph.current_code import (
+    ClassNode,
+    FunctionNode,
+    MethodNode,
+    ModuleIndex,
+    Node,
+    ScriptNode,
+)
+
+# What an expression evaluates to: ("module" | "class" | "instance" | "callable", node path)
+Value = Tuple[str, str]
+
+
+class CallResolver:
+    """
+    Resolves the call sites recorded in the script summaries to concrete nodes.
+
+    A global symbol table maps qualified names ("folder1.script1.classA.method1") to
+    node paths. Name chains are resolved left to right with the importing script's
+    aliases (filled in by ImportAnalyzer), its own definitions, the local-variable and
+    self.<attr> assignments of the summaries, and base classes. This handles calls
+    such as self.classB.method1(), CA().method1() or ClassB2.method3().
+    Resolutions that do not depend on local variables are memoized per
+    (script, class, chain), so every shared receiver is resolved once for the repo.
+    A resolver kept across graph patches is brought up to date with invalidate()
+    before resolve_all() is run again over the patched scripts.
+    """
+    def __init__(self, nodes: Dict[str, Node], summaries: Dict[str, Dict], module_index: Optional[ModuleIndex] = None):
+        self.nodes = nodes
+        self.summaries = summaries
+        self.module_index = module_index if module_index is not None else ModuleIndex(nodes)
+        self.symbols: Dict[str, str] = {}
+        self._script_symbols: Dict[str, List[str]] = {}  # Script path -> its keys in symbols
+        self._memo: Dict[Tuple[str, Optional[str], Tuple[str, ...]], Optional[Value]] = {}
+        self._mro: Dict[str, List[str]] = {}
+        self._build_symbols()
+
+    def _build_symbols(self):
+        for path, node in self.nodes.items():
+            if isinstance(node, ScriptNode):
+                self._add_symbols(path, node)
+
+    def _add_symbols(self, path: str, node: ScriptNode):
+        keys = self._script_symbols[path] = []
+        for module in self.module_index.names(path):
+            keys.append(module)
+            self.symbols[module] = path
+            for child in node.children:
+                keys.append(f"{module}.{child.name}")
+                self.symbols[keys[-1]] = child.path
+                for grandchild in child.children:
+                    keys.append(f"{module}.{child.name}.{grandchild.name}")
+                    self.symbols[keys[-1]] = grandchild.path
+
+    def invalidate(self, script_paths: Iterable[str]):
+        """
+        Forget what is known about scripts that were patched (re-parsed, relinked,
+        added or removed): their symbols are registered again and the call
+        dependencies of their functions and methods are emptied, ready for
+        resolve_all(script_paths). The memo is cleared as a whole, since memoized
+        values of other scripts can lead into the patched ones.
+        """
+        self._memo.clear()
+        self._mro.clear()
+        for path in script_paths:
+            for key in self._script_symbols.pop(path, ()):
+                if self.symbols.get(key, "").split("::")[0] == path:
+                    del self.symbols[key]
+            node = self.nodes.get(path)
+            if not isinstance(node, ScriptNode):
+                continue
+            self._add_symbols(path, node)
+            for child in node.children:
+                for caller in (child.children if isinstance(child, ClassNode) else [child]):
+                    if isinstance(caller, (FunctionNode, MethodNode)):
+                        caller.dependencies = []
+
+    # --- values --------------------------------------------------------- #
+    def _node_value(self, path: Optional[str]) -> Optional[Value]:
+        node = self.nodes.get(path) if path else None
+        if isinstance(node, ScriptNode):
+            return ("module", path)
+        if isinstance(node, ClassNode):
+            return ("class", path)
+        if isinstance(node, (FunctionNode, MethodNode)):
+            return ("callable", path)
+        return None
+
+    def _class_mro(self, class_path: str) -> List[str]:
+        """The class followed by its in-project base classes (depth-first, duplicates removed)."""
+        return self._linearize(class_path, frozenset())[0]
+
+    def _linearize(self, class_path: str, visiting: FrozenSet[str]) -> Tuple[List[str], bool]:
+        """(mro, whether an inheritance cycle cut it short)."""
+        if class_path in self._mro:
+            return self._mro[class_path], False
+        if class_path in visiting:
+            return [], True
+        script_path, class_name = class_path.split("::")
+        mro = [class_path]
+        cut = False
+        for base_chain in self.summaries.get(script_path, {}).get("bases", {}).get(class_name, []):
+            base = self.resolve(script_path, None, base_chain)
+            if base and base[0] == "class":
+                base_mro, base_cut = self._linearize(base[1], visiting | {class_path})
+                mro.extend(c for c in base_mro if c not in mro)
+                cut = cut or base_cut
+        # A cut MRO depends on where the cycle was entered: memoize only complete ones,
+        # so the result does not depend on the order classes are resolved in
+        if not cut:
+            self._mro[class_path] = mro
+        return mro, cut
+
+    def _member(self, class_path: str, name: str) -> Optional[Value]:
+        for candidate in self._class_mro(class_path):
+            value = self._node_value(f"{candidate}::{name}")
+            if value:
+                return value
+        return None
+
+    def _step(self, value: Value, attr: str) -> Optional[Value]:
+        kind, path = value
+        if attr == "()":
+            return ("instance", path) if kind == "class" else None
+        if kind == "module":
+            member = self._node_value(f"{path}::{attr}")
+            if member:
+                return member
+            location = self.module_index.location(path)
+            submodule = self.module_index.locations.get(f"{location}/{attr}" if location else attr)
+            return self._node_value(submodule)
+        if kind == "class":
+            return self._member(path, attr)
+        if kind == "instance":
+            member = self._member(path, attr)
+            if member:
+                return member
+            # Attribute assigned in a method: self.classB = ClassB()
+            for candidate in self._class_mro(path):
+                script_path, class_name = candidate.split("::")
+                attributes = self.summaries.get(script_path, {}).get("attributes", {}).get(class_name, {})
+                if attr in attributes:
+                    return self.resolve(script_path, class_name, attributes[attr])
+        return None
+
+    # --- chains --------------------------------------------------------- #
+    def resolve(self, script_path: str, class_name: Optional[str], chain: Tuple[str, ...],
+                local_types: Optional[Dict[str, Tuple[str, ...]]] = None,
+                seen: FrozenSet[str] = frozenset()) -> Optional[Value]:
+        """Evaluate a name chain in the scope of script_path (and class_name for methods)."""
+        head = chain[0]
+        if local_types and head in local_types and head not in seen and head != "self":
+            value = self.resolve(script_path, class_name, local_types[head], local_types, seen | {head})
+            return self._walk(value, chain[1:])
+
+        key = (script_path, class_name, chain)
+        if key in self._memo:
+            return self._memo[key]
+        self._memo[key] = None  # Guards against self-referencing attributes
+        value, consumed = self._resolve_head(script_path, class_name, chain)
+        value = self._walk(value, chain[consumed:])
+        self._memo[key] = value
+        return value
+
+    def _walk(self, value: Optional[Value], rest: Tuple[str, ...]) -> Optional[Value]:
+        for attr in rest:
+            if value is None:
+                return None
+            value = self._step(value, attr)
+        return value
+
+    def _resolve_head(self, script_path: str, class_name: Optional[str], chain: Tuple[str, ...]) -> Tuple[Optional[Value], int]:
+        head = chain[0]
+        if head == "self" and class_name:
+            return ("instance", f"{script_path}::{class_name}"), 1
+
+        script_node = self.nodes.get(script_path)
+        aliases = script_node.aliases if isinstance(script_node, ScriptNode) else {}
+        # Longest dotted prefix first: "import a.b" registers the alias "a.b"
+        for length in range(len(chain), 0, -1):
+            prefix = ".".join(chain[:length])
+            if prefix in aliases:
+                return self._node_value(aliases[prefix]), length
+        own = self._node_value(f"{script_path}::{head}")
+        if own:
+            return own, 1
+        # Fully qualified use of an in-project module (e.g. pkg.mod.Class.method)
+        for length in range(len(chain), 1, -1):
+            prefix = ".".join(chain[:length])
+            if prefix in self.symbols:
+                return self._node_value(self.symbols[prefix]), length
+        return None, len(chain)
+
+    def resolve_call(self, script_path: str, scope: str, receiver: Tuple[str, ...], name: str) -> Optional[Node]:
+        """Node called by receiver.name(...) inside scope ("Class.method" or "function")."""
+        class_name = scope.split(".")[0] if "." in scope else None
+        local_types = self.summaries[script_path]["scopes"][scope]["locals"]
+        value = self.resolve(script_path, class_name, receiver + (name,), local_types)
+        if value is None:
+            return None
+        kind, path = value
+        if kind == "callable":
+            return self.nodes[path]
+        if kind == "class":
+            # Constructor call: depend on __init__ when the class (or a base) defines it
+            init = self._member(path, "__init__")
+            return self.nodes[init[1]] if init else self.nodes[path]
+        return None
+
+    def resolve_all(self, script_paths: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        Fill MethodNode/FunctionNode.dependencies for every summarized script (or only
+        those in script_paths); return the call graph.
+        """
+        call_graph: Dict[str, List[str]] = {}
+        for script_path in self.summaries if script_paths is None else script_paths:
+            summary = self.summaries.get(script_path)
+            if summary is None or not isinstance(self.nodes.get(script_path), ScriptNode):
+                continue
+            for scope, info in summary.get("scopes", {}).items():
+                caller = self.nodes.get(f"{script_path}::{scope.replace('.', '::')}")
+                if caller is None:
+                    continue
+                for receiver, name in info["calls"]:
+                    target = self.resolve_call(script_path, scope, tuple(receiver), name)
+                    if target is not None and target is not caller:
+                        caller.add_dep(target)
+                call_graph[caller.path] = [dep.path for dep in caller.dependencies]
+        return call_graph
@@ -0,0 +1,301 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from graph.current_code import Node
+from graph.graph_store import CLASS, FOLDER, FUNCTION, METHOD, GraphStore
+
+# Bump whenever the metrics or the cache layout below change
+CENTRALITY_FORMAT = 1
+# Betweenness sources processed together (dense n x block matrices)
+BFS_BLOCK = 16
+METRICS = ("pagerank", "in_degree", "out_degree", "betweenness")
+
+
+def store_version(store: GraphStore) -> str:
+    """Content hash of a GraphStore (nodes and dependency edges): centrality results are cached under it."""
+    digest = hashlib.sha1()
+    digest.update(store.kinds.tobytes())
+    digest.update("\0".join(store.strings[path] for path in store.paths).encode("utf-8"))
+    for offsets, targets in store.edges:
+        digest.update(offsets.tobytes())
+        digest.update(targets.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def adjacency(store: GraphStore) -> sp.csr_matrix:
+    """
+    Node x node matrix of the dependency edges of every EDGE_ATTRIBUTES kind, built
+    straight from the CSR arrays of the store: entry (i, j) counts the edges i -> j.
+    """
+    n = len(store)
+    matrix = sp.csr_matrix((n, n), dtype=np.float64)
+    for offsets, targets in store.edges:
+        indptr = np.frombuffer(offsets, dtype=np.int32) if len(offsets) else np.zeros(n + 1, dtype=np.int32)
+        indices = np.frombuffer(targets, dtype=np.int32) if len(targets) else np.zeros(0, dtype=np.int32)
+        matrix = matrix + sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n, n))
+    return matrix
+
+
+def owners(store: GraphStore, level: str) -> np.ndarray:
+    """
+    Node each node is counted as: itself at "node" level, its class for a method
+    at "symbol" level, its script for classes, functions and methods at "script"
+    level. Folders map to -1.
+    """
+    kinds = np.frombuffer(store.kinds, dtype=np.int8) if len(store.kinds) else np.zeros(0, dtype=np.int8)
+    parents = np.frombuffer(store.parents, dtype=np.int32) if len(store.parents) else np.zeros(0, dtype=np.int32)
+    owner = np.arange(len(kinds), dtype=np.int32)
+    lifted = {"node": (), "symbol": (METHOD,), "script": (CLASS, FUNCTION, METHOD)}[level]
+    for _ in range(2):  # Methods sit two levels under their script
+        move = np.isin(kinds[owner], lifted)
+        owner[move] = parents[owner[move]]
+    owner[kinds[owner] == FOLDER] = -1
+    return owner
+
+
+def pagerank(matrix: sp.csr_matrix, damping: float = 0.85, tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """
+    PageRank by power iteration on a weighted adjacency matrix (i -> j means i
+    depends on j, so heavily used modules rank high). Dangling rows spread their
+    rank uniformly.
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out == 0
+    scale = np.divide(1.0, out, out=np.zeros(n), where=~dangling)
+    transition = (sp.diags(scale) @ matrix).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        updated = damping * (transition @ rank) + (damping * rank[dangling].sum() + 1.0 - damping) / n
+        if np.abs(updated - rank).sum() < tol:
+            return updated
+        rank = updated
+    return rank
+
+
+def betweenness(matrix: sp.csr_matrix, pivots: Optional[int] = 64, seed: int = 0) -> np.ndarray:
+    """
+    Betweenness centrality (Brandes), exact or estimated from a sample of pivot
+    sources (scaled by n / pivots). Breadth-first searches run BFS_BLOCK sources
+    at a time as sparse matrix products: the shortest-path counts of a level are
+    one product of the transposed adjacency with the previous frontier, and the
+    dependencies are accumulated back level by level the same way.
+    """
+    n = matrix.shape[0]
+    scores = np.zeros(n)
+    if n == 0:
+        return scores
+    binary = (matrix > 0).astype(np.float64).tocsr()
+    binary = (binary - sp.diags(binary.diagonal())).tocsr()
+    binary.eliminate_zeros()
+    forward = binary.T.tocsr()
+    if pivots is None or pivots >= n:
+        sources = np.arange(n)
+    else:
+        sources = np.random.default_rng(seed).choice(n, size=pivots, replace=False)
+
+    for start in range(0, len(sources), BFS_BLOCK):
+        block = sources[start:start + BFS_BLOCK]
+        columns = np.arange(len(block))
+        sigma = np.zeros((n, len(block)))
+        sigma[block, columns] = 1.0
+        distance = np.full((n, len(block)), -1, dtype=np.int32)
+        distance[block, columns] = 0
+        frontier = sigma.copy()
+        depth = 0
+        while True:
+            reached = forward @ frontier
+            new = (reached > 0) & (distance < 0)
+            if not new.any():
+                break
+            depth += 1
+            distance[new] = depth
+            sigma[new] = reached[new]
+            frontier = np.where(new, sigma, 0.0)
+
+        delta = np.zeros((n, len(block)))
+        safe_sigma = np.where(sigma > 0, sigma, 1.0)
+        for level in range(depth, 0, -1):
+            coefficient = np.where(distance == level, (1.0 + delta) / safe_sigma, 0.0)
+            delta += np.where(distance == level - 1, sigma * (binary @ coefficient), 0.0)
+        delta[block, columns] = 0.0
+        scores += delta.sum(axis=1)
+    return scores * (n / len(sources))
+
+
+class CentralityIndex:
+    """
+    Structural centrality of the graph, computed on SciPy sparse matrices.
+
+    The dependency edges of a GraphStore are summed into one adjacency matrix,
+    then projected to a level with a 0/1 membership matrix (A' = P^T A P, self
+    loops dropped):
+    - "script":  one row per script; class, function and method edges count for their script
+    - "symbol":  scripts, classes and functions; method edges count for their class
+    - "node":    every non-folder node as it is
+
+    Metrics are vectors over the level's paths: PageRank (weighted by the number
+    of edges), in/out degree (distinct neighbours) and betweenness (Brandes over
+    pivots sampled sources, exact when pivots is None). Each is computed on first
+    use. With cache_dir, results are stored in <cache_dir>/<graph version>-<level>.npz,
+    so an unchanged graph never recomputes them.
+    """
+    def __init__(self, store: GraphStore, level: str = "symbol", damping: float = 0.85, pivots: Optional[int] = 64,
+                 seed: int = 0, cache_dir: Optional[str] = None):
+        self.store = store
+        self.level = level
+        self.damping = damping
+        self.pivots = pivots
+        self.seed = seed
+        self.version = store_version(store)
+        self.cache_path = Path(cache_dir) / f"{self.version}-{level}.npz" if cache_dir else None
+
+        owner = owners(store, level)
+        members = np.flatnonzero(owner >= 0)
+        self.ids = np.unique(owner[members])  # Level row -> store node id
+        row = np.full(len(store), -1, dtype=np.int64)
+        row[self.ids] = np.arange(len(self.ids))
+        self.paths: List[str] = [store.strings[store.paths[node_id]] for node_id in self.ids]
+        self.index: Dict[str, int] = {path: i for i, path in enumerate(self.paths)}
+
+        projection = sp.csr_matrix((np.ones(len(members)), (members, row[owner[members]])), shape=(len(store), len(self.ids)))
+        matrix = (projection.T @ adjacency(store) @ projection).tocsr()
+        matrix = (matrix - sp.diags(matrix.diagonal())).tocsr()  # Edges inside one script / class
+        matrix.eliminate_zeros()
+        self.matrix: sp.csr_matrix = matrix
+        self._metrics: Dict[str, np.ndarray] = {}
+        self._load()
+
+    @classmethod
+    def from_nodes(cls, root: Node, nodes: Dict[str, Node], **options) -> "CentralityIndex":
+        return cls(GraphStore.from_nodes(root, nodes), **options)
+
+    # --- cache ---------------------------------------------------------- #
+    def _parameters(self) -> np.ndarray:
+        return np.array([CENTRALITY_FORMAT, self.damping, -1 if self.pivots is None else self.pivots, self.seed], dtype=np.float64)
+
+    def _load(self):
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            with np.load(self.cache_path) as data:
+                if np.array_equal(data["parameters"], self._parameters()):
+                    self._metrics = {name: data[name] for name in METRICS if name in data}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable centrality cache {self.cache_path}: {e}")
+
+    def _save(self):
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, parameters=self._parameters(), **self._metrics)
+        os.replace(tmp_path, self.cache_path)
+
+    # --- metrics -------------------------------------------------------- #
+    def metric(self, name: str) -> np.ndarray:
+        if name not in self._metrics:
+            binary = self.matrix > 0
+            if name == "pagerank":
+                values = pagerank(self.matrix, self.damping)
+            elif name == "in_degree":
+                values = np.asarray(binary.sum(axis=0)).ravel().astype(np.float64)
+            elif name == "out_degree":
+                values = np.asarray(binary.sum(axis=1)).ravel().astype(np.float64)
+            elif name == "betweenness":
+                values = betweenness(self.matrix, self.pivots, self.seed)
+            else:
+                raise ValueError(f"Unknown metric {name!r} (one of {', '.join(METRICS)})")
+            self._metrics[name] = values
+            self._save()
+        return self._metrics[name]
+
+    def pagerank(self) -> np.ndarray:
+        return self.metric("pagerank")
+
+    def in_degree(self) -> np.ndarray:
+        return self.metric("in_degree")
+
+    def out_degree(self) -> np.ndarray:
+        return self.metric("out_degree")
+
+    def betweenness(self) -> np.ndarray:
+        return self.metric("betweenness")
+
+    def scores(self, name: str) -> Dict[str, float]:
+        return dict(zip(self.paths, self.metric(name).tolist()))
+
+    def top(self, name: str, k: int = 20) -> List[Tuple[str, float]]:
+        values = self.metric(name)
+        best = np.argsort(-values, kind="stable")[:k]
+        return [(self.paths[i], float(values[i])) for i in best]
+
+    def hot_spots(self, k: int = 20, z: float = 2.0) -> List[Tuple[str, int, float]]:
+        """
+        Fan-in hot spots: paths whose in-degree is at least z standard deviations
+        above the mean, as (path, in-degree, PageRank), most depended on first.
+        """
+        fan_in = self.in_degree()
+        if not len(fan_in):
+            return []
+        threshold = fan_in.mean() + z * fan_in.std()
+        rank = self.pagerank()
+        hot = np.flatnonzero((fan_in >= threshold) & (fan_in > 0))
+        hot = hot[np.lexsort((-rank[hot], -fan_in[hot]))][:k]
+        return [(self.paths[i], int(fan_in[i]), float(rank[i])) for i in hot]
+
+    def boost(self, name: str = "pagerank") -> Dict[str, float]:
+        """
+        Retrieval prior in [0, 1]: the percentile rank of every path by a metric
+        (ties share a value, zero scores get 0), insensitive to the heavy tail of PageRank.
+        """
+        values = self.metric(name)
+        if not len(values):
+            return {}
+        order = np.unique(values, return_inverse=True)[1]
+        prior = order / max(order.max(), 1)
+        prior[values == 0] = 0.0
+        return dict(zip(self.paths, prior.tolist()))
+
+    def annotate(self, nodes: Dict[str, Node], names=METRICS):
+        """Store the scores on the Node objects as node.centrality = {metric: value}."""
+        columns = [(name, self.metric(name)) for name in names]
+        for i, path in enumerate(self.paths):
+            node = nodes.get(path)
+            if node is not None:
+                node.centrality = {name: float(values[i]) for name, values in columns}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __repr__(self):
+        return f"CentralityIndex({self.level}, {len(self.paths)} nodes, {self.matrix.nnz} edges, version {self.version})"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rank the central scripts and symbols of a folder")
+    parser.add_argument("global_path")
+    parser.add_argument("--level", default="symbol", choices=("script", "symbol", "node"))
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--cache-dir", default=".cache/centrality")
+    args = parser.parse_args()
+
+    # Import edges only, so the store is built straight from the scan (no Node objects)
+    index = CentralityIndex(GraphStore.from_tree(args.global_path), level=args.level, cache_dir=args.cache_dir)
+    print(index)
+    for metric in METRICS:
+        print(f"\n{metric}:")
+        for path, value in index.top(metric, args.top):
+            print(f"  {value:12.6f}  {path}")
+    print("\nfan-in hot spots:")
+    for path, fan_in, rank in index.hot_spots(args.top):
+        print(f"  {fan_in:6d}  {rank:.6f}  {path}")
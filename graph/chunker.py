@@ -0,0 +1,122 @@
+import ast
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from graph.current_code import Node, ScriptNode
+
+# Bodies longer than this are split into overlapping windows
+MAX_CHUNK_LINES = 80
+CHUNK_OVERLAP = 10
+
+
+class Chunk:
+    """
+    A retrievable piece of source code tied to a node of the graph.
+
+    chunk_id is the node path ("folder/script.py::ClassA::method1"), with a "#<part>"
+    suffix when the body was split. Lines are 1-based and inclusive, as in the AST.
+    """
+    def __init__(self, chunk_id: str, node_path: str, kind: str, start_line: int, end_line: int, text: str):
+        self.chunk_id = chunk_id
+        self.node_path = node_path
+        self.kind = kind  # "class", "function" or "method"
+        self.start_line = start_line
+        self.end_line = end_line
+        self.text = text
+
+    @property
+    def script_path(self) -> str:
+        return self.node_path.split("::", 1)[0]
+
+    def __repr__(self):
+        return f"Chunk({self.chunk_id}, {self.start_line}-{self.end_line})"
+
+
+def _first_line(node: ast.AST) -> int:
+    """First line of a definition, decorators included."""
+    return min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+
+
+def _numbered(lines: List[str], start: int, end: int) -> List[Tuple[int, str]]:
+    return list(zip(range(start, end + 1), lines[start - 1:end]))
+
+
+def _class_skeleton(lines: List[str], node: ast.ClassDef) -> List[Tuple[int, str]]:
+    """
+    Numbered source lines of a class with every method reduced to its signature, so
+    that the class chunk (header, docstring, class attributes) does not repeat the
+    method chunks.
+    """
+    keep = []
+    line = _first_line(node)
+    for item in node.body:
+        if not isinstance(item, ast.FunctionDef):
+            continue
+        # Everything up to the signature (decorators and "def" line(s)) is kept
+        signature_end = max(item.lineno, item.body[0].lineno - 1)
+        keep.extend(_numbered(lines, line, signature_end))
+        line = item.end_lineno + 1
+    keep.extend(_numbered(lines, line, node.end_lineno))
+    return keep
+
+
+def _split(node_path: str, kind: str, spans: List[List[Tuple[int, str]]], max_lines: int, overlap: int) -> List[Chunk]:
+    """One chunk per span, or overlapping windows of max_lines for longer ones."""
+    parts: List[List[Tuple[int, str]]] = []
+    step = max(1, max_lines - overlap)
+    for span in spans:
+        for offset in range(0, len(span), step):
+            parts.append(span[offset:offset + max_lines])
+            if offset + max_lines >= len(span):
+                break
+    chunks = []
+    for i, part in enumerate(parts):
+        chunk_id = node_path if len(parts) == 1 else f"{node_path}#{i}"
+        chunks.append(Chunk(chunk_id, node_path, kind, part[0][0], part[-1][0], "".join(text for _, text in part)))
+    return chunks
+
+
+def chunk_source(script_path: str, source: str, max_lines: int = MAX_CHUNK_LINES, overlap: int = CHUNK_OVERLAP) -> List[Chunk]:
+    """
+    Chunk one script: a chunk per top-level class (methods reduced to signatures),
+    per method and per top-level function, matching the nodes ScriptAnalyzer builds.
+    A name defined twice maps to a single node, so its spans share the node's chunk ids.
+    """
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+    spans: Dict[str, Tuple[str, List[List[Tuple[int, str]]]]] = {}  # node path -> (kind, spans)
+
+    def add(path: str, kind: str, span: List[Tuple[int, str]]):
+        spans.setdefault(path, (kind, []))[1].append(span)
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            class_path = f"{script_path}::{node.name}"
+            add(class_path, "class", _class_skeleton(lines, node))
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef):
+                    add(f"{class_path}::{item.name}", "method", _numbered(lines, _first_line(item), item.end_lineno))
+        elif isinstance(node, ast.FunctionDef):
+            add(f"{script_path}::{node.name}", "function", _numbered(lines, _first_line(node), node.end_lineno))
+
+    chunks = []
+    for node_path, (kind, node_spans) in spans.items():
+        chunks.extend(_split(node_path, kind, node_spans, max_lines, overlap))
+    return chunks
+
+
+def chunk_script(global_path: str, script_path: str, max_lines: int = MAX_CHUNK_LINES, overlap: int = CHUNK_OVERLAP) -> List[Chunk]:
+    full_path = Path(global_path) / script_path
+    try:
+        with open(full_path, "r") as file:
+            return chunk_source(script_path, file.read(), max_lines, overlap)
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError) as e:
+        print(f"Failed to chunk {full_path}: {e}")
+        return []
+
+
+def chunk_nodes(global_path: str, nodes: Dict[str, Node], max_lines: int = MAX_CHUNK_LINES, overlap: int = CHUNK_OVERLAP) -> Iterator[Chunk]:
+    """Chunks of every ScriptNode of the graph, script by script."""
+    for path, node in nodes.items():
+        if isinstance(node, ScriptNode):
+            yield from chunk_script(global_path, path, max_lines, overlap)
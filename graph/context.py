@@ -0,0 +1,188 @@
+import heapq
+import math
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from graph.chunker import chunk_source
+from graph.current_code import ClassNode, FunctionNode, MethodNode, Node, ScriptNode
+
+# Edge lengths of the expansion: callees and members are one step away, imports two
+CALL_DISTANCE = 1
+MEMBER_DISTANCE = 1
+IMPORT_DISTANCE = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for code)."""
+    return len(text) // 4 + 1
+
+
+class ContextBlock:
+    """Source of one node selected for the context, with why it was picked."""
+    def __init__(self, node_path: str, start_line: int, end_line: int, text: str, tokens: int, distance: int, score: float):
+        self.node_path = node_path
+        self.start_line = start_line
+        self.end_line = end_line
+        self.text = text
+        self.tokens = tokens
+        self.distance = distance  # 0 for a retrieval hit
+        self.score = score
+
+    def __repr__(self):
+        return f"ContextBlock({self.node_path}, {self.tokens} tokens, d={self.distance})"
+
+
+class ContextAssembler:
+    """
+    Turns retrieval hits into source context that fits a token budget.
+
+    From every hit node the graph is expanded best-first (Dijkstra over the edge
+    lengths above) along MethodNode/FunctionNode.dependencies, ClassNode members and
+    the script's class_dependencies/function_dependencies. Every reached node scores
+    relevance(hit) * decay ** distance; the expansions of all hits are merged by
+    score, shared callees are taken once, and nodes are added until the budget is
+    spent (a node that does not fit is skipped, smaller ones may still fit).
+
+    The expansion of a node is memoized per budget tier (the next power of two of
+    the budget), cut once it holds a tier's worth of tokens, so repeated questions
+    about the same area of code skip the graph walk. invalidate() drops the memo
+    when the graph changes, and the source of the changed scripts.
+    """
+    def __init__(self, global_path: str, nodes: Dict[str, Node], count_tokens: Callable[[str], int] = estimate_tokens,
+                 decay: float = 0.5, cache_size: int = 4096):
+        self.global_path = Path(global_path)
+        self.nodes = nodes
+        self.count_tokens = count_tokens
+        self.decay = decay
+        self.cache_size = cache_size
+        self._texts: Dict[str, Dict[str, Tuple[int, int, str]]] = {}  # script -> node path -> (start, end, text)
+        self._expansions: "OrderedDict[Tuple[str, int], List[Tuple[str, int, int]]]" = OrderedDict()
+
+    # --- node source ---------------------------------------------------- #
+    def _script_texts(self, script_path: str) -> Dict[str, Tuple[int, int, str]]:
+        if script_path not in self._texts:
+            texts: Dict[str, Tuple[int, int, str]] = {}
+            try:
+                with open(self.global_path / script_path, "r") as file:
+                    chunks = chunk_source(script_path, file.read(), max_lines=sys.maxsize)
+            except (OSError, SyntaxError, UnicodeDecodeError, ValueError) as e:
+                print(f"Failed to read {script_path}: {e}")
+                chunks = []
+            for chunk in chunks:
+                if chunk.node_path in texts:  # Name defined twice: keep every definition
+                    start, _, text = texts[chunk.node_path]
+                    texts[chunk.node_path] = (start, chunk.end_line, text + chunk.text)
+                else:
+                    texts[chunk.node_path] = (chunk.start_line, chunk.end_line, chunk.text)
+            self._texts[script_path] = texts
+        return self._texts[script_path]
+
+    def node_text(self, node_path: str) -> Optional[Tuple[int, int, str]]:
+        """(start line, end line, source) of a class, function or method node."""
+        return self._script_texts(node_path.split("::", 1)[0]).get(node_path)
+
+    # --- expansion ------------------------------------------------------ #
+    def _neighbors(self, node: Node) -> Iterable[Tuple[Node, int]]:
+        if isinstance(node, ScriptNode):
+            for child in node.children:
+                yield child, MEMBER_DISTANCE
+            for dep in node.class_dependencies + node.function_dependencies:
+                yield dep, IMPORT_DISTANCE
+            return
+        if isinstance(node, ClassNode):
+            for method in node.children:
+                yield method, MEMBER_DISTANCE
+            return
+        for dep in getattr(node, "dependencies", ()):
+            yield dep, CALL_DISTANCE
+        if isinstance(node, MethodNode) and node.parent is not None:
+            yield node.parent, MEMBER_DISTANCE
+        script_node = node.parent.parent if isinstance(node, MethodNode) else node.parent
+        if isinstance(script_node, ScriptNode):
+            for dep in script_node.class_dependencies + script_node.function_dependencies:
+                yield dep, IMPORT_DISTANCE
+
+    def _expansion(self, node_path: str, tier: int) -> List[Tuple[str, int, int]]:
+        """Nodes reachable from node_path as (path, distance, tokens), nearest first."""
+        key = (node_path, tier)
+        if key in self._expansions:
+            self._expansions.move_to_end(key)
+            return self._expansions[key]
+
+        limit = 1 << tier
+        expansion: List[Tuple[str, int, int]] = []
+        total = 0
+        settled = set()
+        heap = [(0, 0, node_path)]
+        counter = 1
+        while heap and total <= limit:
+            distance, _, path = heapq.heappop(heap)
+            if path in settled:
+                continue
+            settled.add(path)
+            node = self.nodes.get(path)
+            if node is None:
+                continue
+            if not isinstance(node, ScriptNode):
+                text = self.node_text(path)
+                if text is not None:
+                    tokens = self.count_tokens(text[2])
+                    expansion.append((path, distance, tokens))
+                    total += tokens
+            for neighbor, length in self._neighbors(node):
+                if neighbor.path not in settled:
+                    heapq.heappush(heap, (distance + length, counter, neighbor.path))
+                    counter += 1
+
+        self._expansions[key] = expansion
+        if len(self._expansions) > self.cache_size:
+            self._expansions.popitem(last=False)
+        return expansion
+
+    def invalidate(self, script_paths: Iterable[str] = ()):
+        """Forget every expansion, and the source of the given scripts (call after patching the graph)."""
+        self._expansions.clear()
+        for script_path in script_paths:
+            self._texts.pop(script_path, None)
+
+    # --- assembly ------------------------------------------------------- #
+    def assemble(self, hits: Sequence[Tuple[str, float]], budget: int) -> List[ContextBlock]:
+        """
+        Pick context blocks for hits, given as (node path, relevance) pairs (e.g. the
+        output of HybridRetriever.search), within budget tokens. Blocks come best first.
+        """
+        if budget <= 0:
+            return []
+        tier = max(0, math.ceil(math.log2(budget)))
+        expansions = []
+        heap = []
+        for path, relevance in hits:
+            expansion = self._expansion(path, tier)
+            if expansion:
+                heap.append((-relevance * self.decay ** expansion[0][1], len(expansions), 0))
+                expansions.append((relevance, expansion))
+        heapq.heapify(heap)
+
+        blocks: List[ContextBlock] = []
+        chosen = set()
+        used = 0
+        while heap and used < budget:
+            negative_score, hit, i = heapq.heappop(heap)
+            relevance, expansion = expansions[hit]
+            if i + 1 < len(expansion):
+                heapq.heappush(heap, (-relevance * self.decay ** expansion[i + 1][1], hit, i + 1))
+            path, distance, tokens = expansion[i]
+            if path in chosen or used + tokens > budget:
+                continue
+            chosen.add(path)
+            used += tokens
+            start, end, text = self.node_text(path)
+            blocks.append(ContextBlock(path, start, end, text, tokens, distance, -negative_score))
+        return blocks
+
+    @staticmethod
+    def render(blocks: Sequence[ContextBlock]) -> str:
+        """Blocks as one prompt-ready string, each preceded by its location."""
+        return "\n".join(f"# {block.node_path.split('::', 1)[0]}:{block.start_line}-{block.end_line}\n{block.text}" for block in blocks)
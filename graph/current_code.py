@@ -1,21 +1,40 @@
 import ast
 import os
-from typing import Dict, List, Optional, Set
+import time
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 from typing import List, Optional, Set
 
+from graph.import_scanner import scan_imports
+from graph.path_trie import IndexedNodes
+from graph.profiler import NULL_PROFILER
+from graph.scanner import DEFAULT_EXCLUDES, scan_tree
+
 class Node:
     def __init__(self, name: str, path: str, parent: Optional['Node'] = None):
         self.name = name.strip()
         self.path = path.strip()  # Full relative path (e.g., "folder1/folder2/script.py")
         self.parent = parent      # Parent node in the hierarchy
         self.children: List[Node] = []
+        self._child_set: Set[Node] = set()  # Same nodes as children, for O(1) membership
 
     def add_child(self, node: 'Node'):
-        if node not in self.children:
+        if node not in self._child_set:
+            self._child_set.add(node)
             self.children.append(node)
             node.parent = self  # Set parent when adding child
 
+    def remove_child(self, node: 'Node'):
+        self._child_set.remove(node)
+        self.children.remove(node)
+
+    def clear_children(self):
+        self._child_set = set()
+        self.children = []
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name}, {self.path})"
 
@@ -47,32 +66,49 @@ class ScriptNode(Node):
         # Map alias -> fully qualified node path (e.g. "CA" -> "folder/script1.py::classA")
         self.aliases: Dict[str, str] = {}
 
-class FunctionNode(Node):
+class CallerNode(Node):
+    """Function or method: keeps its call dependencies in a list and a set, for O(1) add_dep."""
     def __init__(self, name: str, path: str, parent: Optional['Node'] = None):
         super().__init__(name, path, parent)
+        self.dependencies = []  # Call dependencies
+
+    @property
+    def dependencies(self) -> List[Node]:
+        return self._dependencies
+
+    @dependencies.setter
+    def dependencies(self, nodes: Iterable[Node]):
+        self._dependencies: List[Node] = list(nodes)
+        self._dependency_set: Set[Node] = set(self._dependencies)
+
+    def add_dep(self, node: 'Node'):
+        if node not in self._dependency_set:
+            self._dependency_set.add(node)
+            self._dependencies.append(node)
+
+class FunctionNode(CallerNode):
+    pass
 
 class ClassNode(Node):
     def __init__(self, name: str, path: str, parent: Optional['Node'] = None):
         super().__init__(name, path, parent)
         self.aliases: Set[str] = set()  # Aliases from imports (e.g., "ClassA" for "classAmpere")
 
-class MethodNode(Node):
+class MethodNode(CallerNode):
     def __init__(self, name: str, path: str, parent: Optional['Node'] = None, is_static: bool = False):
         super().__init__(name, path, parent)
         self.is_static = is_static
-        self.dependencies: List[Node] = []  # Method call dependencies
-
-    def add_dep(self, node: 'Node'):
-        if node not in self.dependencies:
-            self.dependencies.append(node)
 
 # ------------------------------------------------- #
 #             FOLDER SCRIPT BUILDER
 # ------------------------------------------------- #
 class FolderScriptBuilder:
     """Builds folder and script nodes from the filesystem, with global_path as root."""
-    def __init__(self, global_path: str):
+    def __init__(self, global_path: str, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True, profiler=None):
         self.global_path = global_path
+        self.excludes = excludes
+        self.use_gitignore = use_gitignore
+        self.profiler = profiler or NULL_PROFILER
 
     def build(self) -> Node:
         root = FolderNode("root", ".", None)  # Root node represents global_path
@@ -80,184 +116,934 @@ class FolderScriptBuilder:
         global_path = Path(self.global_path)
         root.name = global_path.parts[-1]
 
-        nodes: Dict[str, Node] = {"root": root}  # Path "" maps to root
-
-        for root_dir, _, filenames in os.walk(self.global_path):
-            rel_root = os.path.relpath(root_dir, self.global_path)
-            parent = root
-
-            if rel_root != ".":
-                parts = rel_root.split("/")
-                for i, part in enumerate(parts):
-                    folder_path = "/".join(parts[:i + 1])
-                    if folder_path not in nodes:
-                        folder_node = FolderNode(part, folder_path)
-                        nodes[folder_path] = folder_node
-                        parent.add_child(folder_node)
-                    parent = nodes[folder_path]
-
-            for fname in filenames:
-                if fname.endswith(".py"):
-                    rel_path = os.path.join(rel_root, fname) if rel_root != "." else fname
-                    script_node = ScriptNode(fname, rel_path)
+        nodes: Dict[str, Node] = IndexedNodes({"root": root})  # Path "" maps to root
+
+        with self.profiler.stage("scan"):
+            for folder, name, is_dir in scan_tree(self.global_path, self.excludes, self.use_gitignore):
+                parent = nodes[folder] if folder else root
+                rel_path = f"{folder}/{name}" if folder else name
+                if is_dir:
+                    folder_node = FolderNode(name, rel_path)
+                    nodes[rel_path] = folder_node
+                    parent.add_child(folder_node)
+                elif name.endswith(".py"):
+                    script_node = ScriptNode(name, rel_path)
                     nodes[rel_path] = script_node
                     parent.add_child(script_node)
+        # O(1) from the per-kind counts of the trie, not a scan of the nodes
+        self.profiler.count("scripts_found", nodes.trie.count(kind="ScriptNode"))
 
         return root, nodes
-    
+
+
+def scripts_in(nodes: Dict[str, Node], global_path: Path, folder: Path) -> Iterator[Tuple[str, Node]]:
+    """
+    (path, ScriptNode) pairs of the scripts under folder (global_path or one of its
+    subfolders). With IndexedNodes only that subtree of the trie is visited;
+    otherwise every node is checked.
+    """
+    if isinstance(nodes, IndexedNodes) and folder.is_relative_to(global_path):
+        return nodes.subtree(folder.relative_to(global_path).as_posix(), "ScriptNode")
+    return ((path, node) for path, node in nodes.items() if isinstance(node, ScriptNode) and (global_path / path).is_relative_to(folder))
+
+# ------------------------------------------------- #
+#             SCRIPT SUMMARIES
+# ------------------------------------------------- #
+# Compact, picklable description of one script. Worker processes send these back
+# instead of full ASTs so that IPC stays cheap:
+#   {
+#     "definitions": [("class", "ClassA", ["__init__", "method1"]),
+#                     ("function", "indep_fun_11B", []), ...],
+#     "imports":     [("import", None, 0, [("script2", "s2")]),
+#                     ("from", "script1", 0, [("classA", "CA")]), ...],
+#     "calls":       {"method1": ["script1.classA.method1", ...], ...},
+#     "scopes":      {"ClassA.method1": {"calls": [(("classA2",), "method1"), ...],
+#                                        "locals": {"classA2": ("ClassA2", "()")}}, ...},
+#     "attributes":  {"ClassA": {"classB": ("ClassB", "()")}, ...},
+#     "bases":       {"ClassA": [("base_module", "Base")], ...},
+#     "docstrings":  {"": "Module docstring", "ClassA": "...", "ClassA.method1": "...", ...},
+#   }
+# Expressions in "scopes"/"attributes"/"bases" are name chains (see expression_chain).
+ImportRecord = Tuple[str, Optional[str], int, List[Tuple[str, Optional[str]]]]
+
+# Bump whenever the summary layout or the extraction logic changes (invalidates parse caches)
+SUMMARY_VERSION = 3
+
+
+def import_records(tree: ast.Module) -> List[ImportRecord]:
+    """Top-level import statements of a module as (kind, module, level, names) records."""
+    records: List[ImportRecord] = []
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Import):
+            records.append(("import", None, 0, [(a.name, a.asname) for a in stmt.names]))
+        elif isinstance(stmt, ast.ImportFrom):
+            records.append(("from", stmt.module, stmt.level, [(a.name, a.asname) for a in stmt.names]))
+    return records
+
+
+def file_import_records(full_path: str) -> List[ImportRecord]:
+    """
+    import_records of a file for import-only traversals: the header scanner of
+    graph.import_scanner when it can tell, the full parse otherwise.
+    """
+    with open(full_path, "r") as file:
+        source = file.read()
+    records = scan_imports(source)
+    return records if records is not None else import_records(ast.parse(source, filename=str(full_path)))
+
+
+def expression_chain(expr: ast.AST) -> Optional[Tuple[str, ...]]:
+    """
+    Dotted name chain of an expression, with "()" for call results:
+    self.classA.method1 -> ("self", "classA", "method1"), script2.classB() -> ("script2", "classB", "()").
+    Returns None for anything else (subscripts, literals, ...).
+    """
+    chain = []
+    while True:
+        if isinstance(expr, ast.Name):
+            chain.append(expr.id)
+            return tuple(reversed(chain))
+        if isinstance(expr, ast.Attribute):
+            chain.append(expr.attr)
+            expr = expr.value
+        elif isinstance(expr, ast.Call):
+            chain.append("()")
+            expr = expr.func
+        else:
+            return None
+
+
+class ScriptVisitor(ast.NodeVisitor):
+    """
+    Collects everything the analyzers need from one module in a single traversal:
+    top-level definitions and imports, local-variable types and call sites.
+
+    Call sites are recorded as raw events (in pre-order, with their depth) and only
+    resolved at the end, because get_dependencies resolves names against every
+    "from X import Y" of the file and replays each function body in ast.walk order.
+    Sorting a function's event range by depth reproduces that order exactly, since
+    a subtree is a contiguous range of the pre-order event list.
+
+    For the call resolver it also keeps, per top-level function and method ("scope"),
+    the call sites and local-variable assignments as name chains, plus the
+    self.<attr> assignments and base classes of every top-level class. Docstrings
+    of the module and of every class and scope feed the lexical index.
+    """
+    def __init__(self):
+        self.depth = 0
+        self.definitions: List[Tuple[str, str, List[str]]] = []
+        self.imports: List[ImportRecord] = []
+        self.from_imports: List[Tuple[int, int, ast.ImportFrom]] = []  # (depth, order, node)
+        self.functions: List[Tuple[int, int, str, int, int]] = []  # (depth, order, name, first event, end event)
+        self.events: List[Tuple] = []
+        self.event_depths: List[int] = []
+        self.scopes: Dict[str, Dict[str, Any]] = {}
+        self.attributes: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self.bases: Dict[str, List[Tuple[str, ...]]] = {}
+        self.docstrings: Dict[str, str] = {}
+        self._class_methods: Optional[List[str]] = None
+        self._class_name: Optional[str] = None
+        self._scope: Optional[Dict[str, Any]] = None
+
+    def generic_visit(self, node: ast.AST):
+        self.depth += 1
+        super().generic_visit(node)
+        self.depth -= 1
+
+    def visit_Import(self, node: ast.Import):
+        if self.depth == 1:
+            self.imports.append(("import", None, 0, [(a.name, a.asname) for a in node.names]))
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if self.depth == 1:
+            self.imports.append(("from", node.module, node.level, [(a.name, a.asname) for a in node.names]))
+        self.from_imports.append((self.depth, len(self.from_imports), node))
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        if self.depth == 1:
+            self._class_methods = []
+            self._class_name = node.name
+            self.definitions.append(("class", node.name, self._class_methods))
+            self.attributes[node.name] = {}
+            self.bases[node.name] = [chain for chain in map(expression_chain, node.bases) if chain]
+            self._docstring(node.name, node)
+            self.generic_visit(node)
+            self._class_methods = None
+            self._class_name = None
+        else:
+            self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        scope_name = None
+        if self.depth == 1:
+            self.definitions.append(("function", node.name, []))
+            scope_name = node.name
+        elif self.depth == 2 and self._class_methods is not None:
+            self._class_methods.append(node.name)
+            scope_name = f"{self._class_name}.{node.name}"
+        if scope_name is not None:
+            self._docstring(scope_name, node)
+            self._scope = self.scopes[scope_name] = {"calls": [], "locals": {}}
+            args = node.args
+            for arg in args.posonlyargs + args.args + args.kwonlyargs:
+                annotation = expression_chain(arg.annotation) if arg.annotation else None
+                if annotation:
+                    self._scope["locals"][arg.arg] = annotation + ("()",)  # An instance of the annotation
+
+        depth, start = self.depth, len(self.events)
+        self.generic_visit(node)
+        self.functions.append((depth, start, node.name, start, len(self.events)))
+        if scope_name is not None:
+            self._scope = None
+
+    def visit_Assign(self, node: ast.Assign):
+        value = node.value
+        for target in node.targets:
+            if isinstance(target, ast.Name) and isinstance(value, ast.Call):
+                if isinstance(value.func, ast.Name):
+                    self._event(("assign", target.id, value.func.id, None))
+                elif isinstance(value.func, ast.Attribute) and isinstance(value.func.value, ast.Name):
+                    self._event(("assign", target.id, value.func.value.id, value.func.attr))
+        if self._scope is not None:
+            value_chain = expression_chain(value)
+            if value_chain:
+                for target in node.targets:
+                    self._assign_chain(target, value_chain)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        if self._scope is not None:
+            value_chain = expression_chain(node.value) if node.value is not None else None
+            if not value_chain:
+                annotation = expression_chain(node.annotation)
+                value_chain = annotation + ("()",) if annotation else None
+            if value_chain:
+                self._assign_chain(node.target, value_chain)
+        self.generic_visit(node)
+
+    def _assign_chain(self, target: ast.AST, value_chain: Tuple[str, ...]):
+        if isinstance(target, ast.Name):
+            self._scope["locals"][target.id] = value_chain
+        elif (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name)
+              and target.value.id == "self" and self._class_name is not None):
+            self.attributes[self._class_name][target.attr] = value_chain
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        if isinstance(func, ast.Name):
+            self._event(("call", None, func.id))
+        elif isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+            self._event(("call", func.value.id, func.attr))
+        if self._scope is not None:
+            chain = expression_chain(func)
+            if chain and chain[-1] != "()":
+                self._scope["calls"].append((chain[:-1], chain[-1]))
+        self.generic_visit(node)
+
+    def _docstring(self, name: str, node: ast.AST):
+        docstring = ast.get_docstring(node)
+        if docstring:
+            self.docstrings[name] = docstring
+
+    def _event(self, event: Tuple):
+        self.events.append(event)
+        self.event_depths.append(self.depth)
+
+    def import_map(self) -> Dict[str, str]:
+        """Local name -> dotted path of every "from X import Y" in the file (ast.walk order)."""
+        imports = {}
+        for _, _, node in sorted(self.from_imports, key=lambda item: item[:2]):
+            if node.module is None:  # "from . import x" has no module to prefix
+                continue
+            for alias in node.names:
+                imported_name = alias.name if alias.asname is None else alias.asname
+                imports[imported_name] = node.module + "." + alias.name
+        return imports
+
+    def dependencies(self) -> Dict[str, Set[str]]:
+        imports = self.import_map()
+        dependencies: Dict[str, Set[str]] = {}
+        depths = self.event_depths
+        # A later function with the same name replaces the earlier one (as in ast.walk order)
+        for _, _, func_name, start, end in sorted(self.functions, key=lambda item: item[:2]):
+            calls = set()
+            local_vars = {}
+            for i in sorted(range(start, end), key=depths.__getitem__):
+                kind, first, second, *rest = self.events[i]
+                if kind == "assign":
+                    var_name, attr = first, rest[0]
+                    if attr is None:
+                        if second in imports:
+                            local_vars[var_name] = imports[second]
+                    elif second in imports:
+                        local_vars[var_name] = imports[second] + "." + attr
+                elif first is None:
+                    calls.add(imports.get(second, second))
+                elif first in local_vars:
+                    calls.add(f"{local_vars[first]}.{second}")
+                elif first in imports:
+                    calls.add(f"{imports[first]}.{second}")
+                else:
+                    calls.add(f"{first}.{second}")
+            dependencies[func_name] = calls
+        return dependencies
+
+
+def summarize_tree(tree: ast.Module) -> Dict[str, Any]:
+    visitor = ScriptVisitor()
+    visitor.visit(tree)
+    visitor._docstring("", tree)
+    calls = {caller: sorted(callees) for caller, callees in visitor.dependencies().items()}
+    # Definitions keep their source order so both analyzer paths add children identically
+    return {
+        "definitions": visitor.definitions,
+        "imports": visitor.imports,
+        "calls": calls,
+        "scopes": visitor.scopes,
+        "attributes": visitor.attributes,
+        "bases": visitor.bases,
+        "docstrings": visitor.docstrings,
+    }
+
+
+def summarize_file(full_path: str) -> Dict[str, Any]:
+    """Parse one script and return its summary (runs inside worker processes)."""
+    with open(full_path, "r") as file:
+        return summarize_tree(ast.parse(file.read()))
+
+
+def summarize_file_timed(full_path: str) -> Tuple[Dict[str, Any], int, int, int]:
+    """summarize_file plus (start ns, duration ns, pid), for profiling worker processes."""
+    start = time.perf_counter_ns()
+    summary = summarize_file(full_path)
+    return summary, start, time.perf_counter_ns() - start, os.getpid()
+
+
+# ------------------------------------------------- #
+#             AST CACHE
+# ------------------------------------------------- #
+# Measured on the standard library: an AST takes ~30 bytes per byte of source
+AST_BYTES_PER_SOURCE_BYTE = 30
+
+
+class ASTCache(MutableMapping):
+    """
+    LRU mapping of script path -> AST, capped by entry count and/or estimated bytes.
+
+    Trees are weighed by their source size (see put) times AST_BYTES_PER_SOURCE_BYTE.
+    The least recently used trees are pushed out past either cap, after being handed
+    to on_evict(path, tree) so their owner can keep a summary of them. The newest
+    tree always stays. Iteration does not count as use.
+    """
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.nbytes = 0
+        self.evictions = 0
+        self._trees: "OrderedDict[str, Tuple[ast.Module, int]]" = OrderedDict()
+
+    def put(self, path: str, tree: ast.Module, source_size: int = 0):
+        if path in self._trees:
+            self.nbytes -= self._trees.pop(path)[1]
+        size = source_size * AST_BYTES_PER_SOURCE_BYTE
+        self._trees[path] = (tree, size)
+        self.nbytes += size
+        while len(self._trees) > 1 and (
+            (self.max_entries is not None and len(self._trees) > self.max_entries)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            evicted_path, (evicted_tree, evicted_size) = self._trees.popitem(last=False)
+            self.nbytes -= evicted_size
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(evicted_path, evicted_tree)
+
+    def __getitem__(self, path: str) -> ast.Module:
+        tree = self._trees[path][0]
+        self._trees.move_to_end(path)
+        return tree
+
+    def __setitem__(self, path: str, tree: ast.Module):
+        self.put(path, tree)
+
+    def __delitem__(self, path: str):
+        self.nbytes -= self._trees.pop(path)[1]
+
+    def __contains__(self, path) -> bool:
+        return path in self._trees
+
+    def __iter__(self):
+        return iter(list(self._trees))
+
+    def __len__(self) -> int:
+        return len(self._trees)
+
+    def items(self):
+        return [(path, tree) for path, (tree, _) in self._trees.items()]
+
+
 # ------------------------------------------------- #
 #             SCRIPT ANALYZER
 # ------------------------------------------------- #
 class ScriptAnalyzer:
-    def __init__(self, nodes: Dict[str, Node], global_path: str, query_folder: Optional[str] = None):
+    """
+    Adds Class/Function/Method nodes below every ScriptNode in query_folder.
+
+    With workers <= 1 every script is parsed in-process and its AST kept in
+    ast_cache. With workers > 1 scripts are parsed in a process pool and only
+    their summaries are kept (in summaries); the resulting graph is the same.
+
+    An optional parse cache (see graph/parse_cache.py) serves summaries of
+    unchanged scripts from disk, so only new or edited files get parsed.
+    With scan=False nothing is parsed up front; scripts are then added one at
+    a time with analyze_script (used by graph/watcher.py).
+
+    An optional profiler (see graph/profiler.py) records the "parse" and
+    "build_nodes" stages and the time spent on every file.
+
+    ast_cache may be a bounded ASTCache: trees it evicts are summarized first,
+    and analyze() then builds their nodes from the summary.
+    """
+    def __init__(self, nodes: Dict[str, Node], global_path: str, query_folder: Optional[str] = None, workers: int = 0, cache=None, scan: bool = True, profiler=None, ast_cache: Optional[MutableMapping] = None):
         self.nodes = nodes
         self.global_path = Path(global_path)
         self.query_folder = self.global_path / query_folder if query_folder else self.global_path
-        self.ast_cache = {}
-        self._build_ast()
+        self.workers = workers
+        self.cache = cache
+        self.profiler = profiler or NULL_PROFILER
+        self.ast_cache = ast_cache if ast_cache is not None else {}
+        if isinstance(self.ast_cache, ASTCache) and self.ast_cache.on_evict is None:
+            self.ast_cache.on_evict = self._keep_summary
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        if scan:
+            self._build_ast()
+
+    def _script_paths(self) -> Dict[str, Path]:
+        script_paths = {}
+        for path, node in list(scripts_in(self.nodes, self.global_path, self.query_folder)):
+            full_path = self.global_path / node.path
+            if full_path.exists():
+                script_paths[path] = full_path
+        return script_paths
 
     def _build_ast(self):
-        for path, node in list(self.nodes.items()):
-            if isinstance(node, ScriptNode):
-                full_path = self.global_path / node.path
-                if full_path.exists() and full_path.is_relative_to(self.query_folder):
-                    with open(full_path, "r") as file:
-                        self.ast_cache[path] = ast.parse(file.read())
+        with self.profiler.stage("parse", workers=self.workers):
+            script_paths = self._script_paths()
+            if self.cache is not None:
+                cached = len(script_paths)
+                script_paths = self._load_cached(script_paths)
+                self.profiler.count("files_cached", cached - len(script_paths))
+            self.profiler.count("files_parsed", len(script_paths))
+
+            if self.workers > 1:
+                self._build_summaries(script_paths)
+            elif self.cache is not None:
+                for path, full_path in script_paths.items():
+                    with self.profiler.file(path, "parse"):
+                        self.summaries[path] = summarize_file(str(full_path))
+            else:
+                for path, full_path in script_paths.items():
+                    with self.profiler.file(path, "parse"):
+                        with open(full_path, "r") as file:
+                            source = file.read()
+                        self._store_tree(path, ast.parse(source), len(source))
+
+            if self.cache is not None:
+                for path in script_paths:
+                    self.cache.put(path, self.summaries[path])
+                # A run over a subfolder did not look up the scripts elsewhere: keep their rows
+                self.cache.save(prune_unseen=self.query_folder == self.global_path)
+
+    def _store_tree(self, path: str, tree: ast.Module, source_size: int):
+        if isinstance(self.ast_cache, ASTCache):
+            self.ast_cache.put(path, tree, source_size)
+        else:
+            self.ast_cache[path] = tree
+
+    def _keep_summary(self, path: str, tree: ast.Module):
+        if path not in self.summaries:
+            self.summaries[path] = summarize_tree(tree)
+
+    def parse(self, path: str) -> ast.Module:
+        """AST of a script: from ast_cache, or parsed now and cached."""
+        if path in self.ast_cache:
+            return self.ast_cache[path]
+        with self.profiler.file(path, "parse"):
+            with open(self.global_path / path, "r") as file:
+                source = file.read()
+            tree = ast.parse(source)
+        self.profiler.count("files_parsed")
+        self._store_tree(path, tree, len(source))
+        return tree
+
+    def _load_cached(self, script_paths: Dict[str, Path]) -> Dict[str, Path]:
+        """Fill summaries from the parse cache and return the scripts that still need parsing."""
+        misses = {}
+        for path, full_path in script_paths.items():
+            summary = self.cache.get(path, full_path)
+            if summary is None:
+                misses[path] = full_path
+            else:
+                self.summaries[path] = summary
+        return misses
+
+    def _build_summaries(self, script_paths: Dict[str, Path]):
+        paths = list(script_paths)
+        if not paths:
+            return
+        # Large chunks amortise the per-task IPC, a few per worker keep the load balanced
+        chunksize = max(1, len(paths) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            full_paths = [str(script_paths[path]) for path in paths]
+            if not self.profiler.enabled:
+                for path, summary in zip(paths, executor.map(summarize_file, full_paths, chunksize=chunksize)):
+                    self.summaries[path] = summary
+                return
+            for path, (summary, start, duration, pid) in zip(paths, executor.map(summarize_file_timed, full_paths, chunksize=chunksize)):
+                self.summaries[path] = summary
+                self.profiler.record(path, "parse", start, duration, pid=pid)
 
     def analyze(self):
         script_nodes = list(self.nodes.items())
-        for path, node in script_nodes:
-            if isinstance(node, ScriptNode) and path in self.ast_cache:
-                tree = self.ast_cache[path]
-                self._process_script(node, tree)
-
-    def _process_script(self, script_node: ScriptNode, tree: ast.Module):
-        for ast_node in tree.body:
-            if isinstance(ast_node, ast.ClassDef):
-                self._process_class(script_node, ast_node)
-            elif isinstance(ast_node, ast.FunctionDef):
-                self._process_function(script_node, ast_node)
-
-    def _process_class(self, script_node: ScriptNode, ast_node: ast.ClassDef):
-        class_path = f"{script_node.path}::{ast_node.name}"
-        class_node = ClassNode(ast_node.name, class_path, script_node)
+        with self.profiler.stage("build_nodes"):
+            for path, node in script_nodes:
+                if isinstance(node, ScriptNode):
+                    if path in self.summaries:
+                        self._process_summary(node, self.summaries[path])
+                    elif path in self.ast_cache:
+                        # One pass over the tree (definitions, imports and call extraction);
+                        # ImportAnalyzer and callers reuse the summary
+                        with self.profiler.file(path, "summarize"):
+                            summary = summarize_tree(self.ast_cache[path])
+                        self.summaries[path] = summary
+                        self._process_summary(node, summary)
+
+    def analyze_script(self, path: str, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Parse a single script and add its Class/Function/Method nodes (children must be empty)."""
+        full_path = self.global_path / path
+        if summary is None and self.cache is not None:
+            summary = self.cache.get(path, full_path)
+        # A tree cached earlier may be stale: parse again (or use the summary given)
+        self.ast_cache.pop(path, None)
+        if summary is None:
+            summary = summarize_tree(self.parse(path))
+            if self.cache is not None:
+                self.cache.put(path, summary)
+        self.summaries[path] = summary
+        self._process_summary(self.nodes[path], summary)
+        return summary
+
+    def _process_summary(self, script_node: ScriptNode, summary: Dict[str, Any]):
+        for kind, name, methods in summary["definitions"]:
+            if kind == "class":
+                self._process_class(script_node, name, methods)
+            else:
+                self._process_function(script_node, name)
+
+    def _process_class(self, script_node: ScriptNode, class_name: str, methods: List[str]):
+        class_path = f"{script_node.path}::{class_name}"
+        class_node = ClassNode(class_name, class_path, script_node)
         self.nodes[class_path] = class_node
         script_node.add_child(class_node)
 
-        for method in ast_node.body:
-            if isinstance(method, ast.FunctionDef):
-                method_path = f"{class_path}::{method.name}"
-                method_node = MethodNode(method.name, method_path, class_node)
-                self.nodes[method_path] = method_node
-                class_node.add_child(method_node)
+        for method_name in methods:
+            method_path = f"{class_path}::{method_name}"
+            method_node = MethodNode(method_name, method_path, class_node)
+            self.nodes[method_path] = method_node
+            class_node.add_child(method_node)
 
-    def _process_function(self, script_node: ScriptNode, ast_node: ast.FunctionDef):
-        function_path = f"{script_node.path}::{ast_node.name}"
-        function_node = FunctionNode(ast_node.name, function_path, script_node)
+    def _process_function(self, script_node: ScriptNode, function_name: str):
+        function_path = f"{script_node.path}::{function_name}"
+        function_node = FunctionNode(function_name, function_path, script_node)
         self.nodes[function_path] = function_node
         script_node.add_child(function_node)
 
+# ------------------------------------------------- #
+#             MODULE INDEX
+# ------------------------------------------------- #
+class ModuleIndex:
+    """
+    Maps import names to script paths, built once from the FolderScriptBuilder nodes.
+
+    - modules:   dotted module name -> script path, for every source root
+                 (e.g. with source_roots=["", "src"], "src/pkg/mod.py" is both
+                 "src.pkg.mod" and "pkg.mod")
+    - locations: slash-separated location relative to global_path -> script path,
+                 used for relative imports ("folder1/folder1_1/script1_1B")
+
+    Packages resolve to their __init__.py, which wins over a same-named module.
+    Namespace packages (folders without __init__.py) have no script of their own;
+    their submodules are still found through the full dotted name.
+    """
+    def __init__(self, nodes: Dict[str, Node], source_roots: Tuple[str, ...] = ("",)):
+        self.source_roots = [root.strip("/") for root in source_roots]
+        self.modules: Dict[str, str] = {}
+        self.locations: Dict[str, str] = {}
+        self._candidates: Dict[Tuple[str, str], Set[Tuple[Tuple[int, int], str]]] = {}
+        self._package_parts: Dict[str, List[str]] = {}
+        for path, node in nodes.items():
+            if isinstance(node, ScriptNode):
+                self.add(path)
+
+    @staticmethod
+    def location(path: str) -> Optional[str]:
+        """"pkg/mod.py" -> "pkg/mod", "pkg/__init__.py" -> "pkg" (None for a top-level __init__.py)."""
+        if not path.endswith(".py"):
+            return None
+        location = path[:-3]
+        if location == "__init__":
+            return None
+        if location.endswith("/__init__"):
+            location = location[:-len("/__init__")]
+        return location
+
+    def _entries(self, path: str) -> List[Tuple[str, str, Tuple[int, int]]]:
+        """(table, key, rank) entries for one script; the lowest rank owns a key."""
+        location = self.location(path)
+        if location is None:
+            return []
+        is_module = 0 if path.endswith("__init__.py") else 1
+        entries = [("locations", location, (0, is_module))]
+        for i, root in enumerate(self.source_roots):
+            if not root:
+                entries.append(("modules", location.replace("/", "."), (i, is_module)))
+            elif location.startswith(root + "/"):
+                entries.append(("modules", location[len(root) + 1:].replace("/", "."), (i, is_module)))
+        return entries
+
+    def _refresh(self, table: str, key: str):
+        candidates = self._candidates.get((table, key))
+        target = getattr(self, table)
+        if candidates:
+            target[key] = min(candidates)[1]
+        else:
+            self._candidates.pop((table, key), None)
+            target.pop(key, None)
+
+    def add(self, path: str):
+        for table, key, rank in self._entries(path):
+            self._candidates.setdefault((table, key), set()).add((rank, path))
+            self._refresh(table, key)
+
+    def remove(self, path: str):
+        for table, key, rank in self._entries(path):
+            self._candidates.get((table, key), set()).discard((rank, path))
+            self._refresh(table, key)
+
+    def names(self, path: str) -> Set[str]:
+        """Every dotted name under which a script can be imported."""
+        return {key.replace("/", ".") for _, key, _ in self._entries(path)}
+
+    def absolute_location(self, module_name: str, level: int, base_path: str) -> Optional[str]:
+        """Location targeted by a relative import ("from ..x import y" in base_path)."""
+        parts = self._package_parts.get(base_path)
+        if parts is None:
+            parts = self._package_parts[base_path] = base_path.split("/")[:-1]
+        if level - 1 > len(parts):
+            return None  # Relative import beyond global_path
+        package = parts[:len(parts) - (level - 1)]
+        if module_name:
+            package = package + module_name.split(".")
+        return "/".join(package)
+
+    def resolve(self, module_name: str, level: int = 0, base_path: str = "") -> Optional[str]:
+        if level == 0:
+            return self.modules.get(module_name) if module_name else None
+        location = self.absolute_location(module_name, level, base_path)
+        return self.locations.get(location) if location is not None else None
+
 # ------------------------------------------------- #
 #             IMPORT ANALYZER
 # ------------------------------------------------- #
+def resolve_imports(records: List[ImportRecord], script_path: str, module_index: "ModuleIndex",
+                    kind_of: Callable[[str], Optional[str]]) -> Iterator[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """
+    (kind, target path, alias) for every name imported by the records of script_path.
+    kind is "script", "class" or "function", or None when the name does not resolve.
+    The alias is None for "from X import name" when name is no node of X (the edge
+    then goes to X itself). kind_of(path) gives the class name of the node at path
+    ("ScriptNode", "ClassNode", ...) or None, so nodes dicts and GraphStoreBuilder
+    resolve imports the same way.
+
+    Examples:
+        import script2 as s2                    ("script", "script2.py", "s2")
+        from script1 import classA, functionB  ("class", "script1.py::classA", "classA"), ("function", ...)
+        from . import something                 ("script", "pkg/something.py", "something")
+    """
+    for kind, module, level, names in records:
+        if kind == "import":
+            for module_name, asname in names:
+                target = module_index.resolve(module_name, base_path=script_path)
+                if target and kind_of(target) == "ScriptNode":
+                    yield "script", target, asname or module_name
+                else:
+                    yield None, None, None
+            continue
+
+        module_name = module or ""
+        from_script_path = module_index.resolve(module_name, level, script_path)
+        if from_script_path and kind_of(from_script_path) != "ScriptNode":
+            from_script_path = None
+        for imported_name, asname in names:
+            as_name = asname or imported_name
+            if from_script_path is not None:
+                fq_path = f"{from_script_path}::{imported_name}"
+                member = kind_of(fq_path)
+                if member is not None:
+                    if member == "ClassNode":
+                        yield "class", fq_path, as_name
+                    elif member == "FunctionNode":
+                        yield "function", fq_path, as_name
+                    continue
+            # "from pkg import module" (also for namespace packages without __init__.py)
+            submodule = f"{module_name}.{imported_name}" if module_name else imported_name
+            submodule_path = module_index.resolve(submodule, level, script_path)
+            if submodule_path and kind_of(submodule_path) == "ScriptNode":
+                yield "script", submodule_path, as_name
+            elif from_script_path is not None:
+                # If no symbol match is found, treat as entire script import
+                yield "script", from_script_path, None
+            else:
+                yield None, None, None
+
+
 class ImportAnalyzer:
-    def __init__(self, global_path: str, nodes: Dict[str, Node], ast_cache: Dict[str, ast.Module], query_folder: Optional[str] = None):
+    """
+    Links scripts to the scripts, classes and functions they import.
+
+    Import records come from the summaries or ASTs of ScriptAnalyzer. With
+    scan_unparsed, scripts it did not parse are read with file_import_records
+    instead, which builds a script-to-script import graph straight from
+    FolderScriptBuilder's nodes (imported names resolve to the script, since
+    there are no class or function nodes to link).
+
+    analyze() raises ValueError when it has no source of import records at all
+    (no summaries, no cached ASTs and no scan_unparsed) but there are scripts to
+    link: ScriptAnalyzer keeps no ASTs with workers > 1 or a parse cache, so pass
+    summaries=script_analyzer.summaries.
+    """
+    def __init__(self, global_path: str, nodes: Dict[str, Node], ast_cache: Dict[str, ast.Module], query_folder: Optional[str] = None, summaries: Optional[Dict[str, Dict[str, Any]]] = None, module_index: Optional[ModuleIndex] = None, source_roots: Tuple[str, ...] = ("",), profiler=None, scan_unparsed: bool = False):
         self.global_path = Path(global_path)
         self.nodes = nodes
         self.ast_cache = ast_cache
+        self.summaries = summaries if summaries is not None else {}
+        self.scan_unparsed = scan_unparsed
+        self.scanned: Dict[str, List[ImportRecord]] = {}  # path -> records of the scripts read with file_import_records
+        self.profiler = profiler or NULL_PROFILER
+        with self.profiler.stage("module_index"):
+            self.module_index = module_index if module_index is not None else ModuleIndex(nodes, source_roots)
         self.query_folder = self.global_path / query_folder if query_folder else self.global_path
 
     def analyze(self, script_path: Optional[str] = None):
-        if script_path:
-            script_node = self.nodes.get(script_path)
-            if isinstance(script_node, ScriptNode) and script_path in self.ast_cache:
-                tree = self.ast_cache[script_path]
-                self._process_imports(script_node, tree)
-        else:
-            for path, node in self.nodes.items():
-                full_path = self.global_path / path
-                if isinstance(node, ScriptNode) and path in self.ast_cache and full_path.is_relative_to(self.query_folder):
-                    tree = self.ast_cache[path]
-                    self._process_imports(node, tree)
-
-
-    def _process_imports(self, script_node: ScriptNode, tree: ast.Module):
-        for stmt in tree.body:
-            if isinstance(stmt, ast.Import):
-                self._handle_import(script_node, stmt)
-            elif isinstance(stmt, ast.ImportFrom):
-                self._handle_import_from(script_node, stmt)
-
-    def _handle_import(self, script_node: ScriptNode, stmt: ast.Import):
-        """
-        Example:
-            import script2
-            import script2 as s2
-            import script1, script2 as s2
-        """
-        for alias in stmt.names:
-            module_name = alias.name
-            as_name = alias.asname or module_name
-
-            script_path = self._find_script_path(module_name, base_path=script_node.path)
-            if script_path and script_path in self.nodes and isinstance(self.nodes[script_path], ScriptNode):
-                target_node: ScriptNode = self.nodes[script_path]
-                
+        with self.profiler.stage("resolve_imports"):
+            if script_path:
+                script_node = self.nodes.get(script_path)
+                if isinstance(script_node, ScriptNode) and self._is_parsed(script_path):
+                    self._process_imports(script_node, self._import_records(script_path))
+            else:
+                self._check_sources()
+                for path, node in scripts_in(self.nodes, self.global_path, self.query_folder):
+                    if self._is_parsed(path):
+                        with self.profiler.file(path, "imports"):
+                            self._process_imports(node, self._import_records(path))
+
+    def _check_sources(self):
+        if self.summaries or len(self.ast_cache) or self.scan_unparsed:
+            return
+        if next(iter(scripts_in(self.nodes, self.global_path, self.query_folder)), None) is not None:
+            raise ValueError("ImportAnalyzer has no summaries or ASTs to read imports from: "
+                             "pass summaries=script_analyzer.summaries (or scan_unparsed=True)")
+
+    def _is_parsed(self, path: str) -> bool:
+        if path in self.summaries or path in self.ast_cache:
+            return True
+        if not self.scan_unparsed:
+            return False
+        if path not in self.scanned:
+            try:
+                self.scanned[path] = file_import_records(str(self.global_path / path))
+            except (SyntaxError, ValueError, UnicodeDecodeError, OSError) as e:
+                print(f"Failed to parse {path}: {e}")
+                return False
+        return True
+
+    def _import_records(self, path: str) -> List[ImportRecord]:
+        if path in self.summaries:
+            return self.summaries[path]["imports"]
+        if path in self.ast_cache:
+            return import_records(self.ast_cache[path])
+        return self.scanned[path]
+
+    def _process_imports(self, script_node: ScriptNode, records: List[ImportRecord]):
+        for kind, target, as_name in resolve_imports(records, script_node.path, self.module_index, self._kind):
+            if kind is None:
+                self.profiler.count("imports_unresolved")
+                continue
+            self.profiler.count("imports_resolved")
+            target_node = self.nodes[target]
+            if kind == "script":
                 # Ensure no duplicate dependencies using a set for paths
                 if target_node not in set(script_node.script_dependencies):
                     script_node.script_dependencies.append(target_node)
-                    script_node.aliases[as_name] = script_path
-
-    def _handle_import_from(self, script_node: ScriptNode, stmt: ast.ImportFrom):
-        """
-        Example:
-            from script1 import classA, functionB as fB
-            from . import something
-            from .script2 import SomeClass
-        """
-        module_name = stmt.module or ""
-        level = stmt.level
-        from_script_path = self._find_script_path(module_name, level, script_node.path)
-
-        if not from_script_path or from_script_path not in self.nodes:
-            return
+                    if as_name is not None:
+                        script_node.aliases[as_name] = target
+                    self.profiler.count("edges_created")
+            else:
+                edges = script_node.class_dependencies if kind == "class" else script_node.function_dependencies
+                edges.append(target_node)
+                script_node.aliases[as_name] = target
+                self.profiler.count("edges_created")
 
-        from_script_node = self.nodes[from_script_path]
-        if not isinstance(from_script_node, ScriptNode):
-            return
+    def _kind(self, path: str) -> Optional[str]:
+        node = self.nodes.get(path)
+        return type(node).__name__ if node is not None else None
+
+    def _find_script_path(self, module_name: str, level: int = 0, base_path: str = "") -> Optional[str]:
+        return self.module_index.resolve(module_name, level, base_path)
+    
+
+# ------------------------------------------------- #
+#             ENTRY POINT ANALYZER
+# ------------------------------------------------- #
+def _scope_names(summary: Dict[str, Any], scope: str) -> Set[str]:
+    """
+    Names a scope can reach at module level: heads of its call chains, local
+    variable chains, self attributes and base classes, following the same-script
+    functions and classes it uses. A class scope covers all of its methods.
+    """
+    definitions = {name for _, name, _ in summary["definitions"]}
+    used: Set[str] = set()
+    pending = [scope]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        class_name = current.split(".")[0]
+        chains = [base for base in summary["bases"].get(class_name, [])]
+        chains += list(summary["attributes"].get(class_name, {}).values())
+        for name, info in summary["scopes"].items():
+            if name == current or name.startswith(current + "."):
+                chains += [list(receiver) + [callee] for receiver, callee in info["calls"]]
+                chains += list(info["locals"].values())
+        for chain in chains:
+            head = chain[0]
+            if head in definitions:
+                pending.append(head)
+            used.add(head)
+    return used
 
-        for alias in stmt.names:
-            imported_name = alias.name
-            as_name = alias.asname or imported_name
-
-            fq_path = f"{from_script_path}::{imported_name}"
-            if fq_path in self.nodes:
-                # If it's a ClassNode
-                if isinstance(self.nodes[fq_path], ClassNode):
-                    class_node = self.nodes[fq_path]
-                    script_node.class_dependencies.append(class_node)
-                    script_node.aliases[as_name] = fq_path
-                # If it's a FunctionNode
-                elif isinstance(self.nodes[fq_path], FunctionNode):
-                    func_node = self.nodes[fq_path]
-                    script_node.function_dependencies.append(func_node)
-                    script_node.aliases[as_name] = fq_path
+
+class EntryPointAnalyzer:
+    """
+    Lazy alternative to running ScriptAnalyzer and ImportAnalyzer over a folder.
+
+    analyze(entry) starts from a script ("pkg/api.py"), a dotted module or symbol
+    ("pkg.api.Handler") or a node path ("pkg/api.py::Handler::get") and follows
+    imports outward breadth first, parsing scripts only when they are reached. For
+    a symbol, only the imports its code uses are followed from the entry script.
+    Nodes and import edges are built for the reached scripts alone, so parsing
+    work and memory follow the reachable subgraph, not the repo.
+
+    Summaries are kept for every analyzed script. ASTs live in a bounded ASTCache
+    (max_asts trees and/or max_ast_bytes estimated bytes), so the trees of
+    scripts left behind by the traversal are dropped. Later calls reuse what
+    earlier ones analyzed. The nodes only need the folders and scripts from
+    FolderScriptBuilder.
+    """
+    def __init__(self, global_path: str, nodes: Dict[str, Node], max_asts: Optional[int] = 256, max_ast_bytes: Optional[int] = None,
+                 cache=None, source_roots: Tuple[str, ...] = ("",), profiler=None):
+        self.global_path = Path(global_path)
+        self.nodes = nodes
+        self.ast_cache = ASTCache(max_asts, max_ast_bytes)
+        self.script_analyzer = ScriptAnalyzer(nodes, global_path, cache=cache, scan=False, profiler=profiler, ast_cache=self.ast_cache)
+        self.summaries = self.script_analyzer.summaries
+        self.import_analyzer = ImportAnalyzer(global_path, nodes, self.ast_cache, summaries=self.summaries,
+                                              source_roots=source_roots, profiler=profiler)
+        self.module_index = self.import_analyzer.module_index
+        self.analyzed: Set[str] = set()  # Scripts with Class/Function/Method nodes
+        self.linked: Set[str] = set()    # Scripts whose imports were resolved with every target analyzed
+
+    def _entry(self, entry: str) -> Tuple[str, Optional[str]]:
+        """(script path, scope or None) of an entry point."""
+        if "::" in entry:
+            script_path, symbol = entry.split("::", 1)
+            if isinstance(self.nodes.get(script_path), ScriptNode):
+                return script_path, symbol.replace("::", ".")
+        elif isinstance(self.nodes.get(entry), ScriptNode):
+            return entry, None
+        else:
+            parts = entry.split(".")
+            for length in range(len(parts), 0, -1):
+                script_path = self.module_index.resolve(".".join(parts[:length]))
+                if script_path is not None:
+                    return script_path, ".".join(parts[length:]) or None
+        raise ValueError(f"Unknown entry point {entry!r}")
+
+    def _load(self, path: str) -> bool:
+        if path in self.analyzed:
+            return True
+        try:
+            self.script_analyzer.analyze_script(path)
+        except (SyntaxError, ValueError, UnicodeDecodeError, OSError) as e:
+            print(f"Failed to parse {path}: {e}")
+            return False
+        self.analyzed.add(path)
+        return True
+
+    def _import_targets(self, path: str, used: Optional[Set[str]] = None) -> Set[str]:
+        """Scripts the imports of path point at (only imports of the names in used, if given)."""
+        targets = set()
+        for kind, module, level, names in self.summaries[path]["imports"]:
+            if used is not None:
+                names = [(name, asname) for name, asname in names if (asname or name.split(".")[0]) in used]
+            if kind == "import":
+                candidates = [self.module_index.resolve(name) for name, _ in names]
+            elif names:
+                module_name = module or ""
+                candidates = [self.module_index.resolve(module_name, level, path)]
+                candidates += [self.module_index.resolve(f"{module_name}.{name}" if module_name else name, level, path) for name, _ in names]
             else:
-                # If no symbol match is found, treat as entire script import
-                if from_script_node not in set(script_node.script_dependencies):
-                    script_node.script_dependencies.append(from_script_node)
-                    # script_node.aliases[as_name] = from_script_path
+                continue
+            targets.update(target for target in candidates if isinstance(self.nodes.get(target), ScriptNode))
+        targets.discard(path)
+        return targets
 
-    def _find_script_path(self, module_name: str, level: int = 0, base_path: str = "") -> Optional[str]:
-        if not module_name and level == 0:
-            return None
+    def _link(self, path: str):
+        script_node = self.nodes[path]
+        script_node.script_dependencies = []
+        script_node.class_dependencies = []
+        script_node.function_dependencies = []
+        script_node.aliases = {}
+        self.import_analyzer.analyze(path)
+        if self._import_targets(path) <= self.analyzed:
+            self.linked.add(path)
+
+    def analyze(self, entry: str, max_depth: Optional[int] = None) -> List[str]:
+        """Analyze everything reachable from entry (within max_depth imports); return the reached scripts."""
+        start, scope = self._entry(entry)
+        depths = {start: 0}
+        queue = deque([start])
+        while queue:
+            path = queue.popleft()
+            if not self._load(path) or depths[path] == max_depth:
+                continue
+            used = _scope_names(self.summaries[path], scope) if path == start and scope else None
+            for target in sorted(self._import_targets(path, used)):
+                if target not in depths:
+                    depths[target] = depths[path] + 1
+                    queue.append(target)
+
+        reached = [path for path in depths if path in self.analyzed]
+        for path in reached:
+            if path not in self.linked:
+                self._link(path)
+        return reached
 
-        # Convert module name using dot notation to a relative script path
-        relative_path = Path(module_name.replace(".", "/")).with_suffix(".py")
-        
-        # If relative path exists in nodes, return it
-        return str(relative_path) if str(relative_path) in self.nodes else None
-    
 
 # ------------------------------------------------- #
 #             CODE PARSER
@@ -267,74 +1053,15 @@ import os
 from typing import Dict, List, Set
 
 def get_dependencies(filepath: str) -> Dict[str, Set[str]]:
-    dependencies: Dict[str, Set[str]] = {}
     with open(filepath, "r") as f:
         tree = ast.parse(f.read())
+    return extract_dependencies(tree)
 
-    imports = {}  # Store imported modules and their aliases
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ImportFrom):
-            module_path = node.module
-            for alias in node.names:
-                imported_name = alias.name if alias.asname is None else alias.asname
-                imports[imported_name] = module_path + "." + alias.name #corrected: add alias.name
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            func_name = node.name
-            dependencies[func_name] = set()
-            local_vars = {}
 
-            for subnode in ast.walk(node):
-                if isinstance(subnode, ast.Assign):
-                    for target in subnode.targets:
-                        if isinstance(target, ast.Name):
-                            var_name = target.id
-                            if isinstance(subnode.value, ast.Call):
-                                if isinstance(subnode.value.func, ast.Name):
-                                    called_class = subnode.value.func.id
-                                    if called_class in imports:
-                                        full_class_path = imports[called_class]
-                                        local_vars[var_name] = full_class_path
-                                elif isinstance(subnode.value.func, ast.Attribute):
-                                    module_name = subnode.value.func.value.id
-                                    called_class = subnode.value.func.attr
-                                    if module_name in imports:
-                                        full_class_path = imports[module_name] + "." + called_class
-                                        local_vars[var_name] = full_class_path
-
-                elif isinstance(subnode, ast.Call):
-                    if isinstance(subnode.func, ast.Attribute):
-                        try:
-                            obj_name = subnode.func.value.id
-                            method_name = subnode.func.attr
-                            if obj_name in local_vars:
-                                obj_type = local_vars[obj_name]
-                                dependencies[func_name].add(f"{obj_type}.{method_name}")
-                            elif isinstance(subnode.func.value, ast.Name): # If the value is not a local variable it is a module
-                                if subnode.func.value.id in imports:
-                                    dependencies[func_name].add(f"{imports[subnode.func.value.id]}.{method_name}") # If the value is not a local variable it is a module
-                                else:
-                                    dependencies[func_name].add(f"{subnode.func.value.id}.{method_name}") # If the value is not a local variable it is a module
-
-                            elif isinstance(subnode.func.value, ast.Attribute): # If the value is another attribute
-                                module_name = subnode.func.value.value.id
-                                method_name = f"{subnode.func.value.attr}.{subnode.func.attr}"
-                                if module_name in imports:
-                                    dependencies[func_name].add(f"{imports[module_name]}.{method_name}")
-                                else:
-                                    dependencies[func_name].add(f"{module_name}.{method_name}")
-                        except AttributeError:
-                           pass
-
-                    elif isinstance(subnode.func, ast.Name):
-                        called_function = subnode.func.id
-                        if called_function in imports:
-                            dependencies[func_name].add(imports[called_function])
-                        else:
-                            dependencies[func_name].add(called_function)
-
-    return dependencies
+def extract_dependencies(tree: ast.Module) -> Dict[str, Set[str]]:
+    visitor = ScriptVisitor()
+    visitor.visit(tree)
+    return visitor.dependencies()
 
 
 def simplify_dependencies(dependencies: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
@@ -354,28 +1081,36 @@ if __name__ == "__main__":
     global_path = "/home/david/Documents/glovo/machine-learning-platform/"
     script_path = "widget_framework/api.py"
     query_folder = "widget_framework"
-    filepath = os.path.join(global_path, script_path)
-
-    # 0) Build the folder and script nodes
-    fsb = FolderScriptBuilder(global_path)
-    root, nodes = fsb.build()
-
-    # 1) Build Script/Class/Function/Method nodes
-    script_analyzer = ScriptAnalyzer(
-        nodes=nodes, 
-        global_path=global_path,
-        query_folder=query_folder
-    )
-    script_analyzer.analyze()
-
-    # 2) Build the import relationships
-    import_analyzer = ImportAnalyzer(
-        global_path=global_path, 
-        nodes=nodes, 
-        ast_cache=script_analyzer.ast_cache,
-        query_folder=query_folder
-    )
-    import_analyzer.analyze("widget_framework/api.py")
+
+    # Stage timings, counters and the slowest files; open the trace in ui.perfetto.dev
+    from graph.profiler import Profiler
+    profiler = Profiler(json_path="profile.json", trace_path="trace.json")
+
+    with profiler:
+        # 0) Build the folder and script nodes
+        fsb = FolderScriptBuilder(global_path, profiler=profiler)
+        root, nodes = fsb.build()
+
+        # 1) Build Script/Class/Function/Method nodes
+        script_analyzer = ScriptAnalyzer(
+            nodes=nodes, 
+            global_path=global_path,
+            query_folder=query_folder,
+            workers=os.cpu_count() or 1,
+            profiler=profiler
+        )
+        script_analyzer.analyze()
+
+        # 2) Build the import relationships
+        import_analyzer = ImportAnalyzer(
+            global_path=global_path, 
+            nodes=nodes, 
+            ast_cache=script_analyzer.ast_cache,
+            query_folder=query_folder,
+            summaries=script_analyzer.summaries,
+            profiler=profiler
+        )
+        import_analyzer.analyze("widget_framework/api.py")
 
     # RESULTS so far:
     #     vars(nodes["widget_framework/api.py"])["class_dependencies"]
@@ -387,7 +1122,8 @@ if __name__ == "__main__":
     # Get the dependencies of each function / method to the classes and functions they call
     # which are defined either in the same script or imported in the imports
         
-    deps = get_dependencies(filepath)
+    # Call dependencies were collected in the same pass as the nodes above
+    deps = script_analyzer.summaries[script_path]["calls"]
     simplified_deps = simplify_dependencies(deps)
 
     for caller, callees in simplified_deps.items():
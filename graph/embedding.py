@@ -0,0 +1,300 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import textwrap
+import time
+import urllib.request
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from graph.chunker import Chunk
+from graph.lexical_index import tokenize
+from graph.vector_index import VectorIndex
+
+# Bump whenever the on-disk layout below or normalize_chunk changes
+CACHE_FORMAT = 1
+
+
+def normalize_chunk(text: str) -> str:
+    """
+    Text of a chunk as it is hashed and embedded: dedented, without trailing spaces
+    or blank lines, so a method and its copy at another indentation are one entry.
+    """
+    lines = [line.rstrip() for line in textwrap.dedent(text.replace("\r\n", "\n")).split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+def content_digest(text: str, model: str) -> str:
+    return hashlib.sha1(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache: content digest (of the normalized chunk and the model)
+    -> float32 vector.
+
+    The cache is tied to one model: loading a file written for another model (or
+    another CACHE_FORMAT) starts empty. On save, the least recently used vectors
+    are evicted until at most max_entries remain. Without cache_path it only lives
+    in memory.
+    """
+    def __init__(self, cache_path: Optional[str], model: str, max_entries: int = 1_000_000):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.model = model
+        self.max_entries = max_entries
+        self.version = (CACHE_FORMAT, model)
+        self.vectors: Dict[str, Tuple[np.ndarray, int]] = {}  # digest -> (vector, last_used_run)
+        self.run = 0
+        self._load()
+
+    def _load(self):
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"Ignoring unreadable embedding cache {self.cache_path}: {e}")
+            return
+        if data.get("version") != self.version:
+            return  # Other model: start from an empty cache
+        self.vectors = data["vectors"]
+        self.run = data["run"] + 1
+
+    def get(self, digest: str) -> Optional[np.ndarray]:
+        entry = self.vectors.get(digest)
+        if entry is None:
+            return None
+        self.vectors[digest] = (entry[0], self.run)
+        return entry[0]
+
+    def put(self, digest: str, vector: np.ndarray):
+        self.vectors[digest] = (vector, self.run)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def save(self):
+        if self.cache_path is None:
+            return
+        overflow = len(self.vectors) - self.max_entries
+        if overflow > 0:
+            for digest in sorted(self.vectors, key=lambda d: self.vectors[d][1])[:overflow]:
+                del self.vectors[digest]
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": self.version, "vectors": self.vectors, "run": self.run}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)
+
+
+# ------------------------------------------------- #
+#             EMBEDDERS
+# ------------------------------------------------- #
+# An embedder has a model name and "async def embed(texts) -> one vector per text".
+class HashEmbedder:
+    """
+    Deterministic in-process embedder for tests and offline runs: every token of the
+    text adds +-1 to one of dim buckets (feature hashing with crc32).
+    """
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f"hash-{dim}"
+
+    def vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            code = zlib.crc32(token.encode("utf-8"))
+            vector[code % self.dim] += 1.0 if code & 0x80000000 else -1.0
+        return vector
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        return [self.vector(text) for text in texts]
+
+
+class HTTPEmbedder:
+    """
+    Embeddings from an Ollama-compatible server: POST {url}/api/embed with
+    {"model": model, "input": [texts]}, answered with {"embeddings": [[...], ...]}.
+    Requests run in a worker thread so several batches can be in flight.
+    """
+    def __init__(self, model: str, url: str = "http://localhost:11434", timeout: float = 120.0):
+        self.model = model
+        self.url = url.rstrip("/") + "/api/embed"
+        self.timeout = timeout
+
+    def _post(self, texts: List[str]) -> List[np.ndarray]:
+        body = json.dumps({"model": self.model, "input": texts}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            embeddings = json.load(response)["embeddings"]
+        if len(embeddings) != len(texts):
+            raise ValueError(f"{self.url} returned {len(embeddings)} embeddings for {len(texts)} texts")
+        return [np.asarray(vector, dtype=np.float32) for vector in embeddings]
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        return await asyncio.to_thread(self._post, texts)
+
+
+# ------------------------------------------------- #
+#             PIPELINE
+# ------------------------------------------------- #
+class EmbeddingStats:
+    def __init__(self):
+        self.chunks = 0
+        self.cache_hits = 0
+        self.duplicates = 0  # Chunks sharing the content of a chunk already being embedded
+        self.embedded = 0  # Texts sent to the embedder
+        self.failed = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def report(self) -> str:
+        rate = self.chunks / self.seconds if self.seconds else 0.0
+        embed_rate = self.embedded / self.seconds if self.seconds else 0.0
+        return (f"{self.chunks} chunks in {self.seconds:.2f}s ({rate:.0f} chunks/s): {self.cache_hits} cached, "
+                f"{self.duplicates} duplicates, {self.embedded} embedded in {self.batches} batches "
+                f"({embed_rate:.0f} texts/s), {self.failed} failed")
+
+
+class EmbeddingPipeline:
+    """
+    Turns chunks (see chunk_nodes) into vectors, embedding every distinct content once.
+
+    Chunks are normalized and hashed as they stream in. Cache hits are answered
+    directly. A chunk whose content is already queued waits for that embedding
+    instead of being sent again. Other misses are grouped into batches of at most
+    batch_size texts and max_batch_chars characters. Batches go through a bounded
+    queue to max_in_flight workers, so a full queue pauses the producer (chunking
+    and hashing) until the embedder catches up. A failed batch is retried with
+    exponential backoff, then its chunks are reported and left out.
+
+    run() returns {chunk_id: vector} and fills stats; call cache.save() afterwards
+    to keep the new vectors.
+    """
+    def __init__(self, embedder, cache: Optional[EmbeddingCache] = None, batch_size: int = 32,
+                 max_batch_chars: int = 32_000, max_in_flight: int = 4, max_queued: Optional[int] = None, retries: int = 2):
+        self.embedder = embedder
+        self.cache = cache if cache is not None else EmbeddingCache(None, embedder.model)
+        if self.cache.model != embedder.model:
+            raise ValueError(f"Embedding cache is for model {self.cache.model!r}, not {embedder.model!r}")
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued or max_in_flight
+        self.retries = retries
+        self.stats = EmbeddingStats()
+
+    async def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.embedder.embed(texts)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                print(f"Embedding batch of {len(texts)} failed ({e}), retrying")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def _worker(self, queue: asyncio.Queue, waiting: Dict[str, List[str]], results: Dict[str, np.ndarray]):
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            digests = [digest for digest, _ in batch]
+            try:
+                vectors = await self._embed_batch([text for _, text in batch])
+            except Exception as e:
+                print(f"Failed to embed {len(batch)} chunks: {e}")
+                for digest in digests:
+                    self.stats.failed += len(waiting.pop(digest))
+                continue
+            self.stats.batches += 1
+            self.stats.embedded += len(batch)
+            for digest, vector in zip(digests, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                self.cache.put(digest, vector)
+                for chunk_id in waiting.pop(digest):
+                    results[chunk_id] = vector
+
+    async def run(self, chunks: Iterable[Chunk]) -> Dict[str, np.ndarray]:
+        start = time.perf_counter()
+        results: Dict[str, np.ndarray] = {}
+        waiting: Dict[str, List[str]] = {}  # digest -> chunk ids of a queued content
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued)
+        workers = [asyncio.create_task(self._worker(queue, waiting, results)) for _ in range(self.max_in_flight)]
+        model = self.embedder.model
+        batch: List[Tuple[str, str]] = []
+        batch_chars = 0
+        try:
+            for chunk in chunks:
+                self.stats.chunks += 1
+                text = normalize_chunk(chunk.text)
+                digest = content_digest(text, model)
+                vector = self.cache.get(digest)
+                if vector is not None:
+                    self.stats.cache_hits += 1
+                    results[chunk.chunk_id] = vector
+                    continue
+                if digest in waiting:
+                    self.stats.duplicates += 1
+                    waiting[digest].append(chunk.chunk_id)
+                    continue
+                waiting[digest] = [chunk.chunk_id]
+                if batch and (len(batch) >= self.batch_size or batch_chars + len(text) > self.max_batch_chars):
+                    await queue.put(batch)  # Blocks while max_queued batches wait: backpressure
+                    await asyncio.sleep(0)  # Let the workers pick it up before chunking on
+                    batch, batch_chars = [], 0
+                batch.append((digest, text))
+                batch_chars += len(text)
+            if batch:
+                await queue.put(batch)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self.stats.seconds += time.perf_counter() - start
+        return results
+
+    async def index(self, chunks: Iterable[Chunk], vectors: VectorIndex) -> int:
+        """Embed chunks into a VectorIndex (re-added ids replace their rows); returns the number added."""
+        results = await self.run(chunks)
+        if results:
+            vectors.add(list(results), np.stack(list(results.values())))
+        return len(results)
+
+
+def embed_chunks(chunks: Iterable[Chunk], embedder, cache: Optional[EmbeddingCache] = None, **options) -> Dict[str, np.ndarray]:
+    """Synchronous wrapper: run an EmbeddingPipeline over chunks and print its stats."""
+    pipeline = EmbeddingPipeline(embedder, cache, **options)
+    results = asyncio.run(pipeline.run(chunks))
+    print(pipeline.stats.report())
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from graph.chunker import chunk_nodes
+    from graph.current_code import FolderScriptBuilder
+
+    parser = argparse.ArgumentParser(description="Embed the classes, functions and methods of a folder")
+    parser.add_argument("global_path")
+    parser.add_argument("--model", default=None, help="Ollama model (default: the in-process hash embedder)")
+    parser.add_argument("--url", default="http://localhost:11434")
+    parser.add_argument("--cache", default=".cache/embeddings.pkl")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    root, nodes = FolderScriptBuilder(args.global_path).build()
+    embedder = HTTPEmbedder(args.model, args.url) if args.model else HashEmbedder()
+    cache = EmbeddingCache(args.cache, embedder.model)
+    embed_chunks(chunk_nodes(args.global_path, nodes), embedder, cache, batch_size=args.batch_size, max_in_flight=args.in_flight)
+    cache.save()
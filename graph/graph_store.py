@@ -0,0 +1,367 @@
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from graph.current_code import (
+    ClassNode,
+    FolderNode,
+    FunctionNode,
+    MethodNode,
+    ModuleIndex,
+    Node,
+    ScriptNode,
+    resolve_imports,
+    summarize_file,
+)
+from graph.scanner import DEFAULT_EXCLUDES, scan_tree
+
+# Node kinds, stored one byte per node
+FOLDER, SCRIPT, CLASS, FUNCTION, METHOD = range(5)
+KIND_NAMES = ["FolderNode", "ScriptNode", "ClassNode", "FunctionNode", "MethodNode"]
+NODE_KINDS = {FolderNode: FOLDER, ScriptNode: SCRIPT, ClassNode: CLASS, FunctionNode: FUNCTION, MethodNode: METHOD}
+
+# Dependency edge kinds (ScriptNode.script/class/function_dependencies, MethodNode.dependencies)
+SCRIPT_DEP, CLASS_DEP, FUNCTION_DEP, METHOD_DEP = range(4)
+EDGE_ATTRIBUTES = ["script_dependencies", "class_dependencies", "function_dependencies", "dependencies"]
+
+
+class StringTable:
+    """Interns strings so every name/path is stored once and referenced by an int id."""
+    def __init__(self):
+        self.strings: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self.ids[value] = string_id
+        return string_id
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+
+def _csr(count: int, pairs: List[Tuple[int, int]]) -> Tuple[array, array]:
+    """Counting-sort (source, target) pairs into CSR offsets/targets, keeping insertion order per row."""
+    offsets = array("i", [0]) * (count + 1)
+    for source, _ in pairs:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    targets = array("i", [0]) * len(pairs)
+    cursor = array("i", offsets[:-1])
+    for source, target in pairs:
+        targets[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, targets
+
+
+class GraphStoreBuilder:
+    """
+    Accumulates nodes and edges, then freezes them into a GraphStore.
+
+    Duplicate children/dependencies are dropped with a set lookup. GraphStore.from_tree
+    fills it straight from a scan and the script summaries; from_nodes copies an
+    object graph that was already built.
+    """
+    def __init__(self):
+        self.strings = StringTable()
+        self.kinds = array("b")
+        self.names = array("i")
+        self.paths = array("i")
+        self.parents = array("i")
+        self.static = bytearray()
+        self.path_index: Dict[str, int] = {}
+        self.child_pairs: List[Tuple[int, int]] = []
+        self.edge_pairs: List[List[Tuple[int, int]]] = [[] for _ in EDGE_ATTRIBUTES]
+        self.alias_pairs: List[Tuple[int, int]] = []  # (script id, alias id) -> alias_targets
+        self.alias_targets = array("i")
+        self._seen_edges = set()
+
+    def add_node(self, kind: int, name: str, path: str, parent: int = -1, is_static: bool = False) -> int:
+        path = path.strip()  # As Node does: the index and the stored path are the same string
+        node_id = self.path_index.get(path)
+        if node_id is not None:
+            return node_id
+        node_id = len(self.kinds)
+        self.kinds.append(kind)
+        self.names.append(self.strings.intern(name.strip()))
+        self.paths.append(self.strings.intern(path))
+        self.parents.append(parent)
+        self.static.append(is_static)
+        self.path_index[path] = node_id
+        if parent >= 0:
+            self.child_pairs.append((parent, node_id))
+        return node_id
+
+    def add_edge(self, edge_kind: int, source: int, target: int) -> bool:
+        """Add an edge unless it is already there; True if it was new."""
+        key = (edge_kind, source, target)
+        if key in self._seen_edges:
+            return False
+        self._seen_edges.add(key)
+        self.edge_pairs[edge_kind].append((source, target))
+        return True
+
+    def add_alias(self, script: int, alias: str, target_path: str):
+        self.alias_pairs.append((script, self.strings.intern(alias)))
+        self.alias_targets.append(self.strings.intern(target_path))
+
+    def freeze(self) -> "GraphStore":
+        count = len(self.kinds)
+        child_offsets, child_targets = _csr(count, self.child_pairs)
+        # Same rows sorted by name id, for a binary search in child_by_name
+        by_name = array("i", child_targets)
+        for node_id in range(count):
+            start, end = child_offsets[node_id], child_offsets[node_id + 1]
+            if end - start > 1:
+                by_name[start:end] = array("i", sorted(by_name[start:end], key=self.names.__getitem__))
+        edges = [_csr(count, pairs) for pairs in self.edge_pairs]
+        # Aliases go through the same CSR layout; targets index into (alias, target) string pairs
+        alias_offsets, alias_slots = _csr(count, [(script, i) for i, (script, _) in enumerate(self.alias_pairs)])
+        alias_names = array("i", (self.alias_pairs[i][1] for i in alias_slots))
+        alias_targets = array("i", (self.alias_targets[i] for i in alias_slots))
+        return GraphStore(
+            self.strings, self.kinds, self.names, self.paths, self.parents, bytes(self.static),
+            self.path_index, child_offsets, child_targets, edges, alias_offsets, alias_names, alias_targets, by_name,
+        )
+
+
+class GraphStore:
+    """
+    Immutable array-backed version of the nodes graph.
+
+    Each node is an integer id. Kind, name and path live in typed arrays (names and
+    paths as ids into an interned StringTable). Children, dependency edges and aliases
+    are stored CSR-style: the entries of node i are targets[offsets[i]:offsets[i + 1]].
+    NodeView gives the usual attribute-style navigation on top (root.folder1.folder1_1).
+    """
+    def __init__(self, strings, kinds, names, paths, parents, static, path_index,
+                 child_offsets, child_targets, edges, alias_offsets, alias_names, alias_targets, children_by_name):
+        self.strings = strings
+        self.kinds = kinds
+        self.names = names
+        self.paths = paths
+        self.parents = parents
+        self.static = static
+        self.path_index = path_index
+        self.child_offsets = child_offsets
+        self.child_targets = child_targets
+        self.edges = edges
+        self.alias_offsets = alias_offsets
+        self.alias_names = alias_names
+        self.alias_targets = alias_targets
+        self.children_by_name = children_by_name  # child_targets with every row sorted by name id
+
+    @classmethod
+    def from_tree(cls, global_path: str, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True,
+                  source_roots: Tuple[str, ...] = ("",), cache=None) -> "GraphStore":
+        """
+        Build the store of a folder without the Node object graph: the same nodes and
+        import edges as FolderScriptBuilder + ScriptAnalyzer + ImportAnalyzer, then
+        from_nodes (call edges need a CallResolver, which works on Nodes).
+
+        Folders, scripts and their definitions are added as the scan streams them;
+        only the import records of each script are kept until every node exists and
+        the imports can be resolved. An optional ParseCache serves the summaries.
+        """
+        builder = GraphStoreBuilder()
+        root_name = Path(global_path).parts[-1]  # As FolderScriptBuilder
+        builder.add_node(FOLDER, root_name, ".")
+        builder.path_index["root"] = 0  # Same key as in the nodes dict
+        module_index = ModuleIndex({}, source_roots)
+        imports = {}
+        for folder, name, is_dir in scan_tree(global_path, excludes, use_gitignore):
+            parent = builder.path_index[folder] if folder else 0
+            rel_path = f"{folder}/{name}" if folder else name
+            if is_dir:
+                builder.add_node(FOLDER, name, rel_path, parent)
+                continue
+            if not name.endswith(".py"):
+                continue
+            script = builder.add_node(SCRIPT, name, rel_path, parent)
+            module_index.add(rel_path)
+            full_path = Path(global_path) / rel_path
+            summary = cache.get(rel_path, full_path) if cache is not None else None
+            if summary is None:
+                try:
+                    summary = summarize_file(str(full_path))
+                except (SyntaxError, ValueError, UnicodeDecodeError, OSError) as e:
+                    print(f"Failed to parse {rel_path}: {e}")
+                    continue
+                if cache is not None:
+                    cache.put(rel_path, summary)
+            imports[rel_path] = (script, summary["imports"])
+            for kind, definition, methods in summary["definitions"]:
+                definition_path = f"{rel_path}::{definition}"
+                if kind == "class":
+                    class_id = builder.add_node(CLASS, definition, definition_path, script)
+                    for method in methods:
+                        builder.add_node(METHOD, method, f"{definition_path}::{method}", class_id)
+                else:
+                    builder.add_node(FUNCTION, definition, definition_path, script)
+        if cache is not None:
+            cache.save()
+
+        def kind_of(path: str) -> Optional[str]:
+            node_id = builder.path_index.get(path)
+            return KIND_NAMES[builder.kinds[node_id]] if node_id is not None else None
+
+        edge_kinds = {"script": SCRIPT_DEP, "class": CLASS_DEP, "function": FUNCTION_DEP}
+        for rel_path, (script, records) in imports.items():
+            aliases = {}
+            for kind, target, as_name in resolve_imports(records, rel_path, module_index, kind_of):
+                if kind is None:
+                    continue
+                target_id = builder.path_index[target]
+                new_edge = builder.add_edge(edge_kinds[kind], script, target_id)
+                # As ImportAnalyzer: a repeated script import keeps the alias of the first one
+                if as_name is not None and (kind != "script" or new_edge):
+                    aliases[as_name] = target
+            for alias, target in aliases.items():
+                builder.add_alias(script, alias, target)
+        return builder.freeze()
+
+    @classmethod
+    def from_nodes(cls, root: Node, nodes: Dict[str, Node]) -> "GraphStore":
+        """Convert an analyzed object graph (FolderScriptBuilder + analyzers) into a store."""
+        builder = GraphStoreBuilder()
+        ids: Dict[int, int] = {}  # id(node) -> node id
+
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            parent = ids.get(id(node.parent), -1) if node.parent is not None else -1
+            ids[id(node)] = builder.add_node(NODE_KINDS[type(node)], node.name, node.path, parent, getattr(node, "is_static", False))
+            stack.extend(reversed(node.children))
+        builder.path_index["root"] = 0  # Same key as in the nodes dict
+
+        for node in nodes.values():
+            source = ids.get(id(node))
+            if source is None:
+                continue
+            for edge_kind, attribute in enumerate(EDGE_ATTRIBUTES):
+                for target in getattr(node, attribute, ()):
+                    if id(target) in ids:
+                        builder.add_edge(edge_kind, source, ids[id(target)])
+            if isinstance(node, ScriptNode):
+                for alias, target_path in node.aliases.items():
+                    builder.add_alias(source, alias, target_path)
+        return builder.freeze()
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def children(self, node_id: int) -> array:
+        return self.child_targets[self.child_offsets[node_id]:self.child_offsets[node_id + 1]]
+
+    def dependencies(self, edge_kind: int, node_id: int) -> array:
+        offsets, targets = self.edges[edge_kind]
+        return targets[offsets[node_id]:offsets[node_id + 1]]
+
+    def aliases(self, node_id: int) -> Dict[str, str]:
+        start, end = self.alias_offsets[node_id], self.alias_offsets[node_id + 1]
+        return {self.strings[self.alias_names[i]]: self.strings[self.alias_targets[i]] for i in range(start, end)}
+
+    def child_by_name(self, node_id: int, name: str) -> Optional[int]:
+        """Binary search over the children of node_id sorted by name id: O(log children)."""
+        name_id = self.strings.ids.get(name)
+        if name_id is None:
+            return None
+        low, high = self.child_offsets[node_id], self.child_offsets[node_id + 1]
+        while low < high:
+            middle = (low + high) // 2
+            child = self.children_by_name[middle]
+            if self.names[child] < name_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.child_offsets[node_id + 1] and self.names[self.children_by_name[low]] == name_id:
+            return self.children_by_name[low]
+        return None
+
+    def node(self, path: str) -> "NodeView":
+        return NodeView(self, self.path_index[path])
+
+    @property
+    def root(self) -> "NodeView":
+        return NodeView(self, 0)
+
+    def iter_kind(self, kind: int) -> Iterator[int]:
+        return (node_id for node_id, node_kind in enumerate(self.kinds) if node_kind == kind)
+
+
+class NodeView:
+    """Lightweight handle exposing a GraphStore node with the Node/FolderNode attribute API."""
+    __slots__ = ("store", "id")
+
+    def __init__(self, store: GraphStore, node_id: int):
+        self.store = store
+        self.id = node_id
+
+    @property
+    def kind(self) -> int:
+        return self.store.kinds[self.id]
+
+    @property
+    def name(self) -> str:
+        return self.store.strings[self.store.names[self.id]]
+
+    @property
+    def path(self) -> str:
+        return self.store.strings[self.store.paths[self.id]]
+
+    @property
+    def parent(self) -> Optional["NodeView"]:
+        parent = self.store.parents[self.id]
+        return NodeView(self.store, parent) if parent >= 0 else None
+
+    @property
+    def children(self) -> List["NodeView"]:
+        return [NodeView(self.store, child) for child in self.store.children(self.id)]
+
+    @property
+    def is_static(self) -> bool:
+        return bool(self.store.static[self.id])
+
+    @property
+    def aliases(self) -> Dict[str, str]:
+        return self.store.aliases(self.id)
+
+    def _dependencies(self, edge_kind: int) -> List["NodeView"]:
+        return [NodeView(self.store, target) for target in self.store.dependencies(edge_kind, self.id)]
+
+    @property
+    def script_dependencies(self) -> List["NodeView"]:
+        return self._dependencies(SCRIPT_DEP)
+
+    @property
+    def class_dependencies(self) -> List["NodeView"]:
+        return self._dependencies(CLASS_DEP)
+
+    @property
+    def function_dependencies(self) -> List["NodeView"]:
+        return self._dependencies(FUNCTION_DEP)
+
+    @property
+    def dependencies(self) -> List["NodeView"]:
+        return self._dependencies(METHOD_DEP)
+
+    def __getattr__(self, key: str) -> "NodeView":
+        # Same navigation as FolderNode: folders and scripts are reachable by name
+        if self.store.kinds[self.id] == FOLDER:
+            child = self.store.child_by_name(self.id, key)
+            if child is not None and self.store.kinds[child] in (FOLDER, SCRIPT):
+                return NodeView(self.store, child)
+        raise AttributeError(key)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NodeView) and other.store is self.store and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash((id(self.store), self.id))
+
+    def __repr__(self):
+        return f"{KIND_NAMES[self.kind]}({self.name}, {self.path})"
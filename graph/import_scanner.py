@@ -0,0 +1,119 @@
+import re
+from typing import List, Optional, Tuple
+
+# Same layout as graph.current_code.ImportRecord: (kind, module, level, [(name, asname)])
+ImportRecord = Tuple[str, Optional[str], int, List[Tuple[str, Optional[str]]]]
+
+_NAME = r"[^\W\d]\w*"
+_DOTTED = rf"{_NAME}(?:\s*\.\s*{_NAME})*"
+_IMPORT = re.compile(r"import\s+(.+)", re.S)
+_FROM = re.compile(rf"from((?:\s*\.)*)\s*({_DOTTED})?\s+import\s*(.+)|from((?:\s*\.)+)\s*import\s*(.+)", re.S)
+_ALIAS = re.compile(rf"\s*({_DOTTED}|\*)(?:\s+as\s+({_NAME}))?\s*")
+_STRING_START = re.compile(r"[rRuUbBfF]{0,2}('''|\"\"\"|'|\")")
+_BLANK_OR_COMMENT = re.compile(r"[ \t\f]*(?:#.*)?")
+# A top-level import after the header starts a line or follows a ";"
+_LATE_IMPORT = re.compile(r"^\f*(?:import|from)\b|;\s*(?:import|from)\b", re.M)
+
+
+def _aliases(text: str, allow_star: bool) -> Optional[List[Tuple[str, Optional[str]]]]:
+    names = []
+    for part in text.split(","):
+        if not part.strip():
+            return None
+        match = _ALIAS.fullmatch(part)
+        if match is None or (match.group(1) == "*" and not allow_star):
+            return None
+        names.append((re.sub(r"\s+", "", match.group(1)), match.group(2)))
+    return names
+
+
+def _statement(text: str) -> Optional[ImportRecord]:
+    """Import record of one logical line (comments and line joins removed), or None if unsure."""
+    if text.startswith("import"):
+        match = _IMPORT.fullmatch(text)
+        names = _aliases(match.group(1), allow_star=False) if match else None
+        return ("import", None, 0, names) if names else None
+    match = _FROM.fullmatch(text)
+    if match is None:
+        return None
+    if match.group(3) is not None:
+        dots, module, names_text = match.group(1, 2, 3)
+    else:  # "from . import x": no module
+        dots, module, names_text = match.group(4), None, match.group(5)
+    names_text = names_text.strip()
+    if names_text.startswith("("):
+        if not names_text.endswith(")"):
+            return None
+        names_text = names_text[1:-1].strip().rstrip(",")  # A trailing comma is allowed in parentheses
+    elif "(" in names_text or ")" in names_text:
+        return None
+    names = _aliases(names_text, allow_star=True)
+    if not names or (len(names) > 1 and any(name == "*" for name, _ in names)):
+        return None
+    return ("from", re.sub(r"\s+", "", module) if module else None, dots.count("."), names)
+
+
+def scan_imports(source: str) -> Optional[List[ImportRecord]]:
+    """
+    Top-level import records of a module, as import_records(ast.parse(source)) would
+    return them, or None when the scanner cannot be sure.
+
+    Only the header of the module is read: the leading run of blank lines, comments,
+    string statements (the docstring) and import statements, up to the first other
+    statement. A regex search (in C) then checks that no import statement can follow
+    at module level. Anything unusual (semicolons, strings inside an import, an
+    import after the header, ...) gives None, and callers parse the file instead.
+    Unlike ast.parse, syntax errors below the header go unnoticed.
+    """
+    records: List[ImportRecord] = []
+    pos = 1 if source.startswith("\ufeff") else 0
+    end = len(source)
+    while pos < end:
+        line_end = source.find("\n", pos)
+        line_end = end if line_end < 0 else line_end + 1
+        line = source[pos:line_end]
+        if _BLANK_OR_COMMENT.fullmatch(line.rstrip("\r\n")):
+            pos = line_end
+            continue
+
+        string = _STRING_START.match(line)
+        if string:
+            quote = string.group(1)
+            close = re.compile(r"(?:\\.|[^\\])*?" + re.escape(quote), re.S if len(quote) == 3 else 0)
+            closed = close.match(source, pos + string.end())
+            if closed is None:
+                return None
+            rest_end = source.find("\n", closed.end())
+            rest_end = end if rest_end < 0 else rest_end
+            if not _BLANK_OR_COMMENT.fullmatch(source[closed.end():rest_end].rstrip("\r")):
+                break  # Not a plain string statement: the header ends here
+            pos = rest_end + 1
+            continue
+
+        if not (line.startswith("import") or line.startswith("from")):
+            break
+        # One logical line: follow parentheses and backslash continuations, drop comments
+        parts = []
+        depth = 0
+        while True:
+            code = line.split("#", 1)[0].rstrip("\r\n")
+            if "'" in code or '"' in code or ";" in code:
+                return None
+            depth += code.count("(") - code.count(")")
+            continued = code.rstrip().endswith("\\")
+            parts.append(code.rstrip().rstrip("\\") if continued else code)
+            pos = line_end
+            if depth <= 0 and not continued:
+                break
+            if pos >= end:
+                return None
+            line_end = source.find("\n", pos)
+            line_end = end if line_end < 0 else line_end + 1
+            line = source[pos:line_end]
+        record = _statement(" ".join(parts).strip())
+        if record is None:
+            return None
+        records.append(record)
+    if _LATE_IMPORT.search(source, pos):
+        return None
+    return records
@@ -0,0 +1,226 @@
+import math
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from graph.current_code import ClassNode, FunctionNode, MethodNode, Node, ScriptNode
+from graph.graph_store import StringTable
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# How many times a token counts, per field of a document
+NAME_WEIGHT = 3.0
+CONTEXT_WEIGHT = 1.0  # Parent class / script name
+DOCSTRING_WEIGHT = 1.0
+CALL_WEIGHT = 1.0
+
+# Filler words of natural-language questions, dropped from queries only
+QUERY_STOPWORDS = frozenset((
+    "a", "an", "and", "are", "by", "called", "calls", "defined", "do", "does", "find", "for", "from",
+    "how", "in", "is", "it", "me", "of", "on", "or", "show", "the", "to", "used", "uses", "what",
+    "where", "which", "who", "with",
+))
+
+
+def split_identifier(identifier: str) -> List[str]:
+    """ "readAvroContract", "read_avro_contract" -> ["read", "avro", "contract"]"""
+    parts = []
+    for piece in identifier.split("_"):
+        parts.extend(part.lower() for part in _CAMEL.findall(piece))
+    return parts
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased identifier parts, plus every compound identifier as a whole ("read_avro_contract")."""
+    tokens = []
+    for word in _WORD.findall(text):
+        parts = split_identifier(word)
+        tokens.extend(parts)
+        whole = word.lower().strip("_")
+        if whole and (len(parts) != 1 or parts[0] != whole):
+            tokens.append(whole)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    BM25 index over the Script/Class/Function/Method nodes of the graph.
+
+    A node's document is its name (weighted NAME_WEIGHT), its class or script name,
+    the first paragraph of its docstring and, for functions and methods, the calls
+    made in its own scope: the receiver chain and callee of every entry in the
+    summary's scopes (self.reader.read_avro_contract(), utils.parse()), as written,
+    not resolved. Unlike summary["calls"], which get_dependencies builds per bare
+    name, this keeps same-named methods of different classes apart. Exact symbol
+    queries ("where is read_avro_contract used") hit both the definition (by name)
+    and its callers (by callee name).
+
+    Terms are interned in a StringTable; the postings of a term are two arrays (doc
+    ids and weighted term frequencies) scored with numpy, so a query only touches
+    the postings of its own terms. Documents are grouped per ScriptNode: update_script
+    tombstones the old documents of a script and appends the new ones, and postings
+    of removed documents are dropped once they outnumber the live ones.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms = StringTable()
+        self.postings: List[array] = []  # term id -> doc ids ("i")
+        self.frequencies: List[array] = []  # term id -> weighted term frequencies ("f")
+        self.document_frequency: List[int] = []  # term id -> live docs containing it
+        self.paths: List[str] = []  # doc id -> node path
+        self.names: List[str] = []  # doc id -> node name
+        self.doc_terms: List[Optional[array]] = []  # doc id -> distinct term ids (None once removed)
+        self.lengths = array("f")
+        self.alive = bytearray()
+        self.scripts: Dict[str, List[int]] = {}  # script path -> doc ids
+        self.documents = 0  # Live documents
+        self.total_length = 0.0
+        self.live_postings = 0
+        self.dead_postings = 0
+
+    @classmethod
+    def from_nodes(cls, nodes: Dict[str, Node], summaries: Dict[str, Dict[str, Any]], **kwargs) -> "LexicalIndex":
+        index = cls(**kwargs)
+        for path, node in nodes.items():
+            if isinstance(node, ScriptNode):
+                index.update_script(node, summaries.get(path))
+        return index
+
+    def __len__(self) -> int:
+        return self.documents
+
+    # --- documents ------------------------------------------------------ #
+    def _documents(self, script_node: ScriptNode, summary: Optional[Dict[str, Any]]) -> Iterable[Tuple[Node, Dict[str, float]]]:
+        summary = summary or {}
+        # Only the first paragraph: long docstrings would otherwise dominate the document length
+        docstrings = {name: text.split("\n\n", 1)[0] for name, text in summary.get("docstrings", {}).items()}
+        scopes = summary.get("scopes", {})
+
+        def calls(scope_name: str) -> str:
+            # Per scope ("ClassA.method1", "function1"): summary["calls"] is keyed by bare name,
+            # which mixes up the calls of same-named methods in different classes
+            scope = scopes.get(scope_name, {})
+            return " ".join(".".join([*receiver, callee]) for receiver, callee in scope.get("calls", ()))
+
+        def document(name: str, fields: List[Tuple[str, float]]) -> Dict[str, float]:
+            counts: Dict[str, float] = {}
+            for text, weight in [(name, NAME_WEIGHT)] + fields:
+                for token in tokenize(text):
+                    counts[token] = counts.get(token, 0.0) + weight
+            return counts
+
+        script_name = script_node.name.rsplit(".", 1)[0]
+        yield script_node, document(script_name, [(docstrings.get("", ""), DOCSTRING_WEIGHT)])
+        for child in script_node.children:
+            if isinstance(child, ClassNode):
+                yield child, document(child.name, [(script_name, CONTEXT_WEIGHT), (docstrings.get(child.name, ""), DOCSTRING_WEIGHT)])
+                for method in child.children:
+                    if isinstance(method, MethodNode):
+                        yield method, document(method.name, [
+                            (child.name, CONTEXT_WEIGHT),
+                            (docstrings.get(f"{child.name}.{method.name}", ""), DOCSTRING_WEIGHT),
+                            (calls(f"{child.name}.{method.name}"), CALL_WEIGHT),
+                        ])
+            elif isinstance(child, FunctionNode):
+                yield child, document(child.name, [
+                    (script_name, CONTEXT_WEIGHT),
+                    (docstrings.get(child.name, ""), DOCSTRING_WEIGHT),
+                    (calls(child.name), CALL_WEIGHT),
+                ])
+
+    def _add_document(self, node: Node, counts: Dict[str, float]) -> int:
+        doc_id = len(self.paths)
+        self.paths.append(node.path)
+        self.names.append(node.name)
+        self.lengths.append(sum(counts.values()))
+        self.alive.append(1)
+        self.documents += 1
+        self.total_length += self.lengths[doc_id]
+        term_ids = array("i")
+        for token, frequency in counts.items():
+            term_id = self.terms.intern(token)
+            if term_id == len(self.postings):
+                self.postings.append(array("i"))
+                self.frequencies.append(array("f"))
+                self.document_frequency.append(0)
+            self.postings[term_id].append(doc_id)
+            self.frequencies[term_id].append(frequency)
+            self.document_frequency[term_id] += 1
+            term_ids.append(term_id)
+        self.doc_terms.append(term_ids)
+        self.live_postings += len(term_ids)
+        return doc_id
+
+    def remove_script(self, script_path: str):
+        for doc_id in self.scripts.pop(script_path, ()):
+            self.alive[doc_id] = 0
+            self.documents -= 1
+            self.total_length -= self.lengths[doc_id]
+            for term_id in self.doc_terms[doc_id]:
+                self.document_frequency[term_id] -= 1
+            self.live_postings -= len(self.doc_terms[doc_id])
+            self.dead_postings += len(self.doc_terms[doc_id])
+            self.doc_terms[doc_id] = None
+        if self.dead_postings > max(self.live_postings, 4096):
+            self.compact()
+
+    def update_script(self, script_node: ScriptNode, summary: Optional[Dict[str, Any]] = None):
+        """(Re)index a script and its classes, functions and methods."""
+        self.remove_script(script_node.path)
+        self.scripts[script_node.path] = [self._add_document(node, counts) for node, counts in self._documents(script_node, summary)]
+
+    def compact(self):
+        """Drop the postings of removed documents (doc ids are kept)."""
+        alive = np.frombuffer(self.alive, dtype=bool)
+        for term_id, doc_ids in enumerate(self.postings):
+            docs = np.frombuffer(doc_ids, dtype=np.int32)
+            keep = alive[docs]
+            if not keep.all():
+                frequencies = np.frombuffer(self.frequencies[term_id], dtype=np.float32)
+                self.postings[term_id] = array("i", docs[keep].tobytes())
+                self.frequencies[term_id] = array("f", frequencies[keep].tobytes())
+        self.dead_postings = 0
+
+    # --- queries -------------------------------------------------------- #
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """The k best nodes for query, as (node path, BM25 score), best first."""
+        documents = self.documents
+        tokens = [token for token in tokenize(query) if token not in QUERY_STOPWORDS] or tokenize(query)
+        term_ids = {self.terms.ids[token] for token in tokens if token in self.terms.ids}
+        if not documents or not term_ids or k <= 0:
+            return []
+        average_length = self.total_length / documents
+        lengths = np.frombuffer(self.lengths, dtype=np.float32)
+        alive = np.frombuffer(self.alive, dtype=bool)
+
+        doc_parts, weight_parts = [], []
+        for term_id in term_ids:
+            frequency = self.document_frequency[term_id]
+            if not frequency:
+                continue
+            docs = np.frombuffer(self.postings[term_id], dtype=np.int32)
+            tf = np.frombuffer(self.frequencies[term_id], dtype=np.float32)
+            idf = math.log(1.0 + (documents - frequency + 0.5) / (frequency + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[docs] / average_length)
+            doc_parts.append(docs)
+            weight_parts.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+        if not doc_parts:
+            return []
+
+        if len(doc_parts) == 1:
+            docs, scores = doc_parts[0], weight_parts[0]
+        else:
+            docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(weight_parts))
+        live = alive[docs]
+        docs, scores = docs[live], scores[live]
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.paths[docs[i]], float(scores[i])) for i in top]
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from graph.current_code import SUMMARY_VERSION
+
+# Bump whenever the on-disk layout below changes
+CACHE_FORMAT = 1
+
+
+class ParseCache:
+    """
+    Persistent, content-addressed cache of script summaries (see summarize_tree).
+
+    The cache file holds two tables:
+    - files:     relative path -> (mtime_ns, size, digest)
+    - summaries: digest -> (summary, last_used_run)
+
+    A file whose mtime/size did not change is served without being read. Otherwise
+    its content is hashed; identical content (moved files, vendored copies) still
+    hits. Only real misses are parsed by ScriptAnalyzer and stored with put().
+
+    The whole cache is dropped when CACHE_FORMAT or SUMMARY_VERSION changes. On save,
+    the files rows of paths not looked up in this run (deleted or renamed scripts)
+    are dropped, unless the run covered only part of the tree (prune_unseen=False).
+    Then summaries no file points to are evicted, and the least recently used ones
+    until at most max_entries remain.
+    """
+    def __init__(self, cache_path: str, max_entries: int = 100_000):
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self.version = (CACHE_FORMAT, SUMMARY_VERSION)
+        self.files: Dict[str, Tuple[int, int, str]] = {}
+        self.summaries: Dict[str, Tuple[Dict[str, Any], int]] = {}
+        self.run = 0
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[str, Tuple[int, int, str]] = {}  # path -> key of a miss awaiting put()
+        self._seen: Set[str] = set()  # Paths looked up in this run
+        self._load()
+
+    def _load(self):
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"Ignoring unreadable parse cache {self.cache_path}: {e}")
+            return
+        if data.get("version") != self.version:
+            return  # Analyzer changed: start from an empty cache
+        self.files = data["files"]
+        self.summaries = data["summaries"]
+        self.run = data["run"] + 1
+
+    def get(self, path: str, full_path: Path) -> Optional[Dict[str, Any]]:
+        self._seen.add(path)
+        stat = os.stat(full_path)
+        entry = self.files.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size and entry[2] in self.summaries:
+            digest = entry[2]
+        else:
+            with open(full_path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            key = (stat.st_mtime_ns, stat.st_size, digest)
+            if digest not in self.summaries:
+                self._pending[path] = key
+                self.misses += 1
+                return None
+            self.files[path] = key
+
+        summary, _ = self.summaries[digest]
+        self.summaries[digest] = (summary, self.run)
+        self.hits += 1
+        return summary
+
+    def put(self, path: str, summary: Dict[str, Any]):
+        key = self._pending.pop(path, None)
+        if key is None:
+            return  # Not looked up through get(): nothing to key it by
+        self.files[path] = key
+        self.summaries[key[2]] = (summary, self.run)
+
+    def save(self, prune_unseen: bool = True):
+        self._evict(prune_unseen)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"version": self.version, "files": self.files, "summaries": self.summaries, "run": self.run},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, self.cache_path)
+
+    def _evict(self, prune_unseen: bool = True):
+        if prune_unseen:
+            self.files = {path: key for path, key in self.files.items() if path in self._seen}
+        referenced = {digest for _, _, digest in self.files.values()}
+        for digest in [d for d in self.summaries if d not in referenced]:
+            del self.summaries[digest]
+
+        overflow = len(self.summaries) - self.max_entries
+        if overflow <= 0:
+            return
+        stale = sorted(self.summaries, key=lambda d: self.summaries[d][1])[:overflow]
+        for digest in stale:
+            del self.summaries[digest]
+        self.files = {path: key for path, key in self.files.items() if key[2] in self.summaries}
@@ -0,0 +1,195 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def path_segments(path: str) -> List[str]:
+    """
+    Segments of a node path: folders and script split on "/", members on "::"
+    ("pkg/mod.py::ClassA::method1" -> ["pkg", "mod.py", "ClassA", "method1"]).
+    "", "." and "root" are the root. Trailing separators are ignored, so "pkg/"
+    and "pkg/mod.py::" name the same subtrees as "pkg" and "pkg/mod.py".
+    """
+    path = path.rstrip("/:")
+    if path in ("", ".", "root"):
+        return []
+    head, *members = path.split("::")
+    return head.split("/") + members
+
+
+class TrieNode:
+    __slots__ = ("children", "key", "value", "size", "counts")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        self.key: Optional[str] = None  # Path the value was stored under (None: no value here)
+        self.value: Any = None
+        self.size = 0  # Values in this subtree, this node included
+        self.counts: Dict[str, int] = {}  # Same, per kind (class name of the value)
+
+
+class PathTrie:
+    """
+    Trie of node paths, one level per path segment (see path_segments).
+
+    Every trie node keeps the number of values in its subtree, in total and per
+    kind (the class name of the value: "ScriptNode", "ClassNode", ...), updated on
+    the way down by insert() and remove(). Finding a subtree, counting what it
+    holds or checking that it holds some kind are O(depth). Iterating it visits
+    only that subtree, and skips branches without the requested kind (e.g. the
+    members of every script when listing scripts).
+    """
+    def __init__(self):
+        self.root = TrieNode()
+
+    def __len__(self) -> int:
+        return self.root.size
+
+    def __contains__(self, path: str) -> bool:
+        node = self.find(path)
+        return node is not None and node.key is not None
+
+    def find(self, path: str) -> Optional[TrieNode]:
+        node = self.root
+        for segment in path_segments(path):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def get(self, path: str, default: Any = None) -> Any:
+        node = self.find(path)
+        return node.value if node is not None and node.key is not None else default
+
+    def insert(self, path: str, value: Any):
+        segments = path_segments(path)
+        node = self.root
+        trail = [node]
+        for segment in segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = TrieNode()
+            node = child
+            trail.append(node)
+        if node.key is not None:
+            self._account(trail, type(node.value).__name__, -1)
+        node.key = path
+        node.value = value
+        self._account(trail, type(value).__name__, 1)
+
+    def remove(self, path: str) -> Any:
+        """Remove the value stored under path (its subtree stays); KeyError if there is none."""
+        segments = path_segments(path)
+        node = self.root
+        trail = [node]
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                raise KeyError(path)
+            trail.append(node)
+        if node.key is None:
+            raise KeyError(path)
+        value = node.value
+        self._account(trail, type(value).__name__, -1)
+        node.key = node.value = None
+        # Prune the branch that no longer holds anything
+        for depth in range(len(segments), 0, -1):
+            if trail[depth].size:
+                break
+            del trail[depth - 1].children[segments[depth - 1]]
+        return value
+
+    @staticmethod
+    def _account(trail: List[TrieNode], kind: str, delta: int):
+        for node in trail:
+            node.size += delta
+            count = node.counts.get(kind, 0) + delta
+            if count:
+                node.counts[kind] = count
+            else:
+                node.counts.pop(kind, None)
+
+    # --- subtree queries ------------------------------------------------- #
+    def count(self, prefix: str = "", kind: Optional[str] = None) -> int:
+        """Number of values under prefix (itself included), of one kind or all."""
+        node = self.find(prefix)
+        if node is None:
+            return 0
+        return node.size if kind is None else node.counts.get(kind, 0)
+
+    def counts(self, prefix: str = "") -> Dict[str, int]:
+        node = self.find(prefix)
+        return dict(node.counts) if node is not None else {}
+
+    def items(self, prefix: str = "", kind: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """(path, value) pairs under prefix (itself included), parents before children, in insertion order."""
+        start = self.find(prefix)
+        if start is None:
+            return
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node.key is not None and (kind is None or type(node.value).__name__ == kind):
+                yield node.key, node.value
+            children = node.children.values()
+            if kind is not None:
+                children = [child for child in children if kind in child.counts]
+            stack.extend(reversed(list(children)))
+
+    def keys(self, prefix: str = "", kind: Optional[str] = None) -> Iterator[str]:
+        return (path for path, _ in self.items(prefix, kind))
+
+
+class IndexedNodes(dict):
+    """
+    The nodes dict ({path: Node}) with a PathTrie of its entries kept up to date.
+
+    Every way of adding or removing a key goes through the trie, so the builders,
+    analyzers and GraphPatcher maintain it without knowing about it. Lookups are
+    plain dict lookups. nodes.trie answers subtree questions ("scripts under
+    pkg/sub", "how many classes in pkg") without scanning every key.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.trie = PathTrie()
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, key: str, value: Any):
+        super().__setitem__(key, value)
+        self.trie.insert(key, value)
+
+    def __delitem__(self, key: str):
+        super().__delitem__(key)
+        self.trie.remove(key)
+
+    def pop(self, key: str, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def popitem(self) -> Tuple[str, Any]:
+        key, value = super().popitem()
+        self.trie.remove(key)
+        return key, value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        super().clear()
+        self.trie = PathTrie()
+
+    def __reduce__(self):
+        # Rebuilt through __init__, which fills the trie again
+        return type(self), (dict(self),)
+
+    def subtree(self, prefix: str, kind: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        return self.trie.items(prefix, kind)
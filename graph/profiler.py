@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+# (name, category, start ns, duration ns, pid, tid, allocated bytes or None, args)
+Event = Tuple[str, str, int, int, int, int, Optional[int], Dict[str, Any]]
+
+
+class _Span:
+    """Context manager timing one stage or file; appends an Event to its profiler."""
+    __slots__ = ("profiler", "name", "category", "args", "start", "allocated")
+
+    def __init__(self, profiler: "Profiler", name: str, category: str, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.allocated = tracemalloc.get_traced_memory()[0] if self.profiler.trace_allocations else None
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter_ns() - self.start
+        allocated = None
+        if self.allocated is not None:
+            allocated = tracemalloc.get_traced_memory()[0] - self.allocated
+        self.profiler.record(self.name, self.category, self.start, duration, allocated, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullProfiler:
+    """Profiler used when instrumentation is off: every call is a no-op."""
+    enabled = False
+
+    def stage(self, name: str, **args) -> _NullSpan:
+        return _NULL_SPAN
+
+    def file(self, path: str, category: str = "parse") -> _NullSpan:
+        return _NULL_SPAN
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def record(self, name: str, category: str, start_ns: int, duration_ns: int, allocated: Optional[int] = None,
+               args: Optional[Dict[str, Any]] = None, pid: Optional[int] = None):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler(NullProfiler):
+    """
+    Records wall time (and, with trace_allocations, net allocated bytes) per stage and
+    per file, plus named counters.
+
+    The analyzers take an optional profiler and default to NULL_PROFILER, whose spans
+    are a shared no-op object, so instrumentation costs one method call when disabled.
+    Stages are "scan", "parse", "build_nodes", "resolve_imports"...; per-file spans
+    carry the path as their name and the stage as category. Files parsed in worker
+    processes are recorded with the worker pid, from timings sent back with the
+    summaries (perf_counter_ns is the same monotonic clock in every process).
+
+    summary() gives totals per stage, counters and the top_n slowest files; the
+    profiler can write it as JSON and the spans as a Chrome/Perfetto trace-event
+    file. Used as a context manager, it writes both (when paths are given) and prints
+    the slowest files on exit.
+    """
+    enabled = True
+
+    def __init__(self, trace_allocations: bool = False, top_n: int = 10,
+                 json_path: Optional[str] = None, trace_path: Optional[str] = None):
+        self.trace_allocations = trace_allocations
+        self.top_n = top_n
+        self.json_path = json_path
+        self.trace_path = trace_path
+        self.events: List[Event] = []
+        self.counters: Dict[str, int] = {}
+        self.origin = time.perf_counter_ns()
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def __exit__(self, *exc):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        if self.json_path:
+            self.dump_json(self.json_path)
+        if self.trace_path:
+            self.dump_trace(self.trace_path)
+        self.report()
+        return False
+
+    def stage(self, name: str, **args) -> _Span:
+        return _Span(self, name, "stage", args)
+
+    def file(self, path: str, category: str = "parse") -> _Span:
+        return _Span(self, path, category, {})
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name: str, category: str, start_ns: int, duration_ns: int, allocated: Optional[int] = None,
+               args: Optional[Dict[str, Any]] = None, pid: Optional[int] = None):
+        """Add a finished span (also used for spans measured in worker processes)."""
+        self.events.append((name, category, start_ns, duration_ns, pid or os.getpid(), threading.get_ident(), allocated, args or {}))
+
+    # --- reports -------------------------------------------------------- #
+    def slowest_files(self, n: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Files by total seconds over all their per-file spans, slowest first."""
+        totals: Dict[str, int] = {}
+        for name, category, _, duration, _, _, _, _ in self.events:
+            if category != "stage":
+                totals[name] = totals.get(name, 0) + duration
+        ranked = sorted(totals.items(), key=lambda item: -item[1])[:n or self.top_n]
+        return [(path, duration / 1e9) for path, duration in ranked]
+
+    def summary(self) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for name, category, _, duration, _, _, allocated, _ in self.events:
+            key = name if category == "stage" else f"{category} (per file)"
+            entry = stages.setdefault(key, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += duration / 1e9
+            entry["calls"] += 1
+            if allocated is not None:
+                entry["allocated_bytes"] = entry.get("allocated_bytes", 0) + allocated
+        return {
+            "stages": stages,
+            "counters": dict(self.counters),
+            "slowest_files": [{"path": path, "seconds": seconds} for path, seconds in self.slowest_files()],
+        }
+
+    def dump_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def dump_trace(self, path: str):
+        """Chrome trace-event format: open in chrome://tracing or ui.perfetto.dev."""
+        trace = []
+        end = self.origin
+        for name, category, start, duration, pid, tid, allocated, args in self.events:
+            args = dict(args)
+            if allocated is not None:
+                args["allocated_bytes"] = allocated
+            trace.append({
+                "name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.origin) / 1e3, "dur": duration / 1e3, "args": args,
+            })
+            end = max(end, start + duration)
+        for name, value in self.counters.items():
+            trace.append({"name": name, "ph": "C", "pid": os.getpid(), "ts": (end - self.origin) / 1e3, "args": {name: value}})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def report(self):
+        slowest = self.slowest_files()
+        if not slowest:
+            return
+        print(f"Slowest {len(slowest)} files:")
+        for path, seconds in slowest:
+            print(f"  {seconds * 1e3:9.1f} ms  {path}")
@@ -0,0 +1,189 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from graph.current_code import Node, ScriptNode
+
+
+def script_edges(script_node: ScriptNode) -> Set[str]:
+    """Scripts a script depends on, through module, class or function imports."""
+    targets = {dep.path for dep in script_node.script_dependencies}
+    targets |= {dep.parent.path for dep in script_node.class_dependencies + script_node.function_dependencies}
+    targets.discard(script_node.path)
+    return targets
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ReachabilityIndex:
+    """
+    Answers reachability questions over the ScriptNode dependency edges.
+
+    Import cycles are collapsed into strongly connected components (Tarjan), which
+    leaves a DAG kept in topological order. The transitive closure of every component
+    is a Python int used as a bitset over component ids, computed lazily and memoized
+    in both directions, so after the build a query is a few big-int ORs.
+    """
+    def __init__(self, nodes: Dict[str, Node]):
+        self.paths: List[str] = [path for path, node in nodes.items() if isinstance(node, ScriptNode)]
+        self.ids: Dict[str, int] = {path: i for i, path in enumerate(self.paths)}
+        self.successors: List[List[int]] = [
+            [self.ids[target] for target in script_edges(nodes[path]) if target in self.ids]
+            for path in self.paths
+        ]
+        self.predecessors: List[List[int]] = [[] for _ in self.paths]
+        for source, targets in enumerate(self.successors):
+            for target in targets:
+                self.predecessors[target].append(source)
+
+        self.component: List[int] = [0] * len(self.paths)
+        self.components: List[List[int]] = []
+        self._tarjan()
+        # Tarjan emits components dependencies-first; reversed, importers come first
+        self.topological_order: List[int] = list(reversed(range(len(self.components))))
+
+        self.component_successors: List[Set[int]] = [set() for _ in self.components]
+        self.component_predecessors: List[Set[int]] = [set() for _ in self.components]
+        for source, targets in enumerate(self.successors):
+            for target in targets:
+                a, b = self.component[source], self.component[target]
+                if a != b:
+                    self.component_successors[a].add(b)
+                    self.component_predecessors[b].add(a)
+
+        self._forward: Dict[int, int] = {}
+        self._reverse: Dict[int, int] = {}
+
+    def _tarjan(self):
+        """Iterative Tarjan's algorithm (no recursion limit on long import chains)."""
+        index = [-1] * len(self.paths)
+        lowlink = [0] * len(self.paths)
+        on_stack = [False] * len(self.paths)
+        stack: List[int] = []
+        counter = 0
+        for start in range(len(self.paths)):
+            if index[start] != -1:
+                continue
+            work = [(start, 0)]
+            while work:
+                node, child_i = work.pop()
+                if child_i == 0:
+                    index[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                recurse = False
+                children = self.successors[node]
+                while child_i < len(children):
+                    child = children[child_i]
+                    child_i += 1
+                    if index[child] == -1:
+                        work.append((node, child_i))
+                        work.append((child, 0))
+                        recurse = True
+                        break
+                    if on_stack[child]:
+                        lowlink[node] = min(lowlink[node], index[child])
+                if recurse:
+                    continue
+                if lowlink[node] == index[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        self.component[member] = len(self.components)
+                        members.append(member)
+                        if member == node:
+                            break
+                    self.components.append(members)
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    def _closure(self, component: int, edges: List[Set[int]], memo: Dict[int, int]) -> int:
+        if component in memo:
+            return memo[component]
+        # Post-order over the condensation DAG, without recursion
+        work = [(component, False)]
+        while work:
+            current, expanded = work.pop()
+            if current in memo:
+                continue
+            if expanded:
+                mask = 1 << current
+                for nxt in edges[current]:
+                    mask |= memo[nxt]
+                memo[current] = mask
+                continue
+            work.append((current, True))
+            work.extend((nxt, False) for nxt in edges[current] if nxt not in memo)
+        return memo[component]
+
+    def _paths(self, mask: int, exclude: Optional[str] = None) -> Set[str]:
+        result = set()
+        for component in _bits(mask):
+            result.update(self.paths[member] for member in self.components[component])
+        result.discard(exclude)
+        return result
+
+    def dependencies(self, path: str) -> Set[str]:
+        """Every script reachable from path (what importing it pulls in)."""
+        component = self.component[self.ids[path]]
+        mask = self._closure(component, self.component_successors, self._forward)
+        return self._paths(mask, exclude=path)
+
+    def dependents(self, path: str) -> Set[str]:
+        """Every script that transitively depends on path."""
+        component = self.component[self.ids[path]]
+        mask = self._closure(component, self.component_predecessors, self._reverse)
+        return self._paths(mask, exclude=path)
+
+    def depends_on(self, source: str, target: str) -> bool:
+        source_component = self.component[self.ids[source]]
+        target_component = self.component[self.ids[target]]
+        mask = self._closure(source_component, self.component_successors, self._forward)
+        return bool(mask >> target_component & 1)
+
+    def impact_set(self, paths: Iterable[str]) -> Set[str]:
+        """Scripts affected by a change to any of paths (the changed scripts included)."""
+        mask = 0
+        for path in paths:
+            if path in self.ids:
+                component = self.component[self.ids[path]]
+                mask |= self._closure(component, self.component_predecessors, self._reverse)
+        return self._paths(mask) | {path for path in paths if path in self.ids}
+
+    def shortest_path(self, source: str, target: str) -> Optional[List[str]]:
+        """Shortest import chain from source to target (BFS, skipped if target is unreachable)."""
+        if source == target:
+            return [source]
+        if not self.depends_on(source, target):
+            return None
+        start, goal = self.ids[source], self.ids[target]
+        previous = {start: start}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for nxt in self.successors[node]:
+                if nxt in previous:
+                    continue
+                previous[nxt] = node
+                if nxt == goal:
+                    chain = [goal]
+                    while chain[-1] != start:
+                        chain.append(previous[chain[-1]])
+                    return [self.paths[i] for i in reversed(chain)]
+                queue.append(nxt)
+        return None
+
+    def cycles(self) -> List[List[str]]:
+        """Import cycles, one list of scripts per strongly connected component."""
+        return [[self.paths[m] for m in members] for members in self.components if len(members) > 1]
+
+    def topological_paths(self) -> List[str]:
+        """Scripts ordered importers first; members of a cycle are adjacent."""
+        return [self.paths[m] for component in self.topological_order for m in self.components[component]]
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from graph.lexical_index import LexicalIndex, tokenize
+from graph.vector_index import VectorIndex
+
+
+def chunk_node_path(chunk_id: str) -> str:
+    """Node path of a chunk id ("script.py::ClassA::method1#2" -> "script.py::ClassA::method1")."""
+    return chunk_id.split("#", 1)[0]
+
+
+class HybridRetriever:
+    """
+    Ranks nodes by a weighted sum of lexical (BM25) and vector (cosine) scores.
+
+    Both result lists are normalised to [0, 1] (BM25 by its best score, cosine by the
+    min-max of the candidates) before mixing with alpha, the weight of the lexical side.
+    Chunks of a split node count once, with their best score.
+
+    Embedding the query is the expensive part, so it is skipped when the query names
+    a symbol exactly: if a query word is the name of the best lexical hit, the lexical
+    ranking is returned as is. Query embeddings are kept in a small LRU cache.
+
+    prior optionally maps node paths to a [0, 1] query-independent score (e.g.
+    CentralityIndex.boost()), added with weight prior_weight so structurally
+    central code wins close calls. A node without a score of its own uses the
+    one of its closest scored parent (a method that of its class).
+    """
+    def __init__(self, lexical: LexicalIndex, vectors: Optional[VectorIndex] = None,
+                 embed: Optional[Callable[[str], Sequence[float]]] = None, alpha: float = 0.5, cache_size: int = 1024,
+                 prior: Optional[Dict[str, float]] = None, prior_weight: float = 0.1):
+        self.lexical = lexical
+        self.vectors = vectors
+        self.embed = embed
+        self.alpha = alpha
+        self.cache_size = cache_size
+        self.prior = prior
+        self.prior_weight = prior_weight
+        self._embeddings: "OrderedDict[str, Sequence[float]]" = OrderedDict()
+
+    def _embedding(self, query: str) -> Sequence[float]:
+        if query in self._embeddings:
+            self._embeddings.move_to_end(query)
+            return self._embeddings[query]
+        vector = self.embed(query)
+        self._embeddings[query] = vector
+        if len(self._embeddings) > self.cache_size:
+            self._embeddings.popitem(last=False)
+        return vector
+
+    def _names_symbol(self, query: str, lexical_hits: List[Tuple[str, float]]) -> bool:
+        if not lexical_hits:
+            return False
+        best_name = lexical_hits[0][0].rsplit("::", 1)[-1].rsplit("/", 1)[-1]
+        if "::" not in lexical_hits[0][0]:
+            best_name = best_name.rsplit(".", 1)[0]  # Script: match the module name
+        return best_name.lower().strip("_") in set(tokenize(query))
+
+    def _prior(self, path: str) -> float:
+        while True:
+            if path in self.prior:
+                return self.prior[path]
+            if "::" not in path:
+                return 0.0
+            path = path.rsplit("::", 1)[0]
+
+    def _with_prior(self, scores: Dict[str, float]) -> List[Tuple[str, float]]:
+        if self.prior:
+            scores = {path: score + self.prior_weight * self._prior(path) for path, score in scores.items()}
+        return sorted(scores.items(), key=lambda item: -item[1])
+
+    def search(self, query: str, k: int = 10, query_vector: Optional[Sequence[float]] = None,
+               candidates: Optional[int] = None) -> List[Tuple[str, float]]:
+        """The k best nodes for query as (node path, fused score), best first."""
+        candidates = candidates or 4 * k
+        lexical_hits = self.lexical.search(query, candidates)
+        use_vectors = self.vectors is not None and len(self.vectors) and (query_vector is not None or self.embed is not None)
+        names_symbol = query_vector is None and self._names_symbol(query, lexical_hits)
+        if not use_vectors or names_symbol:
+            best = lexical_hits[0][1] if lexical_hits else 1.0
+            ranked = [(path, score / best) for path, score in lexical_hits]
+            if names_symbol or not self.prior:
+                return ranked[:k]
+            return self._with_prior(dict(ranked))[:k]
+
+        if query_vector is None:
+            query_vector = self._embedding(query)
+        vector_scores: Dict[str, float] = {}
+        for chunk_id, score in self.vectors.search(query_vector, candidates):
+            path = chunk_node_path(chunk_id)
+            vector_scores[path] = max(score, vector_scores.get(path, -1.0))
+
+        fused: Dict[str, float] = {}
+        if lexical_hits:
+            best = lexical_hits[0][1]
+            for path, score in lexical_hits:
+                fused[path] = self.alpha * score / best
+        if vector_scores:
+            low, high = min(vector_scores.values()), max(vector_scores.values())
+            span = (high - low) or 1.0
+            for path, score in vector_scores.items():
+                fused[path] = fused.get(path, 0.0) + (1.0 - self.alpha) * (score - low) / span
+        return self._with_prior(fused)[:k]
@@ -0,0 +1,185 @@
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Folders that never hold project code; matched against entry names at any depth
+DEFAULT_EXCLUDES = (
+    ".git", ".hg", ".svn", "node_modules", "__pycache__",
+    ".venv", "venv", ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    "/build", "/dist", "*.egg-info", ".ipynb_checkpoints",  # Build outputs only at the scan root
+)
+
+# (folder relative to the scan root, "" for the root itself; entry name; is_dir)
+ScanEntry = Tuple[str, str, bool]
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob into a regex over "/"-separated relative paths."""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            members = pattern[i + 1:end]
+            if members.startswith("!"):  # Negated class; a "!" anywhere else is a literal
+                members = "^" + members[1:]
+            regex += "[" + members + "]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+class IgnoreRules:
+    """
+    One .gitignore file (or exclude list) compiled to regexes.
+
+    Supports comments, "!" negation, trailing "/" for folders only, anchored
+    patterns (containing "/"), "*", "?", "[...]" and "**". Paths are matched
+    relative to base, the folder the rules were read from.
+    """
+    def __init__(self, patterns: Iterable[str], base: str = ""):
+        self.base = base
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []  # (regex, negated, dir_only)
+        for line in patterns:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if "/" in line:
+                regex = "^" + _glob_to_regex(line.lstrip("/")) + "$"
+            else:
+                regex = "(?:^|/)" + _glob_to_regex(line) + "$"
+            self.rules.append((re.compile(regex), negated, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str, base: str = "") -> "IgnoreRules":
+        try:
+            with open(path, "r", errors="replace") as f:
+                return cls(f.readlines(), base)
+        except OSError:
+            return cls([], base)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included with "!", None if no rule applies."""
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.search(rel_path):
+                result = not negated
+        return result
+
+
+def _is_ignored(rules: List[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    ignored = False
+    for rule_set in rules:  # Outer to inner: deeper .gitignore files win
+        result = rule_set.match(rel_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def _start_rules(root_path: str, start: str, excludes: Iterable[str], use_gitignore: bool,
+                 is_dir: bool = True) -> Optional[List[IgnoreRules]]:
+    """
+    Rules in effect inside start (a path relative to root_path): the excludes and
+    the .gitignore files of root_path and every folder down to start's parent.
+    None when start or one of its ancestors is ignored.
+    """
+    rules = [IgnoreRules(excludes)]
+    parts = start.split("/")
+    for depth in range(len(parts)):
+        folder = "/".join(parts[:depth])
+        gitignore = os.path.join(root_path, folder, ".gitignore")
+        if use_gitignore and os.path.isfile(gitignore):
+            rules = rules + [IgnoreRules.from_file(gitignore, folder)]
+        if _is_ignored(rules, "/".join(parts[:depth + 1]), is_dir or depth < len(parts) - 1):
+            return None
+    return rules
+
+
+def is_ignored(root_path: str, rel_path: str, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True,
+               is_dir: bool = False) -> bool:
+    """Whether scan_tree(root_path) skips rel_path, because of its own name or one of its folders."""
+    rel_path = rel_path.strip("/")
+    return bool(rel_path) and _start_rules(root_path, rel_path, excludes, use_gitignore, is_dir) is None
+
+
+def scan_tree(root_path: str, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True, start: str = "") -> Iterator[ScanEntry]:
+    """
+    Iteratively walk root_path with os.scandir and stream (folder, name, is_dir) entries.
+
+    Each folder costs one scandir call: entry types come from the cached d_type, so
+    no extra stat is needed per file. Excluded and .gitignore'd entries are skipped
+    without descending into them. Within a folder, files come first and then
+    sub-folders, and folders are expanded depth-first in listing order (as os.walk).
+
+    start limits the walk to one subfolder (relative to root_path). Entries stay
+    relative to root_path and the ignore rules of root_path and the folders above
+    start still apply, so the result is that subtree of the full scan.
+    """
+    start = start.strip("/")
+    if not start:
+        rules = [IgnoreRules(excludes)]
+    elif not os.path.isdir(os.path.join(root_path, start)):
+        return
+    else:
+        rules = _start_rules(root_path, start, excludes, use_gitignore)
+        if rules is None:
+            return
+    stack: List[Tuple[str, List[IgnoreRules]]] = [(start, rules)]
+    while stack:
+        folder, rules = stack.pop()
+        full_path = os.path.join(root_path, folder) if folder else root_path
+        try:
+            with os.scandir(full_path) as it:
+                entries = list(it)
+        except OSError as e:
+            print(f"Error reading directory {full_path}: {e}")
+            continue
+
+        if use_gitignore and any(entry.name == ".gitignore" for entry in entries):
+            rules = rules + [IgnoreRules.from_file(os.path.join(full_path, ".gitignore"), folder)]
+
+        files, folders = [], []
+        for entry in entries:
+            rel_path = f"{folder}/{entry.name}" if folder else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if _is_ignored(rules, rel_path, is_dir):
+                continue
+            (folders if is_dir else files).append(entry)
+
+        for entry in files:
+            yield folder, entry.name, False
+        for entry in folders:
+            yield folder, entry.name, True
+        for entry in reversed(folders):
+            if not entry.is_symlink():  # Like os.walk: list symlinked folders, don't follow them
+                stack.append((f"{folder}/{entry.name}" if folder else entry.name, rules))
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import sys
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from graph.call_resolver import CallResolver
+from graph.current_code import FolderScriptBuilder, FunctionNode, ImportAnalyzer, MethodNode, Node, ScriptAnalyzer, ScriptNode
+from graph.reachability import script_edges
+from graph.scanner import DEFAULT_EXCLUDES
+from graph.watcher import GraphPatcher, make_watcher, poll_changes
+
+MAX_PAGE_SIZE = 1000
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+# (status, extra headers, body)
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+class QueryError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _node_item(node: Node) -> Dict[str, Any]:
+    return {"path": node.path, "name": node.name, "type": type(node).__name__, "children": len(node.children)}
+
+
+class GraphServer:
+    """
+    Keeps an analyzed graph in memory and answers subgraph queries over HTTP.
+
+        GET /version
+        GET /children?path=<folder or script>          ("" is the root folder)
+        GET /dependencies?path=<script>&depth=<N>      scripts reachable in at most N import steps
+        GET /callers?path=<function or method>         functions and methods calling it
+
+    List answers are pages: offset and limit (default page_size) select the items,
+    next_offset is null on the last page. Every change applied to the graph bumps
+    version; answers are cached per (version, query) and carry an ETag built from
+    both, so a client revalidating with If-None-Match gets a 304 without the answer
+    being recomputed. With watch=True the graph follows the files on disk (see
+    graph/watcher.py): the watcher blocks in a thread and patches are applied on the
+    event loop, between requests.
+    """
+    def __init__(self, global_path: str, page_size: int = 200, cache_size: int = 1024, resolve_calls: bool = True,
+                 excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True):
+        self.global_path = global_path
+        self.excludes = excludes  # Used by the build and the watcher alike
+        self.use_gitignore = use_gitignore
+        self.page_size = page_size
+        self.cache_size = cache_size
+        self.resolve_calls = resolve_calls
+        self.version = 0
+        self.instance = f"{time.time_ns():x}"  # ETags of an earlier process never match
+        self._responses: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._callers: Optional[Dict[str, List[str]]] = None
+        self.call_resolver: Optional[CallResolver] = None
+        self._build()
+
+    def _build(self):
+        self.root, self.nodes = FolderScriptBuilder(self.global_path, self.excludes, self.use_gitignore).build()
+        script_analyzer = ScriptAnalyzer(nodes=self.nodes, global_path=self.global_path)
+        script_analyzer.analyze()
+        import_analyzer = ImportAnalyzer(self.global_path, self.nodes, script_analyzer.ast_cache, summaries=script_analyzer.summaries)
+        import_analyzer.analyze()
+        self.patcher = GraphPatcher.from_analyzer(self.root, script_analyzer, self.excludes, self.use_gitignore)
+        if self.resolve_calls:
+            self.call_resolver = CallResolver(self.nodes, self.patcher.summaries, self.patcher.module_index)
+            self.call_resolver.resolve_all()
+
+    def apply(self, created, modified, deleted):
+        """Patch the graph for a batch of file changes and start a new version."""
+        touched = self.patcher.apply(created, modified, deleted)
+        if self.call_resolver is not None:
+            # Only the patched scripts and the scripts depending on them are resolved again
+            scope = self.patcher.resolution_scope(touched)
+            self.call_resolver.invalidate(scope)
+            self.call_resolver.resolve_all(scope)
+        self.version += 1
+        self._responses.clear()
+        self._callers = None
+        return touched
+
+    # --- queries -------------------------------------------------------- #
+    def _node(self, path: str) -> Node:
+        node = self.nodes.get(path or "root")
+        if node is None:
+            raise QueryError(404, f"No node {path!r}")
+        return node
+
+    def _children(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        return [_node_item(child) for child in self._node(params.get("path", "")).children]
+
+    def _dependencies(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Breadth-first over script imports; every item lists its own edges to the other items."""
+        start = self._node(params.get("path", ""))
+        if not isinstance(start, ScriptNode):
+            raise QueryError(400, f"{start.path!r} is not a script")
+        max_depth = _int_param(params, "depth", 1)
+        depths = {start.path: 0}
+        queue = deque([start.path])
+        while queue:
+            path = queue.popleft()
+            if depths[path] == max_depth:
+                continue
+            for target in sorted(script_edges(self.nodes[path])):
+                if target not in depths and isinstance(self.nodes.get(target), ScriptNode):
+                    depths[target] = depths[path] + 1
+                    queue.append(target)
+        items = []
+        for path, depth in depths.items():
+            item = _node_item(self.nodes[path])
+            item["depth"] = depth
+            item["dependencies"] = sorted(target for target in script_edges(self.nodes[path]) if target in depths)
+            items.append(item)
+        return items
+
+    def _callers_index(self) -> Dict[str, List[str]]:
+        if self._callers is None:
+            callers: Dict[str, List[str]] = {}
+            for path, node in self.nodes.items():
+                if isinstance(node, (FunctionNode, MethodNode)):
+                    for dep in node.dependencies:
+                        callers.setdefault(dep.path, []).append(path)
+            self._callers = callers
+        return self._callers
+
+    def _callers_of(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        target = self._node(params.get("path", ""))
+        if not isinstance(target, (FunctionNode, MethodNode)):
+            raise QueryError(400, f"{target.path!r} is not a function or method")
+        return [_node_item(self.nodes[path]) for path in sorted(self._callers_index().get(target.path, []))]
+
+    ROUTES = {"/children": "_children", "/dependencies": "_dependencies", "/callers": "_callers_of"}
+
+    def query(self, route: str, params: Dict[str, str]) -> Dict[str, Any]:
+        if route == "/version":
+            return {"version": self.version}
+        if route not in self.ROUTES:
+            raise QueryError(404, f"Unknown route {route!r}")
+        items = getattr(self, self.ROUTES[route])(params)
+        offset = _int_param(params, "offset", 0)
+        limit = min(_int_param(params, "limit", self.page_size), MAX_PAGE_SIZE)
+        next_offset = offset + limit if offset + limit < len(items) else None
+        return {
+            "version": self.version, "path": params.get("path", ""), "total": len(items),
+            "offset": offset, "next_offset": next_offset, "items": items[offset:offset + limit],
+        }
+
+    # --- HTTP ----------------------------------------------------------- #
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Response:
+        """Answer one request (headers with lower-case names)."""
+        cors = {"Access-Control-Allow-Origin": "*", "Access-Control-Expose-Headers": "ETag"}
+        if method == "OPTIONS":
+            return 200, {**cors, "Access-Control-Allow-Headers": "If-None-Match"}, b""
+        if method not in ("GET", "HEAD"):
+            return 405, {**cors, "Allow": "GET, HEAD, OPTIONS"}, b""
+        url = urlsplit(target)
+        params = dict(sorted(parse_qsl(url.query, keep_blank_values=True)))
+        key = f"{url.path}?{'&'.join(f'{k}={v}' for k, v in params.items())}"
+        etag = f'"{self.instance}-{self.version}-{zlib.crc32(key.encode()):08x}"'
+        cors.update({"ETag": etag, "Cache-Control": "no-cache"})
+        if headers.get("if-none-match") == etag:
+            return 304, cors, b""
+
+        cached = self._responses.get(key)
+        if cached is not None and cached[0] == etag:
+            self._responses.move_to_end(key)
+            body = cached[1]
+        else:
+            try:
+                body = json.dumps(self.query(url.path, params)).encode()
+            except QueryError as e:
+                return _error(e.status, str(e))
+            self._responses[key] = (etag, body)
+            if len(self._responses) > self.cache_size:
+                self._responses.popitem(last=False)
+        return 200, {**cors, "Content-Type": "application/json"}, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One connection: HTTP/1.1 requests, kept alive until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0)):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                try:
+                    status, response_headers, body = self.respond(method, target, headers)
+                except Exception as e:
+                    print(f"Failed to answer {method} {target}: {e!r}")
+                    status, response_headers, body = _error(500, "Internal server error")
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                response_headers["Content-Length"] = str(len(body))
+                response_headers["Connection"] = "keep-alive" if keep_alive else "close"
+                head = f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                head += "".join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+                writer.write(head.encode("latin-1") + b"\r\n" + (body if method != "HEAD" else b""))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _follow_files(self, interval: float):
+        loop = asyncio.get_running_loop()
+        watcher = make_watcher(self.global_path, interval, self.excludes, self.use_gitignore)
+        try:
+            while True:
+                watcher, changes = await loop.run_in_executor(
+                    None, poll_changes, watcher, self.global_path, self.nodes, interval, self.excludes, self.use_gitignore
+                )
+                if changes is not None:
+                    touched = self.apply(*changes)
+                    print(f"Graph version {self.version}: updated {len(touched)} scripts")
+        finally:
+            watcher.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, watch: bool = False, interval: float = 0.5):
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"Serving the graph of {self.global_path} on http://{host}:{port}")
+        async with server:
+            if watch:
+                await asyncio.gather(server.serve_forever(), self._follow_files(interval))
+            else:
+                await server.serve_forever()
+
+
+def _error(status: int, message: str) -> Response:
+    return status, {"Access-Control-Allow-Origin": "*", "Content-Type": "application/json"}, json.dumps({"error": message}).encode()
+
+
+def _int_param(params: Dict[str, str], name: str, default: int) -> int:
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise QueryError(400, f"{name} must be an integer")
+    if value < 0:
+        raise QueryError(400, f"{name} must not be negative")
+    return value
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the dependency graph of a repository.")
+    parser.add_argument("global_path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--watch", action="store_true", help="Follow file changes")
+    args = parser.parse_args()
+    try:
+        asyncio.run(GraphServer(args.global_path).serve(args.host, args.port, args.watch))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from graph.current_code import FolderNode, ImportAnalyzer, Node, ScriptAnalyzer, ScriptNode, summarize_file
+from graph.parse_cache import ParseCache
+from graph.path_trie import IndexedNodes
+from graph.scanner import DEFAULT_EXCLUDES, scan_tree
+from graph.watcher import GraphPatcher
+
+# What a shard worker sends back: (scan entries as (folder, name, is_dir) relative to
+# global_path, summaries of the scripts that parsed)
+ShardResult = Tuple[List[Tuple[str, str, bool]], Dict[str, Dict[str, Any]]]
+
+
+class Shard:
+    """
+    One independently analyzed part of a monorepo: the folder root (relative to
+    the monorepo path) and the source roots of its imports, relative to root
+    (e.g. ("src",) for a package laid out as root/src/pkg/...).
+    """
+    def __init__(self, name: str, root: str, source_roots: Tuple[str, ...] = ("",), excludes: Iterable[str] = DEFAULT_EXCLUDES):
+        self.name = name
+        self.root = root.strip("/")
+        self.source_roots = source_roots
+        self.excludes = excludes
+
+    def global_source_roots(self) -> List[str]:
+        return [f"{self.root}/{source_root}".strip("/") for source_root in self.source_roots]
+
+    def __repr__(self):
+        return f"Shard({self.name}, {self.root})"
+
+
+def analyze_shard(global_path: str, root: str, excludes: Iterable[str] = DEFAULT_EXCLUDES,
+                  cache_path: Optional[str] = None) -> ShardResult:
+    """Scan and parse one shard (runs inside worker processes); paths are relative to global_path."""
+    prefix = f"{root}/" if root else ""
+    entries = []
+    scripts = []
+    for folder, name, is_dir in scan_tree(os.path.join(global_path, root), excludes):
+        folder = f"{prefix}{folder}" if folder else root
+        entries.append((folder, name, is_dir))
+        if not is_dir and name.endswith(".py"):
+            scripts.append(f"{folder}/{name}" if folder else name)
+
+    cache = ParseCache(cache_path) if cache_path else None
+    summaries = {}
+    for path in scripts:
+        full_path = Path(global_path) / path
+        summary = cache.get(path, full_path) if cache is not None else None
+        if summary is None:
+            try:
+                summary = summarize_file(str(full_path))
+            except (SyntaxError, ValueError, UnicodeDecodeError, OSError) as e:
+                print(f"Failed to parse {path}: {e}")
+                continue
+            if cache is not None:
+                cache.put(path, summary)
+        summaries[path] = summary
+    if cache is not None:
+        cache.save()
+    return entries, summaries
+
+
+class ShardedGraph:
+    """
+    Analyzes the roots of a monorepo as separate shards and merges them into one graph.
+
+    Every shard is scanned and parsed on its own (in a process pool when workers > 1),
+    with its own parse cache in cache_dir, and nothing outside the shard roots is
+    walked. The merged graph has the usual FolderNode root at global_path. Imports
+    are resolved through one ModuleIndex whose source roots are those of every
+    shard, so "import billing.models" in one shard links to the billing shard.
+
+    refresh(name) re-analyzes a single shard (only its changed files are parsed,
+    thanks to its cache) and applies the difference with GraphPatcher: the shard's
+    changed scripts are rebuilt, and only the scripts of other shards that import
+    them or hold edges into them are relinked.
+    """
+    def __init__(self, global_path: str, shards: List[Shard], cache_dir: Optional[str] = None, workers: int = 0):
+        self.global_path = str(global_path)
+        self.shards = {shard.name: shard for shard in shards}
+        self.cache_dir = cache_dir
+        self.workers = workers
+        roots = sorted(shard.root for shard in shards)
+        for outer, inner in zip(roots, roots[1:]):
+            if not outer or inner == outer or inner.startswith(outer + "/"):
+                raise ValueError(f"Shard roots overlap: {outer!r} and {inner!r}")
+        self.source_roots = tuple(root for shard in shards for root in shard.global_source_roots())
+        self.root: Optional[FolderNode] = None
+        self.nodes: Dict[str, Node] = {}
+        self.scripts: Dict[str, Set[str]] = {}  # shard name -> script paths
+        self.patcher: Optional[GraphPatcher] = None
+
+    def _cache_path(self, shard: Shard) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{shard.name}.pkl") if self.cache_dir else None
+
+    def _analyze(self, shards: List[Shard]) -> List[ShardResult]:
+        arguments = [(self.global_path, shard.root, shard.excludes, self._cache_path(shard)) for shard in shards]
+        if self.workers > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(shards))) as executor:
+                return list(executor.map(analyze_shard, *zip(*arguments)))
+        return [analyze_shard(*argument) for argument in arguments]
+
+    def _folder(self, path: str) -> Node:
+        """Folder node for path, created with its missing ancestors."""
+        if not path:
+            return self.root
+        node = self.nodes.get(path)
+        if node is None:
+            parent_path, _, name = path.rpartition("/")
+            parent = self._folder(parent_path)
+            node = FolderNode(name, path)
+            self.nodes[path] = node
+            parent.add_child(node)
+        return node
+
+    def build(self) -> Tuple[FolderNode, Dict[str, Node]]:
+        """Analyze every shard and merge them; returns (root, nodes) like FolderScriptBuilder.build()."""
+        self.root = FolderNode("root", ".", None)
+        self.root.name = Path(self.global_path).parts[-1]
+        self.nodes = IndexedNodes({"root": self.root})
+        summaries: Dict[str, Dict[str, Any]] = {}
+        shards = list(self.shards.values())
+        for shard, (entries, shard_summaries) in zip(shards, self._analyze(shards)):
+            self._folder(shard.root)
+            scripts = set()
+            for folder, name, is_dir in entries:
+                parent = self._folder(folder)
+                path = f"{folder}/{name}" if folder else name
+                if is_dir:
+                    self._folder(path)
+                elif name.endswith(".py"):
+                    script_node = ScriptNode(name, path)
+                    self.nodes[path] = script_node
+                    parent.add_child(script_node)
+                    scripts.add(path)
+            self.scripts[shard.name] = scripts
+            summaries.update(shard_summaries)
+
+        script_analyzer = ScriptAnalyzer(self.nodes, self.global_path, scan=False)
+        for path, summary in summaries.items():
+            script_analyzer.analyze_script(path, summary)
+        ImportAnalyzer(self.global_path, self.nodes, {}, summaries=script_analyzer.summaries, source_roots=self.source_roots).analyze()
+        self.patcher = GraphPatcher(self.global_path, self.root, self.nodes, script_analyzer.summaries, source_roots=self.source_roots)
+        return self.root, self.nodes
+
+    def refresh(self, name: str) -> Set[str]:
+        """Re-analyze one shard and patch the merged graph; returns the script paths touched."""
+        shard = self.shards[name]
+        entries, summaries = self._analyze([shard])[0]
+        scripts = {f"{folder}/{entry}" if folder else entry for folder, entry, is_dir in entries if not is_dir and entry.endswith(".py")}
+        previous = self.scripts[name]
+        created = scripts - previous
+        deleted = previous - scripts
+        modified = {path for path in scripts & previous if summaries.get(path) != self.patcher.summaries.get(path)}
+        self.scripts[name] = scripts
+        return self.patcher.apply(created, modified, deleted, summaries)
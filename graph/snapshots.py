@@ -0,0 +1,436 @@
+import ast
+import json
+import os
+import pickle
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from graph.call_resolver import CallResolver
+from graph.current_code import (
+    SUMMARY_VERSION,
+    ClassNode,
+    FolderNode,
+    FunctionNode,
+    ImportAnalyzer,
+    MethodNode,
+    Node,
+    ScriptAnalyzer,
+    ScriptNode,
+    summarize_tree,
+)
+from graph.path_trie import IndexedNodes
+from graph.scanner import DEFAULT_EXCLUDES, IgnoreRules
+from graph.watcher import GraphPatcher
+
+# Bump whenever the manifest layout below changes
+SNAPSHOT_FORMAT = 1
+
+# Import edges of one script, as stored in a manifest
+EDGE_KEYS = ("script_dependencies", "class_dependencies", "function_dependencies")
+
+# (kind, source path, target path): kind is an EDGE_KEYS entry or "calls"
+Edge = Tuple[str, str, str]
+
+
+# ------------------------------------------------- #
+#             GIT
+# ------------------------------------------------- #
+def _git(repo: str, *args: str) -> bytes:
+    return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True).stdout
+
+
+def resolve_commit(repo: str, commit: str) -> str:
+    return _git(repo, "rev-parse", "--verify", f"{commit}^{{commit}}").decode().strip()
+
+
+def _is_excluded(rules: IgnoreRules, path: str) -> bool:
+    parts = path.split("/")
+    return any(rules.match("/".join(parts[:i + 1]), i + 1 < len(parts)) for i in range(len(parts)))
+
+
+def _is_script(rules: IgnoreRules, mode: str, path: str) -> bool:
+    """A regular .py file (blob modes 100644/100755; not a symlink, 120000, or a submodule, 160000) that is not excluded."""
+    return mode.startswith("100") and path.endswith(".py") and not _is_excluded(rules, path)
+
+
+def tracked_scripts(repo: str, commit: str, excludes: Iterable[str] = DEFAULT_EXCLUDES) -> Dict[str, str]:
+    """path -> blob id of every tracked .py file in commit."""
+    rules = IgnoreRules(excludes)
+    scripts = {}
+    for record in _git(repo, "ls-tree", "-r", "-z", commit).split(b"\0"):
+        if not record:
+            continue
+        info, path = record.decode().split("\t", 1)
+        mode, kind, blob = info.split()
+        if kind == "blob" and _is_script(rules, mode, path):
+            scripts[path] = blob
+    return scripts
+
+
+def changed_scripts(repo: str, base: str, head: str, excludes: Iterable[str] = DEFAULT_EXCLUDES) -> Tuple[Dict[str, str], Dict[str, str], Set[str]]:
+    """
+    (created, modified, deleted) .py files between two commits, as path -> new blob id
+    for the first two. A rename is the deletion of the old path plus a new one.
+    As in tracked_scripts, only regular files count: a script that becomes a symlink
+    (or a submodule) is deleted, and one that stops being a symlink is created.
+    """
+    rules = IgnoreRules(excludes)
+    created: Dict[str, str] = {}
+    modified: Dict[str, str] = {}
+    deleted: Set[str] = set()
+    fields = _git(repo, "diff", "--raw", "-z", "-M", "--no-abbrev", base, head).split(b"\0")
+    i = 0
+    while i < len(fields) - 1:
+        old_mode, new_mode, _, new_blob, status = fields[i].decode().lstrip(":").split()
+        paths = [fields[i + 1].decode()]
+        i += 2
+        if status[0] in "RC":
+            paths.append(fields[i].decode())
+            i += 1
+        old_path, new_path = paths[0], paths[-1]
+        old_script = status[0] in "DRMT" and _is_script(rules, old_mode, old_path)
+        new_script = status[0] != "D" and _is_script(rules, new_mode, new_path)
+        if old_script and new_script and status[0] in "MT":
+            modified[new_path] = new_blob
+        else:
+            if old_script:
+                deleted.add(old_path)
+            if new_script:
+                created[new_path] = new_blob
+    return created, modified, deleted
+
+
+def read_blobs(repo: str, blobs: Iterable[str]) -> Dict[str, bytes]:
+    """
+    Contents of many blobs through one git cat-file --batch process. Blobs git does
+    not have (answered "<sha> missing", e.g. in a shallow or partial clone) are left out.
+    """
+    blobs = list(dict.fromkeys(blobs))
+    if not blobs:
+        return {}
+    output = subprocess.run(
+        ["git", "-C", repo, "cat-file", "--batch"], input="\n".join(blobs).encode() + b"\n", check=True, capture_output=True
+    ).stdout
+    contents = {}
+    offset = 0
+    for blob in blobs:
+        end = output.index(b"\n", offset)
+        header = output[offset:end].split()
+        if header[-1] == b"missing":
+            offset = end + 1
+            continue
+        size = int(header[2])
+        contents[blob] = output[end + 1:end + 1 + size]
+        offset = end + 1 + size + 1
+    return contents
+
+
+# ------------------------------------------------- #
+#             SNAPSHOT STORE
+# ------------------------------------------------- #
+class SnapshotStore:
+    """
+    Folder of graph snapshots, one per analyzed commit.
+
+    - objects/v<SUMMARY_VERSION>/ab/abcdef...: pickled summary of one git blob
+    - <commit>.json: manifest with the blob of every script, the import edges and
+      aliases of every script and the call edges of every function and method
+
+    Summaries are addressed by blob id, so a snapshot shares them with every other
+    snapshot holding the same file content (unchanged or renamed files).
+    """
+    def __init__(self, folder: str):
+        self.folder = Path(folder)
+        self.objects = self.folder / "objects" / f"v{SUMMARY_VERSION}"
+
+    def _object_path(self, blob: str) -> Path:
+        return self.objects / blob[:2] / blob
+
+    def get_summary(self, blob: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._object_path(blob), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put_summary(self, blob: str, summary: Dict[str, Any]):
+        path = self._object_path(blob)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(summary, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def has_manifest(self, commit: str) -> bool:
+        return (self.folder / f"{commit}.json").exists()
+
+    def load_manifest(self, commit: str) -> Dict[str, Any]:
+        with open(self.folder / f"{commit}.json", "r") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("summary_version") != SUMMARY_VERSION:
+            raise ValueError(f"Snapshot of {commit} was written by another version of the analyzer")
+        return manifest
+
+    def save_manifest(self, manifest: Dict[str, Any]):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.folder / f"{manifest['commit']}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+
+# ------------------------------------------------- #
+#             GRAPH DIFF
+# ------------------------------------------------- #
+class GraphDiff:
+    """Structural difference between two snapshots."""
+    def __init__(self, base: Optional[str], head: str):
+        self.base = base
+        self.head = head
+        self.added_nodes: List[str] = []
+        self.removed_nodes: List[str] = []
+        self.added_edges: List[Edge] = []
+        self.removed_edges: List[Edge] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "base": self.base, "head": self.head,
+            "added_nodes": self.added_nodes, "removed_nodes": self.removed_nodes,
+            "added_edges": [list(edge) for edge in self.added_edges],
+            "removed_edges": [list(edge) for edge in self.removed_edges],
+        }
+
+    def __repr__(self):
+        return (f"GraphDiff({self.base}..{self.head}: +{len(self.added_nodes)}/-{len(self.removed_nodes)} nodes, "
+                f"+{len(self.added_edges)}/-{len(self.removed_edges)} edges)")
+
+
+def _definition_paths(script_path: str, summary: Optional[Dict[str, Any]]) -> Set[str]:
+    paths = set()
+    for kind, name, methods in (summary or {}).get("definitions", []):
+        paths.add(f"{script_path}::{name}")
+        paths.update(f"{script_path}::{name}::{method}" for method in methods)
+    return paths
+
+
+def _script_edges(manifest: Dict[str, Any], script_path: str) -> Set[Edge]:
+    edges = set()
+    for kind in EDGE_KEYS:
+        edges.update((kind, script_path, target) for target in manifest["edges"].get(script_path, {}).get(kind, []))
+    prefix = script_path + "::"
+    for caller, targets in manifest["calls"].get(script_path, {}).items():
+        edges.update(("calls", f"{prefix}{caller}", target) for target in targets)
+    return edges
+
+
+# ------------------------------------------------- #
+#             SNAPSHOTS
+# ------------------------------------------------- #
+class IncrementalAnalyzer:
+    """
+    Analyzes commits of a git repository into versioned snapshots (see SnapshotStore).
+
+    create(commit) analyzes a whole commit. update(base, head) starts from the
+    snapshot of base: only the scripts that git diff reports between the two commits
+    (renames included) are read from git and parsed, and only if no snapshot holds a
+    summary of their blob yet. The base graph is rebuilt from its manifest without
+    parsing, patched with GraphPatcher (which relinks the changed scripts and their
+    importers), and calls are resolved again for those scripts and the scripts that
+    depend on them (GraphPatcher.resolution_scope). The rest of the
+    manifest is carried over, and the structural GraphDiff is computed over the
+    touched scripts. Blobs are read from git, not from the working tree, so any
+    commit can be analyzed without checking it out.
+    """
+    def __init__(self, repo: str, store: SnapshotStore, excludes: Iterable[str] = DEFAULT_EXCLUDES,
+                 source_roots: Tuple[str, ...] = ("",)):
+        self.repo = str(repo)
+        self.store = store
+        self.excludes = excludes
+        self.source_roots = source_roots
+        self.parsed = 0  # Blobs parsed by this analyzer (the others came from the store)
+
+    def _summaries(self, blobs: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """path -> summary for path -> blob, parsing only blobs the store does not know."""
+        summaries = {}
+        missing = {}
+        for path, blob in blobs.items():
+            summary = self.store.get_summary(blob)
+            if summary is None:
+                missing[path] = blob
+            else:
+                summaries[path] = summary
+        contents = read_blobs(self.repo, missing.values())
+        for path, blob in missing.items():
+            if blob not in contents:
+                print(f"Failed to parse {path}: blob {blob} is missing from the repository")
+                continue
+            try:
+                summary = summarize_tree(ast.parse(contents[blob].decode()))
+            except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+                print(f"Failed to parse {path}: {e}")
+                continue
+            self.parsed += 1
+            self.store.put_summary(blob, summary)
+            summaries[path] = summary
+        return summaries
+
+    def _nodes(self, summaries_by_path: Dict[str, Optional[Dict[str, Any]]]) -> Tuple[FolderNode, Dict[str, Node], ScriptAnalyzer]:
+        """Folder, script and definition nodes for the given scripts."""
+        root = FolderNode("root", ".", None)
+        root.name = Path(self.repo).resolve().parts[-1]
+        nodes: Dict[str, Node] = IndexedNodes({"root": root})
+        for path in sorted(summaries_by_path):
+            parent = root
+            parts = path.split("/")
+            for i, part in enumerate(parts[:-1]):
+                folder_path = "/".join(parts[:i + 1])
+                if folder_path not in nodes:
+                    folder_node = FolderNode(part, folder_path)
+                    nodes[folder_path] = folder_node
+                    parent.add_child(folder_node)
+                parent = nodes[folder_path]
+            script_node = ScriptNode(parts[-1], path)
+            nodes[path] = script_node
+            parent.add_child(script_node)
+        script_analyzer = ScriptAnalyzer(nodes, self.repo, scan=False)
+        for path, summary in summaries_by_path.items():
+            if summary is not None:
+                script_analyzer.analyze_script(path, summary)
+        return root, nodes, script_analyzer
+
+    @staticmethod
+    def _record_script(manifest: Dict[str, Any], nodes: Dict[str, Node], path: str):
+        script_node = nodes[path]
+        manifest["edges"][path] = {kind: [dep.path for dep in getattr(script_node, kind)] for kind in EDGE_KEYS}
+        manifest["edges"][path]["aliases"] = dict(script_node.aliases)
+        calls = {}
+        for child in script_node.children:
+            for caller in (child.children if isinstance(child, ClassNode) else [child]):
+                if isinstance(caller, (FunctionNode, MethodNode)) and caller.dependencies:
+                    calls[caller.path[len(path) + 2:]] = [dep.path for dep in caller.dependencies]
+        manifest["calls"][path] = calls
+
+    def _manifest(self, commit: str, base: Optional[str], blobs: Dict[str, str]) -> Dict[str, Any]:
+        return {"format": SNAPSHOT_FORMAT, "summary_version": SUMMARY_VERSION, "commit": commit, "base": base,
+                "scripts": blobs, "edges": {}, "calls": {}}
+
+    def create(self, commit: str = "HEAD") -> Dict[str, Any]:
+        """Analyze every script of commit and store its snapshot."""
+        commit = resolve_commit(self.repo, commit)
+        blobs = tracked_scripts(self.repo, commit, self.excludes)
+        summaries = self._summaries(blobs)
+        root, nodes, script_analyzer = self._nodes({path: summaries.get(path) for path in blobs})
+        import_analyzer = ImportAnalyzer(self.repo, nodes, {}, summaries=script_analyzer.summaries, source_roots=self.source_roots)
+        import_analyzer.analyze()
+        CallResolver(nodes, script_analyzer.summaries, import_analyzer.module_index).resolve_all()
+
+        manifest = self._manifest(commit, None, blobs)
+        for path in blobs:
+            self._record_script(manifest, nodes, path)
+        self.store.save_manifest(manifest)
+        return manifest
+
+    def load_graph(self, manifest: Dict[str, Any]) -> Tuple[FolderNode, Dict[str, Node], Dict[str, Dict[str, Any]]]:
+        """(root, nodes, summaries) of a snapshot, linked from the manifest without parsing or resolving."""
+        summaries = {path: self.store.get_summary(blob) for path, blob in manifest["scripts"].items()}
+        root, nodes, script_analyzer = self._nodes(summaries)
+        for path, edges in manifest["edges"].items():
+            script_node = nodes[path]
+            for kind in EDGE_KEYS:
+                setattr(script_node, kind, [nodes[target] for target in edges[kind] if target in nodes])
+            script_node.aliases = dict(edges["aliases"])
+        for path, calls in manifest["calls"].items():
+            for caller, targets in calls.items():
+                caller_node = nodes.get(f"{path}::{caller}")
+                if caller_node is not None:
+                    caller_node.dependencies = [nodes[target] for target in targets if target in nodes]
+        return root, nodes, script_analyzer.summaries
+
+    def update(self, base: str, head: str = "HEAD") -> Tuple[Dict[str, Any], GraphDiff]:
+        """Snapshot of head built from the snapshot of base, and the structural diff between them."""
+        base, head = resolve_commit(self.repo, base), resolve_commit(self.repo, head)
+        if not self.store.has_manifest(base):
+            raise ValueError(f"No snapshot of {base}: create() it first")
+        base_manifest = self.store.load_manifest(base)
+        created, modified, deleted = changed_scripts(self.repo, base, head, self.excludes)
+        new_summaries = self._summaries({**created, **modified})
+        # A blob that failed to parse (or is missing) has no definitions, as in create():
+        # without a summary GraphPatcher would read the path from the working tree instead
+        for path in {**created, **modified}:
+            new_summaries.setdefault(path, summarize_tree(ast.Module(body=[], type_ignores=[])))
+
+        root, nodes, summaries = self.load_graph(base_manifest)
+        patcher = GraphPatcher(self.repo, root, nodes, summaries, source_roots=self.source_roots)
+        touched = patcher.apply(set(created), set(modified), deleted, new_summaries)
+        touched = patcher.resolution_scope(touched)
+        resolver = CallResolver(nodes, patcher.summaries, patcher.module_index)
+        resolver.invalidate(touched)
+        resolver.resolve_all(touched)
+
+        blobs = {path: blob for path, blob in base_manifest["scripts"].items() if path not in deleted}
+        blobs.update(created)
+        blobs.update(modified)
+        manifest = self._manifest(head, base, blobs)
+        for path in blobs:
+            if path in touched:
+                self._record_script(manifest, nodes, path)
+            else:
+                manifest["edges"][path] = base_manifest["edges"][path]
+                manifest["calls"][path] = base_manifest["calls"][path]
+        self.store.save_manifest(manifest)
+        return manifest, self.diff(base_manifest, manifest, touched | deleted)
+
+    def diff(self, old: Dict[str, Any], new: Dict[str, Any], scripts: Optional[Iterable[str]] = None) -> GraphDiff:
+        """
+        Nodes and edges that appeared or vanished between two manifests, looking only
+        at the given scripts (by default: every script whose blob or edges differ).
+        """
+        if scripts is None:
+            scripts = {
+                path for path in set(old["scripts"]) | set(new["scripts"])
+                if old["scripts"].get(path) != new["scripts"].get(path)
+                or old["edges"].get(path) != new["edges"].get(path) or old["calls"].get(path) != new["calls"].get(path)
+            }
+        graph_diff = GraphDiff(old["commit"], new["commit"])
+        old_nodes: Set[str] = set()
+        new_nodes: Set[str] = set()
+        old_edges: Set[Edge] = set()
+        new_edges: Set[Edge] = set()
+        for path in scripts:
+            old_blob, new_blob = old["scripts"].get(path), new["scripts"].get(path)
+            if old_blob != new_blob:
+                old_nodes |= _definition_paths(path, self.store.get_summary(old_blob) if old_blob else None)
+                new_nodes |= _definition_paths(path, self.store.get_summary(new_blob) if new_blob else None)
+            old_edges |= _script_edges(old, path)
+            new_edges |= _script_edges(new, path)
+        graph_diff.added_nodes = sorted(new_nodes - old_nodes)
+        graph_diff.removed_nodes = sorted(old_nodes - new_nodes)
+        graph_diff.added_edges = sorted(new_edges - old_edges)
+        graph_diff.removed_edges = sorted(old_edges - new_edges)
+        return graph_diff
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental, git-aware graph snapshots.")
+    parser.add_argument("repo")
+    parser.add_argument("--store", default=".graph-snapshots", help="Snapshot folder")
+    parser.add_argument("--diff", help="Write the graph diff of an update to this JSON file")
+    parser.add_argument("range", help="COMMIT to snapshot it, or BASE..HEAD to update from the snapshot of BASE")
+    args = parser.parse_args()
+
+    analyzer = IncrementalAnalyzer(args.repo, SnapshotStore(args.store))
+    if ".." in args.range:
+        base_commit, head_commit = args.range.split("..", 1)
+        _, graph_diff = analyzer.update(base_commit, head_commit or "HEAD")
+        print(graph_diff)
+        if args.diff:
+            with open(args.diff, "w") as f:
+                json.dump(graph_diff.to_dict(), f, indent=2)
+    else:
+        manifest = analyzer.create(args.range)
+        print(f"Snapshot of {manifest['commit']} with {len(manifest['scripts'])} scripts")
+    print(f"Parsed {analyzer.parsed} files")
@@ -0,0 +1,278 @@
+import os
+import sqlite3
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from graph.current_code import ClassNode, FolderNode, FunctionNode, MethodNode, Node, ScriptNode
+from graph.graph_store import (
+    CLASS,
+    EDGE_ATTRIBUTES,
+    FOLDER,
+    FUNCTION,
+    KIND_NAMES,
+    METHOD,
+    METHOD_DEP,
+    SCRIPT,
+    GraphStore,
+)
+from graph.path_trie import IndexedNodes
+
+# Bump whenever the schema below changes
+STORE_FORMAT = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE nodes (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    parent INTEGER,
+    is_static INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE edges (
+    kind INTEGER NOT NULL,
+    source INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (source, kind, position)
+) WITHOUT ROWID;
+CREATE TABLE aliases (
+    script INTEGER NOT NULL,
+    alias TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (script, alias)
+) WITHOUT ROWID;
+"""
+# Created after the bulk insert, which is faster than maintaining them row by row
+INDEXES = """
+CREATE UNIQUE INDEX nodes_path ON nodes (path);
+CREATE INDEX nodes_kind ON nodes (kind);
+CREATE INDEX nodes_parent ON nodes (parent);
+CREATE INDEX edges_target ON edges (target, kind);
+"""
+
+NODE_CLASSES = {FOLDER: FolderNode, SCRIPT: ScriptNode, CLASS: ClassNode, FUNCTION: FunctionNode, METHOD: MethodNode}
+
+# (id, kind, name, path, parent id or None, is_static)
+NodeRow = Tuple[int, int, str, str, Optional[int], int]
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _prefix_upper(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix (for an index range scan)."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SQLiteGraphStore:
+    """
+    The nodes graph persisted in a SQLite file, queried through indexes.
+
+    write() stores every node (kind, name, path, parent), the dependency edges of
+    EDGE_ATTRIBUTES in their original order, and the script aliases. Rows go in
+    with executemany in batches of batch_size, one transaction per batch, and the
+    indexes (path, kind, parent, edge target) are built at the end. The file is
+    written next to db_path and moved into place, so readers never see half a graph.
+
+    Opening a store only connects to the file. Lookups by path, path prefix, kind,
+    children, dependencies and callers are index scans, and subgraph() / load()
+    turn a part of the store (or all of it) back into Node objects, linked like
+    the output of FolderScriptBuilder and the analyzers.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # as_uri() percent-encodes the path, so "?", "#" or "%" in it cannot end the filename early
+        uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+        self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        if int(meta.get("format", -1)) != STORE_FORMAT:
+            raise ValueError(f"{db_path} was written with another store format")
+        self.global_path = meta.get("global_path")
+
+    # --- writing -------------------------------------------------------- #
+    @classmethod
+    def write(cls, db_path: str, root: Node, nodes: Dict[str, Node], global_path: Optional[str] = None,
+              batch_size: int = 50_000) -> "SQLiteGraphStore":
+        return cls.write_store(db_path, GraphStore.from_nodes(root, nodes), global_path, batch_size)
+
+    @classmethod
+    def write_store(cls, db_path: str, store: GraphStore, global_path: Optional[str] = None,
+                    batch_size: int = 50_000) -> "SQLiteGraphStore":
+        """Same as write(), from a GraphStore (e.g. GraphStore.from_tree, without Node objects)."""
+        strings = store.strings
+
+        def node_rows():
+            for node_id in range(len(store)):
+                parent = store.parents[node_id]
+                yield (node_id, store.kinds[node_id], strings[store.names[node_id]], strings[store.paths[node_id]],
+                       parent if parent >= 0 else None, store.static[node_id])
+
+        def edge_rows():
+            for edge_kind, (offsets, targets) in enumerate(store.edges):
+                for source in range(len(store)):
+                    for position in range(offsets[source], offsets[source + 1]):
+                        yield edge_kind, source, targets[position], position - offsets[source]
+
+        def alias_rows():
+            for script in range(len(store)):
+                for alias, target in store.aliases(script).items():
+                    yield script, alias, target
+
+        tmp_path = db_path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.executescript(SCHEMA)
+            inserts = [
+                ("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?)", node_rows()),
+                ("INSERT INTO edges VALUES (?, ?, ?, ?)", edge_rows()),
+                ("INSERT INTO aliases VALUES (?, ?, ?)", alias_rows()),
+            ]
+            for statement, rows in inserts:
+                for batch in _batches(rows, batch_size):
+                    with connection:
+                        connection.executemany(statement, batch)
+            with connection:
+                connection.executescript(INDEXES)
+                connection.executemany("INSERT INTO meta VALUES (?, ?)", [("format", str(STORE_FORMAT)), ("global_path", global_path)])
+            connection.execute("ANALYZE")
+        finally:
+            connection.close()
+        os.replace(tmp_path, db_path)
+        return cls(db_path)
+
+    def close(self):
+        self.connection.close()
+
+    # --- queries -------------------------------------------------------- #
+    def _rows(self, where: str, params: tuple = ()) -> List[NodeRow]:
+        return self.connection.execute(f"SELECT id, kind, name, path, parent, is_static FROM nodes WHERE {where}", params).fetchall()
+
+    def node(self, path: str) -> Optional[NodeRow]:
+        rows = self._rows("id = 0") if path == "root" else self._rows("path = ?", (path,))
+        return rows[0] if rows else None
+
+    def _id(self, path: str) -> int:
+        row = self.node(path)
+        if row is None:
+            raise KeyError(path)
+        return row[0]
+
+    def by_prefix(self, prefix: str, kind: Optional[int] = None) -> List[NodeRow]:
+        """Nodes whose path starts with prefix ("pkg/" for a folder's subtree, "pkg/mod.py::" for a script's members)."""
+        if not prefix:
+            return self._rows("kind = ?", (kind,)) if kind is not None else self._rows("1")
+        where = "path >= ? AND path < ?"
+        params: tuple = (prefix, _prefix_upper(prefix))
+        if kind is not None:
+            where += " AND kind = ?"
+            params += (kind,)
+        return self._rows(where, params)
+
+    def by_kind(self, kind: int) -> List[NodeRow]:
+        return self._rows("kind = ?", (kind,))
+
+    def children(self, path: str) -> List[NodeRow]:
+        return self._rows("parent = ? ORDER BY id", (self._id(path),))
+
+    def dependencies(self, path: str, edge_kind: Optional[int] = None) -> List[NodeRow]:
+        """Targets of the node's dependency edges (of one EDGE_ATTRIBUTES kind, or all), in stored order."""
+        query = "SELECT n.id, n.kind, n.name, n.path, n.parent, n.is_static FROM edges e JOIN nodes n ON n.id = e.target WHERE e.source = ?"
+        params: tuple = (self._id(path),)
+        if edge_kind is not None:
+            query += " AND e.kind = ?"
+            params += (edge_kind,)
+        return self.connection.execute(query + " ORDER BY e.kind, e.position", params).fetchall()
+
+    def dependents(self, path: str, edge_kind: Optional[int] = None) -> List[NodeRow]:
+        """Sources of the edges pointing at the node."""
+        query = "SELECT n.id, n.kind, n.name, n.path, n.parent, n.is_static FROM edges e JOIN nodes n ON n.id = e.source WHERE e.target = ?"
+        params: tuple = (self._id(path),)
+        if edge_kind is not None:
+            query += " AND e.kind = ?"
+            params += (edge_kind,)
+        return self.connection.execute(query + " ORDER BY n.id", params).fetchall()
+
+    def callers(self, path: str) -> List[NodeRow]:
+        """Functions and methods calling a function or method."""
+        return self.dependents(path, METHOD_DEP)
+
+    def aliases(self, path: str) -> Dict[str, str]:
+        return dict(self.connection.execute("SELECT alias, target FROM aliases WHERE script = ?", (self._id(path),)))
+
+    # --- materialization ------------------------------------------------ #
+    def _materialize(self, rows: List[NodeRow], with_targets: bool) -> Dict[int, Node]:
+        """Node objects for rows, with hierarchy and edges between them (and their edge targets if with_targets)."""
+        built: Dict[int, Node] = {}
+        for node_id, kind, name, path, _, is_static in rows:
+            node_class = NODE_CLASSES[kind]
+            built[node_id] = MethodNode(name, path, is_static=bool(is_static)) if kind == METHOD else node_class(name, path)
+
+        sources = list(built)
+        edges = []
+        for batch in _batches(sources, 900):  # SQLite caps the number of bound parameters
+            marks = ",".join("?" * len(batch))
+            edges += self.connection.execute(
+                f"SELECT kind, source, target FROM edges WHERE source IN ({marks}) ORDER BY source, kind, position", batch
+            ).fetchall()
+        if with_targets:
+            missing = sorted({target for _, _, target in edges if target not in built})
+            for batch in _batches(missing, 900):
+                marks = ",".join("?" * len(batch))
+                for node_id, kind, name, path, _, is_static in self._rows(f"id IN ({marks})", tuple(batch)):
+                    node_class = NODE_CLASSES[kind]
+                    built[node_id] = MethodNode(name, path, is_static=bool(is_static)) if kind == METHOD else node_class(name, path)
+
+        for node_id, _, _, _, parent, _ in sorted(rows):
+            if parent is not None and parent in built:
+                built[parent].add_child(built[node_id])
+        for edge_kind, source, target in edges:
+            if target in built:
+                if edge_kind == METHOD_DEP:
+                    built[source].add_dep(built[target])
+                else:
+                    getattr(built[source], EDGE_ATTRIBUTES[edge_kind]).append(built[target])
+
+        scripts = [node_id for node_id in sources if isinstance(built[node_id], ScriptNode)]
+        for batch in _batches(scripts, 900):
+            marks = ",".join("?" * len(batch))
+            for script, alias, target in self.connection.execute(f"SELECT script, alias, target FROM aliases WHERE script IN ({marks})", batch):
+                built[script].aliases[alias] = target
+        return built
+
+    def subgraph(self, prefix: str, with_targets: bool = True) -> Dict[str, Node]:
+        """
+        Nodes under a path prefix as Node objects, keyed by path. Edges leaving the
+        subtree point at detached copies of their targets (with_targets) or are dropped.
+        """
+        built = self._materialize(self.by_prefix(prefix), with_targets)
+        return {node.path: node for node in built.values()}
+
+    def load(self) -> Tuple[FolderNode, Dict[str, Node]]:
+        """The whole graph, as (root, nodes) like FolderScriptBuilder.build() plus the analyzers."""
+        built = self._materialize(self._rows("1 ORDER BY id"), with_targets=False)
+        root = built[0]
+        nodes: Dict[str, Node] = IndexedNodes({"root": root})
+        for node_id, node in built.items():
+            if node_id:
+                nodes[node.path] = node
+        return root, nodes
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def __repr__(self):
+        counts = dict(self.connection.execute("SELECT kind, COUNT(*) FROM nodes GROUP BY kind"))
+        return f"SQLiteGraphStore({self.db_path}, " + ", ".join(f"{counts.get(kind, 0)} {name}" for kind, name in enumerate(KIND_NAMES)) + ")"
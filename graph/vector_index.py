@@ -0,0 +1,294 @@
+import json
+import os
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Bump whenever the on-disk layout below changes
+INDEX_FORMAT = 1
+# Rows scored per block when assigning vectors to centroids (bounds temporary memory)
+BLOCK_ROWS = 16_384
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first (argpartition, then sort only those k)."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _rows(rows: array) -> np.ndarray:
+    return np.frombuffer(rows, dtype=np.int32) if len(rows) else np.zeros(0, dtype=np.int32)
+
+
+class VectorIndex:
+    """
+    In-process cosine-similarity index over chunk vectors (see graph/chunker.py).
+
+    Vectors are stored L2-normalised as float32 rows, keyed by chunk id. remove() only
+    clears a row's alive flag and add() appends a row (re-adding an id replaces it),
+    so a script edit costs O(chunks of that script).
+
+    search() is exact by default: one matrix-vector product over every row and an
+    argpartition for the top k. After train(), it is approximate (IVF): rows are
+    bucketed by their nearest of nlist k-means centroids and a query only scores the
+    buckets of its nprobe nearest centroids. train() also reorders the rows so that
+    every bucket is a contiguous slice (scored without a gather); rows added later
+    are appended to a per-bucket list. With nlist ~ sqrt(n) and nprobe = 8, a
+    million chunks means scoring ~8k rows per query instead of 1M.
+
+    save() writes the live rows to a folder in bucket order; load(mmap=True) maps
+    them read-only. Rows added after loading go to an in-memory tail, so incremental
+    updates never copy the mapped file.
+    """
+    def __init__(self, dim: int, nprobe: int = 8):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.ids: List[Optional[str]] = []  # row -> chunk id (None once removed)
+        self.rows: Dict[str, int] = {}  # chunk id -> row
+        self.scripts: Dict[str, Set[str]] = {}  # script path -> chunk ids
+        self.centroids: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None  # Bucket b holds rows offsets[b]:offsets[b + 1] ...
+        self.lists: List[array] = []  # ... plus the rows (int32) added to it since train()
+        self._base = np.zeros((0, dim), dtype=np.float32)  # Possibly a read-only memmap
+        self._tail = np.zeros((0, dim), dtype=np.float32)  # Rows added in memory (with spare capacity)
+        self._alive = np.zeros(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.rows
+
+    @property
+    def size(self) -> int:
+        """Number of rows, removed ones included."""
+        return len(self.ids)
+
+    # --- updates -------------------------------------------------------- #
+    def add(self, ids: Sequence[str], vectors) -> None:
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        # Last occurrence wins, both within the batch and against existing rows
+        last = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        if len(last) != len(ids):
+            keep = sorted(last.values())
+            ids, vectors = [ids[i] for i in keep], vectors[keep]
+        self.remove([chunk_id for chunk_id in ids if chunk_id in self.rows])
+
+        start, count = self.size, len(ids)
+        tail_start = start - len(self._base)
+        self._tail = self._reserve(self._tail, tail_start + count)
+        self._tail[tail_start:tail_start + count] = vectors
+        self._alive = self._reserve(self._alive, start + count)
+        self._alive[start:start + count] = True
+        for row, chunk_id in enumerate(ids, start):
+            self.ids.append(chunk_id)
+            self.rows[chunk_id] = row
+            self.scripts.setdefault(chunk_id.split("::", 1)[0], set()).add(chunk_id)
+        if self.centroids is not None:
+            self._bucket(np.arange(start, start + count, dtype=np.int32), vectors)
+
+    @staticmethod
+    def _reserve(buffer: np.ndarray, length: int) -> np.ndarray:
+        """Grow buffer geometrically so that appends are amortised O(1)."""
+        if length <= len(buffer):
+            return buffer
+        grown = np.zeros((max(length, len(buffer) + len(buffer) // 2, 1024),) + buffer.shape[1:], dtype=buffer.dtype)
+        grown[:len(buffer)] = buffer
+        return grown
+
+    def remove(self, ids: Iterable[str]) -> None:
+        for chunk_id in ids:
+            row = self.rows.pop(chunk_id, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            self.ids[row] = None
+            script_ids = self.scripts.get(chunk_id.split("::", 1)[0])
+            if script_ids is not None:
+                script_ids.discard(chunk_id)
+                if not script_ids:
+                    del self.scripts[chunk_id.split("::", 1)[0]]
+
+    def update_script(self, script_path: str, ids: Sequence[str], vectors) -> None:
+        """Replace every chunk of a script (e.g. after graph/watcher.py reports an edit)."""
+        self.remove(list(self.scripts.get(script_path, ())))
+        if len(ids):
+            self.add(ids, vectors)
+
+    # --- IVF ------------------------------------------------------------ #
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        base_count = len(self._base)
+        if self.size <= base_count:
+            return self._base[rows]
+        in_base = rows < base_count
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        out[in_base] = self._base[rows[in_base]]
+        out[~in_base] = self._tail[rows[~in_base] - base_count]
+        return out
+
+    def _nearest_centroid(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), BLOCK_ROWS):
+            block = vectors[start:start + BLOCK_ROWS]
+            assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignment
+
+    def _bucket(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        assignment = self._nearest_centroid(vectors, self.centroids)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=len(self.centroids))
+        for bucket, bucket_rows in enumerate(np.split(rows[order], np.cumsum(counts)[:-1])):
+            if len(bucket_rows):
+                self.lists[bucket].frombytes(bucket_rows.astype(np.int32).tobytes())
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, sample_size: Optional[int] = None, seed: int = 0) -> None:
+        """
+        Run spherical k-means on a sample of the live rows (64 per centroid by default),
+        then regroup every live row by bucket. Enables IVF search.
+        """
+        live = np.flatnonzero(self._alive[:self.size]).astype(np.int32)
+        if not len(live):
+            return
+        nlist = min(nlist or max(1, int(np.sqrt(len(live)))), len(live))
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(live, min(len(live), max(sample_size or 64 * nlist, nlist)), replace=False))
+        data = self._gather(sample)
+
+        centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._nearest_centroid(data, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=nlist)
+            filled = counts > 0
+            sums = np.add.reduceat(data[order], np.concatenate(([0], np.cumsum(counts)[:-1]))[filled], axis=0)
+            centroids[filled] = sums
+            # Empty buckets restart from random sample rows
+            centroids[~filled] = data[rng.choice(len(data), int((~filled).sum()))]
+            centroids = _normalize(centroids)
+        self.centroids = centroids.astype(np.float32)
+
+        assignment = np.empty(len(live), dtype=np.int32)
+        for start in range(0, len(live), BLOCK_ROWS * 4):
+            rows = live[start:start + BLOCK_ROWS * 4]
+            assignment[start:start + len(rows)] = self._nearest_centroid(self._gather(rows), self.centroids)
+        order = live[np.argsort(assignment, kind="stable")]
+        self._reset(self._gather(order), [self.ids[row] for row in order], np.bincount(assignment, minlength=nlist))
+
+    def _reset(self, base: np.ndarray, ids: List[str], counts: Optional[np.ndarray]) -> None:
+        """Replace the storage by base (every row alive), grouped in buckets of counts rows if given."""
+        self._base = base
+        self._tail = np.zeros((0, self.dim), dtype=np.float32)
+        self._alive = np.ones(len(ids), dtype=bool)
+        self.ids = ids
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        self.scripts = {}
+        for chunk_id in ids:
+            self.scripts.setdefault(chunk_id.split("::", 1)[0], set()).add(chunk_id)
+        if counts is not None:
+            self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+            self.lists = [array("i") for _ in range(len(counts))]
+
+    # --- queries -------------------------------------------------------- #
+    def search(self, query, k: int = 10, nprobe: Optional[int] = None, exact: bool = False) -> List[Tuple[str, float]]:
+        """The k chunks most similar to query, as (chunk id, cosine similarity), best first."""
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+        if k <= 0 or not self.rows:
+            return []
+        if exact or self.centroids is None:
+            rows, scores = self._search_exact(query)
+        else:
+            rows, scores = self._search_ivf(query, nprobe or self.nprobe)
+        top = _top_k(scores, k)
+        return [(self.ids[rows[i]], float(scores[i])) for i in top if scores[i] > -np.inf]
+
+    def _search_exact(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        base_count = min(len(self._base), self.size)
+        scores = np.empty(self.size, dtype=np.float32)
+        scores[:base_count] = self._base[:base_count] @ query
+        scores[base_count:] = self._tail[:self.size - base_count] @ query
+        scores[~self._alive[:self.size]] = -np.inf
+        return np.arange(self.size), scores
+
+    def _search_ivf(self, query: np.ndarray, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        probe = _top_k(self.centroids @ query, nprobe)
+        row_parts, score_parts = [], []
+        for bucket in probe:
+            start, end = self.offsets[bucket], self.offsets[bucket + 1]
+            row_parts.append(np.arange(start, end))
+            score_parts.append(self._base[start:end] @ query)
+            if len(self.lists[bucket]):
+                added = _rows(self.lists[bucket])
+                row_parts.append(added)
+                score_parts.append(self._gather(added) @ query)
+        rows, scores = np.concatenate(row_parts), np.concatenate(score_parts)
+        scores[~self._alive[rows]] = -np.inf
+        return rows, scores
+
+    # --- persistence ---------------------------------------------------- #
+    def save(self, folder: str) -> None:
+        """
+        Write the live rows to folder, in bucket order when trained. Files are written
+        aside and renamed into place, so saving over the folder the index was mapped
+        from is safe.
+        """
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        counts = None
+        if self.centroids is None:
+            order = np.flatnonzero(self._alive[:self.size])
+        else:
+            buckets = []
+            for bucket, added in enumerate(self.lists):
+                rows = np.concatenate((np.arange(self.offsets[bucket], self.offsets[bucket + 1]), _rows(added)))
+                buckets.append(rows[self._alive[rows]])
+            counts = np.array([len(rows) for rows in buckets], dtype=np.int64)
+            order = np.concatenate(buckets)
+
+        vectors = np.lib.format.open_memmap(folder / "vectors.npy.tmp", mode="w+", dtype=np.float32, shape=(len(order), self.dim))
+        for start in range(0, len(order), BLOCK_ROWS * 4):
+            rows = order[start:start + BLOCK_ROWS * 4]
+            vectors[start:start + len(rows)] = self._gather(rows)
+        vectors.flush()
+        del vectors
+        os.replace(folder / "vectors.npy.tmp", folder / "vectors.npy")
+
+        if self.centroids is not None:
+            for name, data in (("centroids.npy", self.centroids), ("counts.npy", counts)):
+                with open(folder / f"{name}.tmp", "wb") as f:
+                    np.save(f, data)
+                os.replace(folder / f"{name}.tmp", folder / name)
+        else:
+            for name in ("centroids.npy", "counts.npy"):
+                (folder / name).unlink(missing_ok=True)
+
+        meta = {"format": INDEX_FORMAT, "dim": self.dim, "nprobe": self.nprobe, "ids": [self.ids[row] for row in order]}
+        with open(folder / "index.json.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(folder / "index.json.tmp", folder / "index.json")
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True) -> "VectorIndex":
+        folder = Path(folder)
+        with open(folder / "index.json", "r") as f:
+            meta = json.load(f)
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported vector index format in {folder}: {meta.get('format')}")
+        index = cls(meta["dim"], meta["nprobe"])
+        counts = None
+        if (folder / "centroids.npy").exists():
+            index.centroids = np.load(folder / "centroids.npy")
+            counts = np.load(folder / "counts.npy")
+        index._reset(np.load(folder / "vectors.npy", mmap_mode="r" if mmap else None), meta["ids"], counts)
+        return index
@@ -0,0 +1,491 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from graph.current_code import (
+    ClassNode,
+    FolderNode,
+    FolderScriptBuilder,
+    FunctionNode,
+    ImportAnalyzer,
+    MethodNode,
+    Node,
+    ScriptAnalyzer,
+    ScriptNode,
+    scripts_in,
+    summarize_file,
+    summarize_tree,
+)
+from graph.scanner import DEFAULT_EXCLUDES, is_ignored, scan_tree
+
+# (created, modified, deleted) relative script paths
+Changes = Tuple[Set[str], Set[str], Set[str]]
+
+
+# ------------------------------------------------- #
+#             GRAPH PATCHER
+# ------------------------------------------------- #
+def _callers(script_node: ScriptNode) -> Iterator[Node]:
+    """Functions and methods of a script."""
+    for child in script_node.children:
+        for caller in (child.children if isinstance(child, ClassNode) else [child]):
+            if isinstance(caller, (FunctionNode, MethodNode)):
+                yield caller
+
+
+class GraphPatcher:
+    """
+    Applies file-level changes to an already analyzed nodes graph.
+
+    Only the changed ScriptNodes are re-parsed. Their Class/Function/Method children
+    are rebuilt, and the import edges of the scripts that point at them are relinked.
+    Two reverse indexes keep that work proportional to the change:
+    - dependents: script path -> scripts holding edges into it
+    - importers:  dotted module name -> scripts importing it (resolved or not yet)
+    """
+    def __init__(self, global_path: str, root: FolderNode, nodes: Dict[str, Node], summaries: Dict[str, Dict],
+                 source_roots: Tuple[str, ...] = ("",), excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True):
+        self.global_path = Path(global_path)
+        self.excludes = excludes  # Same as FolderScriptBuilder, for refresh_folder
+        self.use_gitignore = use_gitignore
+        self.root = root
+        self.nodes = nodes
+        self.script_analyzer = ScriptAnalyzer(nodes, global_path, scan=False)
+        self.script_analyzer.summaries.update(summaries)
+        self.summaries = self.script_analyzer.summaries
+        self.import_analyzer = ImportAnalyzer(global_path, nodes, {}, summaries=self.summaries, source_roots=source_roots)
+        self.module_index = self.import_analyzer.module_index
+        self.dependents: Dict[str, Set[str]] = {}
+        self.importers: Dict[str, Set[str]] = {}
+
+        for path, node in nodes.items():
+            if isinstance(node, ScriptNode):
+                self._index_edges(node)
+                self._index_imports(path)
+
+    @classmethod
+    def from_analyzer(cls, root: FolderNode, script_analyzer: ScriptAnalyzer, excludes: Iterable[str] = DEFAULT_EXCLUDES,
+                      use_gitignore: bool = True) -> "GraphPatcher":
+        summaries = dict(script_analyzer.summaries)
+        for path, tree in script_analyzer.ast_cache.items():
+            summaries.setdefault(path, summarize_tree(tree))
+        return cls(str(script_analyzer.global_path), root, script_analyzer.nodes, summaries,
+                   excludes=excludes, use_gitignore=use_gitignore)
+
+    def apply(self, created: Set[str], modified: Set[str], deleted: Set[str], summaries: Optional[Dict[str, Dict]] = None) -> Set[str]:
+        """
+        Patch the graph for one batch of changes and return every script path touched.
+        Scripts found in summaries (parsed elsewhere, e.g. by a shard worker) are not parsed again.
+        """
+        summaries = summaries or {}
+        relink: Set[str] = set()
+
+        for path in deleted:
+            if isinstance(self.nodes.get(path), ScriptNode):
+                relink |= self.dependents.get(path, set())
+                relink |= self._importers_of(path)
+                self._remove_script(path)
+
+        for path in created | modified:
+            if path not in summaries and not (self.global_path / path).is_file():
+                continue
+            if not isinstance(self.nodes.get(path), ScriptNode):
+                self._add_script_node(path)
+                relink |= self._importers_of(path)
+            else:
+                relink |= self.dependents.get(path, set())
+            if self._reparse(path, summaries.get(path)):
+                relink.add(path)
+
+        relink = {path for path in relink if isinstance(self.nodes.get(path), ScriptNode)}
+        for path in relink:
+            self._relink(path)
+        return relink | deleted | created | modified
+
+    def refresh_folder(self, folder: str) -> Set[str]:
+        """
+        Re-analyze one folder (relative to global_path) against the disk: its new
+        scripts are added, vanished ones removed and the others re-parsed, then
+        their importers are relinked as in apply(). Only the folder is scanned, under
+        the excludes and .gitignore files of the folders above it (as in a full
+        build), and its known scripts come from the trie of IndexedNodes.
+        """
+        folder = folder.strip("/")
+        on_disk = set()
+        for parent, name, is_dir in scan_tree(str(self.global_path), self.excludes, self.use_gitignore, start=folder):
+            if not is_dir and name.endswith(".py"):
+                on_disk.add(f"{parent}/{name}" if parent else name)
+        known = {path for path, _ in scripts_in(self.nodes, self.global_path, self.global_path / folder)}
+        return self.apply(on_disk - known, on_disk & known, known - on_disk)
+
+    # --- nodes ---------------------------------------------------------- #
+    def _add_script_node(self, path: str):
+        parent = self.root
+        parts = path.split("/")
+        for i, part in enumerate(parts[:-1]):
+            folder_path = "/".join(parts[:i + 1])
+            if folder_path not in self.nodes:
+                folder_node = FolderNode(part, folder_path)
+                self.nodes[folder_path] = folder_node
+                parent.add_child(folder_node)
+            parent = self.nodes[folder_path]
+        script_node = ScriptNode(parts[-1], path)
+        self.nodes[path] = script_node
+        parent.add_child(script_node)
+        self.module_index.add(path)
+
+    def _remove_script(self, path: str):
+        script_node = self.nodes[path]
+        self._clear_children(script_node)
+        self._clear_edges(script_node)
+        self._unindex_imports(path)
+        self.summaries.pop(path, None)
+        self.dependents.pop(path, None)
+        self.module_index.remove(path)
+        del self.nodes[path]
+
+        parent = script_node.parent
+        parent.remove_child(script_node)
+        parent.__dict__.pop(script_node.name, None)
+        # Drop folders that vanished from disk together with their last script
+        while parent is not self.root and not parent.children and not (self.global_path / parent.path).is_dir():
+            grandparent = parent.parent
+            grandparent.remove_child(parent)
+            grandparent.__dict__.pop(parent.name, None)
+            del self.nodes[parent.path]
+            parent = grandparent
+
+    def _clear_children(self, script_node: ScriptNode):
+        # pop: a name defined twice in a script gives two children with one path
+        for child in script_node.children:
+            for grandchild in child.children:
+                self.nodes.pop(grandchild.path, None)
+            self.nodes.pop(child.path, None)
+        script_node.clear_children()
+
+    def _reparse(self, path: str, summary: Optional[Dict] = None) -> bool:
+        """Rebuild the children of a script; on a syntax error the previous version is kept."""
+        if summary is None:
+            try:
+                summary = summarize_file(str(self.global_path / path))
+            except (SyntaxError, ValueError, UnicodeDecodeError, OSError) as e:
+                print(f"Keeping previous graph for {path}: {e}")
+                return False
+
+        self._clear_children(self.nodes[path])
+        self._unindex_imports(path)
+        self.script_analyzer.analyze_script(path, summary)
+        self._index_imports(path)
+        return True
+
+    # --- edges ---------------------------------------------------------- #
+    def _relink(self, path: str):
+        script_node = self.nodes[path]
+        self._clear_edges(script_node)
+        if path in self.summaries:
+            self.import_analyzer.analyze(path)
+        self._index_edges(script_node)
+
+    def _clear_edges(self, script_node: ScriptNode):
+        for target in self._edge_targets(script_node):
+            self.dependents.get(target, set()).discard(script_node.path)
+        script_node.script_dependencies = []
+        script_node.class_dependencies = []
+        script_node.function_dependencies = []
+        script_node.aliases = {}
+
+    def _edge_targets(self, script_node: ScriptNode) -> Set[str]:
+        targets = {dep.path for dep in script_node.script_dependencies}
+        targets |= {dep.parent.path for dep in script_node.class_dependencies + script_node.function_dependencies}
+        for caller in _callers(script_node):
+            targets |= {dep.path.split("::")[0] for dep in caller.dependencies}
+        return targets
+
+    def _index_edges(self, script_node: ScriptNode):
+        # Call edges into other scripts (if a CallResolver filled them in): drop the stale ones
+        for caller in _callers(script_node):
+            caller.dependencies = [dep for dep in caller.dependencies if self.nodes.get(dep.path) is dep]
+        for target in self._edge_targets(script_node):
+            self.dependents.setdefault(target, set()).add(script_node.path)
+
+    def resolution_scope(self, touched: Iterable[str]) -> Set[str]:
+        """
+        Scripts whose calls must be resolved again after a patch: the touched scripts
+        and every script depending on them, transitively. A call resolves through
+        imports, base classes and attributes of other scripts (C().run() finds run in
+        a base class defined two imports away), so a change can move the target of a
+        call in any script that reaches it.
+        """
+        scope = set()
+        stack = list(touched)
+        while stack:
+            path = stack.pop()
+            if path not in scope:
+                scope.add(path)
+                stack.extend(self.dependents.get(path, ()))
+        return {path for path in scope if isinstance(self.nodes.get(path), ScriptNode)}
+
+    def _importers_of(self, path: str) -> Set[str]:
+        importers = set()
+        for name in self.module_index.names(path):
+            importers |= self.importers.get(name, set())
+        return importers
+
+    def _imported_modules(self, path: str) -> Set[str]:
+        modules = set()
+        for kind, module, level, names in self.summaries.get(path, {}).get("imports", []):
+            if kind == "import":
+                modules.update(name for name, _ in names)
+                continue
+            if level:
+                # Relative imports are indexed by the location they point at
+                module = self.module_index.absolute_location(module or "", level, path)
+                if module is None:
+                    continue
+                module = module.replace("/", ".")
+            if module:
+                modules.add(module)
+            modules.update(f"{module}.{name}" if module else name for name, _ in names)
+        return modules
+
+    def _index_imports(self, path: str):
+        for module in self._imported_modules(path):
+            self.importers.setdefault(module, set()).add(path)
+
+    def _unindex_imports(self, path: str):
+        for module in self._imported_modules(path):
+            self.importers.get(module, set()).discard(path)
+
+
+# ------------------------------------------------- #
+#             FILE WATCHERS
+# ------------------------------------------------- #
+class PollingWatcher:
+    """
+    Portable fallback: diffs (mtime_ns, size) snapshots of every script under
+    global_path, scanned with the same excludes and .gitignore files as the build.
+    """
+    def __init__(self, global_path: str, interval: float = 0.5, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True):
+        self.global_path = global_path
+        self.interval = interval
+        self.excludes = excludes
+        self.use_gitignore = use_gitignore
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for folder, name, is_dir in scan_tree(self.global_path, self.excludes, self.use_gitignore):
+            if not is_dir and name.endswith(".py"):
+                rel_path = f"{folder}/{name}" if folder else name
+                try:
+                    stat = os.stat(os.path.join(self.global_path, rel_path))
+                except FileNotFoundError:
+                    continue
+                snapshot[rel_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> Optional[Changes]:
+        time.sleep(self.interval)
+        current = self._scan()
+        created = set(current) - set(self.snapshot)
+        deleted = set(self.snapshot) - set(current)
+        modified = {path for path in current.keys() & self.snapshot.keys() if current[path] != self.snapshot[path]}
+        self.snapshot = current
+        if created or modified or deleted:
+            return created, modified, deleted
+        return None
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux inotify watcher: one watch per directory, events batched over a short debounce window.
+
+    Folders created later are watched, and scripts reported, only if the excludes
+    and .gitignore files of the initial scan let them in.
+    """
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0x800
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, global_path: str, debounce: float = 0.01, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True):
+        self.global_path = global_path
+        self.debounce = debounce
+        self.excludes = excludes
+        self.use_gitignore = use_gitignore
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}  # watch descriptor -> relative folder ("" for global_path)
+        self._watch_tree("")
+
+    def _watch_tree(self, rel_dir: str) -> Set[str]:
+        """Watch rel_dir and every folder below it; return the scripts found there."""
+        scripts = set()
+        if self._ignored(rel_dir, True):
+            return scripts
+        self._add_watch(rel_dir)
+        for folder, name, is_dir in scan_tree(self.global_path, self.excludes, self.use_gitignore, start=rel_dir):
+            rel_path = f"{folder}/{name}" if folder else name
+            if is_dir:
+                self._add_watch(rel_path)
+            elif name.endswith(".py"):
+                scripts.add(rel_path)
+        return scripts
+
+    def _ignored(self, rel_path: str, is_dir: bool) -> bool:
+        return is_ignored(self.global_path, rel_path, self.excludes, self.use_gitignore, is_dir)
+
+    def _add_watch(self, rel_dir: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(os.path.join(self.global_path, rel_dir)), self.WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = rel_dir
+
+    def _read_events(self) -> List[Tuple[str, int]]:
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                raise OverflowError("inotify queue overflow")
+            if mask & (self.IN_IGNORED | self.IN_DELETE_SELF):
+                self.watches.pop(wd, None)  # The folder is gone: the kernel dropped its watch
+                continue
+            folder = self.watches.get(wd)
+            if folder is not None:
+                events.append((os.path.join(folder, name) if folder else name, mask))
+        return events
+
+    def poll(self) -> Optional[Changes]:
+        ready, _, _ = select.select([self.fd], [], [], 1.0)
+        if not ready:
+            return None
+        events = self._read_events()
+        # Editors write files in several steps: collect until the burst is over
+        while select.select([self.fd], [], [], self.debounce)[0]:
+            events.extend(self._read_events())
+
+        created, modified, deleted = set(), set(), set()
+        ignored: Dict[str, bool] = {}
+        for path, mask in events:
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    created |= self._watch_tree(path)
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    deleted.add(path + "/")  # expanded against the graph by watch()
+                continue
+            if not path.endswith(".py"):
+                continue
+            if path not in ignored:
+                ignored[path] = self._ignored(path, False)
+            if ignored[path]:
+                continue
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                created.add(path)
+                deleted.discard(path)
+            elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                deleted.add(path)
+                created.discard(path)
+                modified.discard(path)
+            elif path not in created:
+                modified.add(path)
+        if created or modified or deleted:
+            return created, modified, deleted
+        return None
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(global_path: str, interval: float = 0.5, excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(global_path, excludes=excludes, use_gitignore=use_gitignore)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable, falling back to polling: {e}")
+    return PollingWatcher(global_path, interval, excludes, use_gitignore)
+
+
+def poll_changes(watcher, global_path: str, nodes: Dict[str, Node], interval: float = 0.5,
+                 excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True) -> Tuple[object, Optional[Changes]]:
+    """
+    Wait for the next batch of changes: (watcher, changes or None). The watcher is
+    replaced (with the same excludes and use_gitignore as make_watcher was given)
+    when it lost events, and removed folders are expanded to their scripts.
+    """
+    try:
+        changes = watcher.poll()
+    except OverflowError:
+        # Lost events: diff against a fresh scan instead
+        watcher.close()
+        watcher = make_watcher(global_path, interval, excludes, use_gitignore)
+        current = set(PollingWatcher(global_path, interval, excludes, use_gitignore).snapshot)
+        known = {p for p, n in nodes.items() if isinstance(n, ScriptNode)}
+        changes = current - known, current & known, known - current
+    if changes is None:
+        return watcher, None
+    created, modified, deleted = changes
+    # A removed folder stands for every script below it
+    for folder in [p for p in deleted if p.endswith("/")]:
+        deleted.discard(folder)
+        deleted |= {path for path, _ in scripts_in(nodes, Path(global_path), Path(global_path) / folder)}
+    return watcher, (created, modified, deleted)
+
+
+def watch(global_path: str, on_update: Optional[Callable[[Dict[str, Node], Set[str]], None]] = None, interval: float = 0.5,
+          excludes: Iterable[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True):
+    """Build the graph once, then keep it up to date until interrupted."""
+    root, nodes = FolderScriptBuilder(global_path, excludes, use_gitignore).build()
+    script_analyzer = ScriptAnalyzer(nodes=nodes, global_path=global_path)
+    script_analyzer.analyze()
+    ImportAnalyzer(global_path=global_path, nodes=nodes, ast_cache=script_analyzer.ast_cache,
+                   summaries=script_analyzer.summaries).analyze()
+    patcher = GraphPatcher.from_analyzer(root, script_analyzer, excludes, use_gitignore)
+
+    watcher = make_watcher(global_path, interval, excludes, use_gitignore)
+    try:
+        while True:
+            watcher, changes = poll_changes(watcher, global_path, nodes, interval, excludes, use_gitignore)
+            if changes is None:
+                continue
+            created, modified, deleted = changes
+            start = time.perf_counter()
+            touched = patcher.apply(created, modified, deleted)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"Updated {len(touched)} scripts in {elapsed_ms:.1f} ms")
+            if on_update is not None:
+                on_update(nodes, touched)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    watch(sys.argv[1] if len(sys.argv) > 1 else ".")
@@ -0,0 +1,259 @@
+import ast
+import json
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from graph.current_code import file_import_records
+from graph.scanner import DEFAULT_EXCLUDES, scan_tree
+
+
+class PythonImportDAG:
+    """
+    Builds a nested DAG graph of Python file imports starting from a given entry Python file.
+    The DAG includes dependencies between files traced via imports.
+
+    The nested form (build_import_dag) inlines the subtree of a file every time it is
+    imported. export_flat writes each reachable file once instead, as flat "nodes" and
+    "edges" arrays with integer ids, from one entry file or (all_scripts=True) from
+    every script of the repository.
+
+    Only top-level imports are traced by default, read with the header scanner of
+    graph.import_scanner (no full parse for most files). nested_imports=True also
+    follows imports inside functions, classes and if/try blocks, at the cost of
+    parsing every file.
+    """
+    def __init__(self, root_path: str, entry_file: str, nested_imports: bool = False):
+        """
+        Initialize the PythonImportDAG.
+
+        :param root_path: The root directory of the project (like "machine-learning-platform").
+        :param entry_file: The relative path of the entry Python file (relative to root_path).
+        :param nested_imports: Also trace imports that are not at the top level of a file.
+        """
+        self.root_path = Path(root_path).resolve()  # Absolute path of the project root
+        self.entry_file = (self.root_path / entry_file).resolve()  # Absolute path of the entry file
+        self.nested_imports = nested_imports
+        self.import_dag = {}  # The nested DAG graph
+        self._imports_cache: Dict[Path, List[Tuple[Path, List[str]]]] = {}  # file -> resolved imports
+
+    def build_import_dag(self) -> Dict[str, Any]:
+        """
+        Main function to build the import DAG starting from the entry file.
+        :return: The nested DAG graph as a dictionary.
+        """
+        self.import_dag = self._trace_file_imports(self.entry_file)
+        return self.import_dag
+
+    def _trace_file_imports(self, file_path: Path, recursion_stack=None) -> Dict[str, Any]:
+        """
+        Recursively trace the imports of a Python file and build a DAG.
+        This version:
+        - Uses a recursion stack (list) to detect circular imports;
+        - Allows a file to appear multiple times if imported along different branches.
+
+        A file already on the recursion path is not expanded again: its entry has a name
+        and imported objects but no imports, so the edge closing the cycle is kept.
+        """
+        if recursion_stack is None:
+            recursion_stack = []
+
+        # Detect circular import by checking if the file is already in the recursion path
+        if file_path in recursion_stack:
+            # Stop here to avoid infinite loops
+            return {"name": str(file_path.relative_to(self.root_path)), "imports": [], "imported_objects": []}
+
+        # Push current file onto the recursion stack
+        recursion_stack.append(file_path)
+
+        # Initialize the DAG for the current file
+        dag = {
+            "name": str(file_path.relative_to(self.root_path)),
+            "imports": [],
+            "imported_objects": []  # Add imported objects for the current file
+        }
+
+        # Recursively process each resolved import
+        for resolved_path, objects in self._resolved_imports(file_path):
+            dag_entry = self._trace_file_imports(resolved_path, recursion_stack)
+            dag_entry["imported_objects"] = objects
+            if dag_entry and all(child.get("name") != dag_entry.get("name") for child in dag["imports"]):
+                dag["imports"].append(dag_entry)
+
+        # Pop from the stack after processing
+        recursion_stack.pop()
+        return dag
+
+    def _resolved_imports(self, file_path: Path) -> List[Tuple[Path, List[str]]]:
+        """
+        In-project imports of a file as (resolved path, imported objects), parsed once per file.
+        """
+        if file_path not in self._imports_cache:
+            resolved = []
+            for import_path in self._get_imports_from_file(file_path):
+                # If the import is a dictionary, extract module and objects
+                if isinstance(import_path, dict):
+                    resolved_path = self._resolve_import_to_path(import_path["module"])
+                    objects = import_path["objects"]
+                else:
+                    resolved_path = self._resolve_import_to_path(import_path)
+                    objects = []  # No specific objects if it's a simple module import
+                if resolved_path:
+                    resolved.append((resolved_path, objects))
+            self._imports_cache[file_path] = resolved
+        return self._imports_cache[file_path]
+
+    def _get_imports_from_file(self, file_path: Path) -> List[str]:
+        """
+        Extract the import statements of a Python file (top-level only unless nested_imports).
+
+        :param file_path: The absolute path of the Python file to parse.
+        :return: A list of imported module/package names.
+        """
+        imports = []
+        try:
+            if not self.nested_imports:
+                for kind, module, _, names in file_import_records(str(file_path)):
+                    if kind == "import":
+                        imports.extend(name for name, _ in names)
+                    elif module:
+                        imports.append({"module": module, "objects": [name for name, _ in names]})
+                return imports
+
+            with open(file_path, "r") as file:
+                tree = ast.parse(file.read(), filename=str(file_path))
+
+            # Extract import statements
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    for alias in node.names:
+                        imports.append(alias.name)
+                elif isinstance(node, ast.ImportFrom):
+                    if node.module:
+                        imported_objects = [alias.name for alias in node.names]
+                        imports.append({"module": node.module, "objects": imported_objects})
+
+        except Exception as e:
+            print(f"Failed to parse {file_path}: {e}")
+
+        return imports
+
+    def _resolve_import_to_path(self, import_path: str) -> Path:
+        """
+        Resolve an import path to a file in the project directory.
+
+        :param import_path: The import path as a string (e.g., "product_recommender.api").
+        :return: The absolute path of the imported file if found, None otherwise.
+        """
+        # Convert the import path to a file path (e.g., "product_recommender.api" -> "product_recommender/api.py")
+        potential_path = self.root_path / import_path.replace(".", "/") / "__init__.py"  # Handle packages
+        if potential_path.exists():
+            return potential_path
+
+        potential_path = self.root_path / f"{import_path.replace('.', '/')}.py"  # Handle modules
+        if potential_path.exists():
+            return potential_path
+
+        # If not found, return None (likely a third-party library or built-in module)
+        return None
+
+    def build_flat_graph(self, entry_file: Optional[str] = None, all_scripts: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Build the deduplicated import graph reachable from an entry file (default: self.entry_file).
+
+        Every file is visited once (breadth-first), whatever the number of importers.
+        all_scripts=True starts from every script of the repository instead (as found
+        by scan_tree, so excluded and .gitignore'd folders are left out), which gives the
+        import graph of the whole repository.
+        :return: {"nodes": [{"id", "name"}], "edges": [{"from", "to", "imported_objects"}]}
+        """
+        graph = {"nodes": [], "edges": []}
+        for kind, item in self._iter_flat_graph(entry_file, all_scripts):
+            graph[kind].append(item)
+        return graph
+
+    def _all_scripts(self) -> List[Path]:
+        return [self.root_path / folder / name
+                for folder, name, is_dir in scan_tree(str(self.root_path), DEFAULT_EXCLUDES)
+                if not is_dir and name.endswith(".py")]
+
+    def _iter_flat_graph(self, entry_file: Optional[str] = None, all_scripts: bool = False):
+        if all_scripts:
+            starts = self._all_scripts()
+        else:
+            starts = [(self.root_path / entry_file).resolve() if entry_file else self.entry_file]
+        ids: Dict[Path, int] = {}
+        for start in starts:
+            ids[start] = len(ids)
+            yield "nodes", {"id": ids[start], "name": str(start.relative_to(self.root_path))}
+        queue = deque(starts)
+
+        while queue:
+            file_path = queue.popleft()
+            seen_targets = set()
+            for resolved_path, objects in self._resolved_imports(file_path):
+                if resolved_path not in ids:
+                    ids[resolved_path] = len(ids)
+                    queue.append(resolved_path)
+                    yield "nodes", {"id": ids[resolved_path], "name": str(resolved_path.relative_to(self.root_path))}
+                # Same rule as the nested DAG: the first import of a file wins
+                if resolved_path in seen_targets:
+                    continue
+                seen_targets.add(resolved_path)
+                yield "edges", {"from": ids[file_path], "to": ids[resolved_path], "imported_objects": objects}
+
+    def export_flat(self, output_file: str, entry_file: Optional[str] = None, all_scripts: bool = False) -> None:
+        """
+        Stream the flat graph to a JSON file without materializing it in memory
+        (see build_flat_graph for entry_file and all_scripts).
+
+        Nodes are written as they are discovered; edges are buffered as small
+        (from, to, imported_objects) tuples and written after the nodes array.
+        """
+        edges = []
+        with open(output_file, "w") as f:
+            f.write('{"nodes": [')
+            first = True
+            for kind, item in self._iter_flat_graph(entry_file, all_scripts):
+                if kind == "edges":
+                    edges.append((item["from"], item["to"], item["imported_objects"]))
+                    continue
+                f.write(("" if first else ",") + "\n" + json.dumps(item, separators=(",", ":")))
+                first = False
+            f.write('\n], "edges": [')
+            for i, (source, target, objects) in enumerate(edges):
+                item = {"from": source, "to": target, "imported_objects": objects}
+                f.write(("," if i else "") + "\n" + json.dumps(item, separators=(",", ":")))
+            f.write("\n]}\n")
+        print(f"Flat import graph exported to {output_file}")
+
+    def visualize_import_dag(self, dag=None, indent=0) -> None:
+        """
+        Pretty print the import DAG, including imported objects.
+
+        :param dag: The DAG to print (defaults to the main import_dag).
+        :param indent: The current indentation level for pretty printing.
+        """
+        if dag is None:
+            dag = self.import_dag
+
+        # Print the current file name
+        print("  " * indent + f"- {dag.get('name', '<unknown>')}")
+
+        # Print the imported objects for this file, if any
+        for obj in dag.get("imported_objects", []):
+            print("  " * (indent + 1) + f"  * {obj}")
+
+        # Recursively print child imports
+        for child in dag.get("imports", []):
+            if child:  # Skip empty dictionaries
+                self.visualize_import_dag(child, indent + 1)
+
+
+if __name__ == "__main__":
+    # Example: root folder "machine-learning-platform", entry file "product_recommender/api.py"
+    root = "/home/david/Documents/glovo/machine-learning-platform"
+    entry = "widget_framework/src/widget_builder.py"
+
+    import_dag_builder = PythonImportDAG(root, entry)
+    import_dag_builder.export_flat("import_dag.json")
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import math
+import os
+import shutil
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+Position = Tuple[float, float]
+
+
+def graph_version(graph: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Content hash of a {"nodes", "edges"} graph: layouts and tiles are cached under it."""
+    digest = hashlib.sha1(json.dumps(graph, sort_keys=True, separators=(",", ":")).encode())
+    return digest.hexdigest()[:16]
+
+
+def _children(graph: Dict[str, List[Dict[str, Any]]]) -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {node["id"]: [] for node in graph["nodes"]}
+    for edge in graph["edges"]:
+        children[edge["from"]].append(edge["to"])
+    return children
+
+
+# ------------------------------------------------- #
+#             LAYOUTS
+# ------------------------------------------------- #
+def radial_tree_layout(graph: Dict[str, List[Dict[str, Any]]], level_distance: float = 100.0) -> Dict[int, Position]:
+    """
+    Radial layout of a tree (FileTreeGraph.get_graph()): depth sets the radius, and
+    every subtree gets an angle proportional to its number of leaves, so crowded
+    folders get the room they need. Runs without recursion, in linear time.
+    """
+    children = _children(graph)
+    has_parent = {edge["to"] for edge in graph["edges"]}
+    roots = [node["id"] for node in graph["nodes"] if node["id"] not in has_parent]
+
+    order: List[int] = []  # Parents before children
+    stack = list(reversed(roots))
+    while stack:
+        node_id = stack.pop()
+        order.append(node_id)
+        stack.extend(reversed(children[node_id]))
+    leaves = {}
+    for node_id in reversed(order):
+        leaves[node_id] = sum(leaves[child] for child in children[node_id]) or 1
+
+    positions: Dict[int, Position] = {}
+    total = sum(leaves[root] for root in roots) or 1
+    stack = []
+    start = 0.0
+    for root in roots:
+        span = 2 * math.pi * leaves[root] / total
+        stack.append((root, start, span, 0))
+        start += span
+    while stack:
+        node_id, start, span, depth = stack.pop()
+        angle = start + span / 2
+        radius = depth * level_distance
+        positions[node_id] = (radius * math.cos(angle), radius * math.sin(angle))
+        for child in children[node_id]:
+            child_span = span * leaves[child] / leaves[node_id]
+            stack.append((child, start, child_span, depth + 1))
+            start += child_span
+    return positions
+
+
+def _acyclic_edges(nodes: List[int], children: Dict[int, List[int]]) -> Dict[int, List[int]]:
+    """children without the back edges of an iterative DFS (import cycles)."""
+    state = {node_id: 0 for node_id in nodes}  # 0 new, 1 on the stack, 2 done
+    kept: Dict[int, List[int]] = {node_id: [] for node_id in nodes}
+    for start in nodes:
+        if state[start]:
+            continue
+        state[start] = 1
+        stack = [(start, iter(children[start]))]
+        while stack:
+            node_id, targets = stack[-1]
+            for target in targets:
+                if state[target] == 1:
+                    continue  # Back edge: closes a cycle
+                kept[node_id].append(target)
+                if state[target] == 0:
+                    state[target] = 1
+                    stack.append((target, iter(children[target])))
+                    break
+            else:
+                state[node_id] = 2
+                stack.pop()
+    return kept
+
+
+def layered_layout(graph: Dict[str, List[Dict[str, Any]]], layer_distance: float = 120.0, node_distance: float = 40.0,
+                   sweeps: int = 4) -> Dict[int, Position]:
+    """
+    Layered (Sugiyama-style) layout of an import graph (PythonImportDAG.build_flat_graph()).
+
+    Cycles are broken by dropping DFS back edges, every file goes one layer below its
+    deepest importer (longest path), and the order within layers is improved by
+    barycenter sweeps, down then up, to reduce edge crossings.
+    """
+    nodes = [node["id"] for node in graph["nodes"]]
+    children = _acyclic_edges(nodes, _children(graph))
+    parents: Dict[int, List[int]] = {node_id: [] for node_id in nodes}
+    for node_id, targets in children.items():
+        for target in targets:
+            parents[target].append(node_id)
+
+    layer = {node_id: 0 for node_id in nodes}
+    pending = {node_id: len(parents[node_id]) for node_id in nodes}
+    queue = deque(node_id for node_id in nodes if not pending[node_id])
+    while queue:
+        node_id = queue.popleft()
+        for target in children[node_id]:
+            layer[target] = max(layer[target], layer[node_id] + 1)
+            pending[target] -= 1
+            if not pending[target]:
+                queue.append(target)
+
+    layers: List[List[int]] = [[] for _ in range(max(layer.values(), default=-1) + 1)]
+    for node_id in nodes:
+        layers[layer[node_id]].append(node_id)
+    rank = {node_id: i for members in layers for i, node_id in enumerate(members)}
+
+    def sweep(members: List[int], neighbors: Dict[int, List[int]]):
+        def barycenter(node_id: int) -> float:
+            ranks = [rank[other] for other in neighbors[node_id]]
+            return sum(ranks) / len(ranks) if ranks else rank[node_id]
+        members.sort(key=barycenter)
+        for i, node_id in enumerate(members):
+            rank[node_id] = i
+
+    for _ in range(sweeps):
+        for members in layers[1:]:
+            sweep(members, parents)
+        for members in reversed(layers[:-1]):
+            sweep(members, children)
+
+    positions: Dict[int, Position] = {}
+    for depth, members in enumerate(layers):
+        offset = (len(members) - 1) / 2
+        for i, node_id in enumerate(members):
+            positions[node_id] = ((i - offset) * node_distance, depth * layer_distance)
+    return positions
+
+
+def tree_paths(graph: Dict[str, List[Dict[str, Any]]]) -> Dict[int, str]:
+    """Path of every FileTreeGraph node below the root ("" for the root), from the labels."""
+    parent = {edge["to"]: edge["from"] for edge in graph["edges"]}
+    labels = {node["id"]: node["label"] for node in graph["nodes"]}
+    paths: Dict[int, str] = {}
+    for node in graph["nodes"]:  # FileTreeGraph lists parents before their children
+        node_id = node["id"]
+        if node_id not in parent:
+            paths[node_id] = ""
+        else:
+            parent_path = paths[parent[node_id]]
+            paths[node_id] = f"{parent_path}/{labels[node_id]}" if parent_path else labels[node_id]
+    return paths
+
+
+# ------------------------------------------------- #
+#             LEVEL OF DETAIL TILES
+# ------------------------------------------------- #
+class LayoutTiles:
+    """
+    Splits a laid out graph into square tiles over zoom levels 0..max_zoom.
+
+    Zoom z cuts the layout bounds into 2^z x 2^z tiles. Below max_zoom, nodes deeper
+    than z + 1 path components are collapsed into the folder that holds them at that
+    depth: the folder's own node if the graph has one (file tree), or an aggregate
+    node at the centroid of its members (import graph), with "count" members. Edges
+    are mapped onto the visible nodes, merged with a "weight", and stored in the tiles
+    of both ends, so a client fetches only the tiles on screen at the current zoom.
+
+    write() stores the tiles under <folder>/<graph version>/ and skips the work when
+    that version was already written.
+    """
+    def __init__(self, graph: Dict[str, List[Dict[str, Any]]], positions: Dict[int, Position], paths: Dict[int, str],
+                 max_zoom: int = 4):
+        self.graph = graph
+        self.positions = positions
+        self.paths = paths
+        self.max_zoom = max_zoom
+        self.version = graph_version(graph)
+        xs = [x for x, _ in positions.values()] or [0.0]
+        ys = [y for _, y in positions.values()] or [0.0]
+        self.side = max(max(xs) - min(xs), max(ys) - min(ys), 1.0) * 1.0001  # Points on the far edge stay inside
+        self.origin = (min(xs), min(ys))
+
+    def _tile(self, zoom: int, position: Position) -> Tuple[int, int]:
+        size = self.side / (1 << zoom)
+        return int((position[0] - self.origin[0]) // size), int((position[1] - self.origin[1]) // size)
+
+    def _visible(self, zoom: int) -> Tuple[Dict[int, Any], Dict[Any, Dict[str, Any]]]:
+        """(node id -> visible id, visible id -> drawn node) at a zoom level."""
+        depth = zoom + 1 if zoom < self.max_zoom else math.inf
+        path_ids = {path: node_id for node_id, path in self.paths.items()}
+        nodes_by_id = {node["id"]: node for node in self.graph["nodes"]}
+        visible_of: Dict[int, Any] = {}
+        drawn: Dict[Any, Dict[str, Any]] = {}
+        members: Dict[Any, List[Position]] = {}
+        for node in self.graph["nodes"]:
+            node_id = node["id"]
+            parts = self.paths[node_id].split("/") if self.paths[node_id] else []
+            if len(parts) <= depth:
+                visible_of[node_id] = node_id
+                drawn.setdefault(node_id, {**node, "path": self.paths[node_id], "count": 1})
+                continue
+            folder = "/".join(parts[:int(depth)])
+            visible = path_ids.get(folder, f"folder:{folder}")
+            visible_of[node_id] = visible
+            if visible not in drawn:
+                if isinstance(visible, str):
+                    drawn[visible] = {"id": visible, "label": parts[int(depth) - 1], "type": "aggregate", "path": folder, "count": 1}
+                else:
+                    drawn[visible] = {**nodes_by_id[visible], "path": folder, "count": 1}
+            drawn[visible]["count"] += 1
+            members.setdefault(visible, []).append(self.positions[node_id])
+
+        for visible, node in drawn.items():
+            if isinstance(visible, str):
+                points = members[visible]
+                node["x"] = sum(x for x, _ in points) / len(points)
+                node["y"] = sum(y for _, y in points) / len(points)
+                node["count"] -= 1  # Synthetic aggregates only count their members
+            else:
+                node["x"], node["y"] = self.positions[visible]
+        return visible_of, drawn
+
+    def tiles(self, zoom: int) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        visible_of, drawn = self._visible(zoom)
+        tiles: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+        def tile(key):
+            if key not in tiles:
+                tiles[key] = {"z": zoom, "x": key[0], "y": key[1], "nodes": [], "edges": []}
+            return tiles[key]
+
+        for node in drawn.values():
+            tile(self._tile(zoom, (node["x"], node["y"])))["nodes"].append(node)
+        weights: Dict[Tuple[Any, Any], int] = {}
+        for edge in self.graph["edges"]:
+            source, target = visible_of[edge["from"]], visible_of[edge["to"]]
+            if source != target:
+                weights[(source, target)] = weights.get((source, target), 0) + 1
+        for (source, target), weight in weights.items():
+            edge = {"from": source, "to": target, "weight": weight}
+            source_tile = self._tile(zoom, (drawn[source]["x"], drawn[source]["y"]))
+            target_tile = self._tile(zoom, (drawn[target]["x"], drawn[target]["y"]))
+            tile(source_tile)["edges"].append(edge)
+            if target_tile != source_tile:
+                tile(target_tile)["edges"].append(edge)
+        return tiles
+
+    def write(self, folder: str) -> str:
+        """Write <folder>/<version>/index.json and <z>/<x>/<y>.json tiles; return the version folder."""
+        target = os.path.join(folder, self.version)
+        if os.path.exists(os.path.join(target, "index.json")):
+            return target  # Same graph: tiles already there
+        tmp_target = target + ".tmp"
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        index = {"version": self.version, "origin": self.origin, "side": self.side, "max_zoom": self.max_zoom, "tiles": {}}
+        for zoom in range(self.max_zoom + 1):
+            tiles = self.tiles(zoom)
+            index["tiles"][zoom] = sorted(tiles)
+            for (x, y), content in tiles.items():
+                os.makedirs(os.path.join(tmp_target, str(zoom), str(x)), exist_ok=True)
+                with open(os.path.join(tmp_target, str(zoom), str(x), f"{y}.json"), "w") as f:
+                    json.dump(content, f, separators=(",", ":"))
+        os.makedirs(tmp_target, exist_ok=True)
+        with open(os.path.join(tmp_target, "index.json"), "w") as f:
+            json.dump(index, f)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_target, target)
+        return target
+
+
+def export_tiles(graph: Dict[str, List[Dict[str, Any]]], kind: str, folder: str, max_zoom: int = 4,
+                 paths: Optional[Dict[int, str]] = None) -> str:
+    """
+    Lay out and tile a FileTreeGraph graph (kind "tree", radial layout) or a flat import
+    graph from PythonImportDAG (kind "dag", layered layout); returns the tile folder.
+    """
+    if kind == "tree":
+        positions = radial_tree_layout(graph)
+        paths = paths or tree_paths(graph)
+    elif kind == "dag":
+        positions = layered_layout(graph)
+        paths = paths or {node["id"]: node["name"] for node in graph["nodes"]}
+    else:
+        raise ValueError(f"Unknown layout kind {kind!r}")
+    return LayoutTiles(graph, positions, paths, max_zoom).write(folder)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from file_tree import FileTreeGraph
+
+    # Example usage: tiles for the frontend, served from frontend/public/tiles/tree/<version>/
+    file_tree = FileTreeGraph(sys.argv[1] if len(sys.argv) > 1 else ".")
+    file_tree.build_graph()
+    print(export_tiles(file_tree.get_graph(), "tree", "frontend/public/tiles/tree"))
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from graph.current_code import FolderScriptBuilder, ImportAnalyzer, MethodNode, ScriptAnalyzer
+from graph.graph_store import EDGE_ATTRIBUTES, GraphStore
+
+DUMMY_FOLDER = Path(__file__).resolve().parent.parent / "dummy-folder"
+
+
+def _content(store):
+    """The store by path: ids differ with the build order, paths do not."""
+    path = lambda node_id: store.strings[store.paths[node_id]]
+    return {
+        path(node_id): (
+            store.kinds[node_id], store.strings[store.names[node_id]], store.static[node_id],
+            [path(child) for child in store.children(node_id)],
+            [[path(target) for target in store.dependencies(kind, node_id)] for kind in range(len(EDGE_ATTRIBUTES))],
+            store.aliases(node_id),
+        )
+        for node_id in range(len(store))
+    }
+
+
+def _from_nodes(global_path):
+    root, nodes = FolderScriptBuilder(global_path).build()
+    script_analyzer = ScriptAnalyzer(nodes, global_path)
+    script_analyzer.analyze()
+    ImportAnalyzer(global_path, nodes, script_analyzer.ast_cache, summaries=script_analyzer.summaries).analyze()
+    return GraphStore.from_nodes(root, nodes)
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_from_tree_matches_from_nodes(tmp_path):
+    _write(tmp_path / "pkg" / "__init__.py")
+    _write(tmp_path / "pkg" / "base.py", "class Base:\n    def run(self):\n        pass\n\n\ndef helper():\n    pass\n")
+    _write(tmp_path / "pkg" / "mod.py", "from pkg.base import Base, helper as h\nfrom . import base\nimport pkg.base\nimport pkg.base as b2\n\n\nclass Mod(Base):\n    @staticmethod\n    def go():\n        h()\n")
+    _write(tmp_path / "app.py", "from pkg import mod, missing\nfrom pkg.mod import Mod\nimport os\n")
+    for global_path in (str(tmp_path), str(DUMMY_FOLDER)):
+        assert _content(GraphStore.from_tree(global_path)) == _content(_from_nodes(global_path))
+
+
+def test_child_by_name():
+    store = GraphStore.from_tree(str(DUMMY_FOLDER))
+    for node_id in range(len(store)):
+        for child in store.children(node_id):
+            assert store.child_by_name(node_id, store.strings[store.names[child]]) == child
+    assert store.child_by_name(0, "no_such_child") is None
+    assert store.root.folder1.folder1_1.path == "folder1/folder1_1"
+
+
+def test_add_dep_keeps_dependencies_unique():
+    caller, target = MethodNode("caller", "a.py::A::caller"), MethodNode("target", "b.py::B::target")
+    caller.add_dep(target)
+    caller.add_dep(target)
+    assert caller.dependencies == [target]
+    caller.dependencies = []
+    caller.add_dep(target)
+    assert caller.dependencies == [target]
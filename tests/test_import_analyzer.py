@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+
+from graph.current_code import FolderScriptBuilder, ImportAnalyzer, ScriptAnalyzer, ScriptNode
+
+DUMMY_FOLDER = str(Path(__file__).resolve().parent.parent / "dummy-folder")
+
+
+def _edges(nodes):
+    return {
+        path: ([dep.path for dep in node.script_dependencies], [dep.path for dep in node.class_dependencies],
+               [dep.path for dep in node.function_dependencies], node.aliases)
+        for path, node in nodes.items() if isinstance(node, ScriptNode)
+    }
+
+
+def _analyze(workers):
+    _, nodes = FolderScriptBuilder(DUMMY_FOLDER).build()
+    script_analyzer = ScriptAnalyzer(nodes, DUMMY_FOLDER, workers=workers)
+    script_analyzer.analyze()
+    ImportAnalyzer(DUMMY_FOLDER, nodes, script_analyzer.ast_cache, summaries=script_analyzer.summaries).analyze()
+    return nodes
+
+
+def test_parallel_summaries_link_like_serial_asts():
+    serial = _edges(_analyze(workers=0))
+    assert any(edges != ([], [], [], {}) for edges in serial.values())
+    assert _edges(_analyze(workers=2)) == serial
+
+
+def test_no_import_source_raises():
+    _, nodes = FolderScriptBuilder(DUMMY_FOLDER).build()
+    script_analyzer = ScriptAnalyzer(nodes, DUMMY_FOLDER, workers=2)  # Keeps summaries, no ASTs
+    script_analyzer.analyze()
+    with pytest.raises(ValueError):
+        ImportAnalyzer(DUMMY_FOLDER, nodes, script_analyzer.ast_cache).analyze()
@@ -0,0 +1,38 @@
+import json
+
+from import_dag import PythonImportDAG
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _repo(tmp_path):
+    _write(tmp_path / "pkg" / "__init__.py")
+    _write(tmp_path / "pkg" / "a.py", "from pkg.b import B\n\n\nclass A:\n    pass\n")
+    _write(tmp_path / "pkg" / "b.py", "from pkg.a import A\n\n\nclass B:\n    pass\n")
+    _write(tmp_path / "tools" / "cli.py", "from pkg.a import A\n")  # Not reachable from pkg/a.py
+    _write(tmp_path / ".venv" / "lib.py", "import pkg.a\n")  # Excluded from the scan
+
+
+def test_cyclic_import_keeps_imported_objects(tmp_path):
+    _repo(tmp_path)
+    dag = PythonImportDAG(str(tmp_path), "pkg/a.py").build_import_dag()
+    [b] = dag["imports"]
+    assert (b["name"], b["imported_objects"]) == ("pkg/b.py", ["B"])
+    assert b["imports"] == [{"name": "pkg/a.py", "imports": [], "imported_objects": ["A"]}]
+
+
+def test_flat_graph_of_all_scripts(tmp_path):
+    _repo(tmp_path)
+    builder = PythonImportDAG(str(tmp_path), "pkg/a.py")
+    graph = builder.build_flat_graph(all_scripts=True)
+    names = {node["id"]: node["name"] for node in graph["nodes"]}
+    assert sorted(names.values()) == ["pkg/__init__.py", "pkg/a.py", "pkg/b.py", "tools/cli.py"]
+    edges = {(names[edge["from"]], names[edge["to"]], tuple(edge["imported_objects"])) for edge in graph["edges"]}
+    assert edges == {("pkg/a.py", "pkg/b.py", ("B",)), ("pkg/b.py", "pkg/a.py", ("A",)), ("tools/cli.py", "pkg/a.py", ("A",))}
+
+    builder.export_flat(str(tmp_path / "graph.json"), all_scripts=True)
+    assert json.loads((tmp_path / "graph.json").read_text()) == graph
+    assert len(builder.build_flat_graph()["nodes"]) == 2  # From the entry file only
@@ -0,0 +1,47 @@
+import ast
+from pathlib import Path
+
+from graph.current_code import import_records
+from graph.import_scanner import scan_imports
+
+REPO = Path(__file__).resolve().parent.parent
+
+SOURCES = [
+    "",
+    "import os\n",
+    "\ufeff# comment\nimport os, sys as system\n",
+    '"""Docstring."""\n\nfrom __future__ import annotations\nimport a.b.c as d\n',
+    "from . import x\nfrom ..pkg.mod import (\n    A,  # first\n    B as C,\n)\nfrom .mod import *\n",
+    "from pkg . mod import name\nimport a . b\n",
+    "import os\n\n\ndef main():\n    import json\n",
+    "import os\nx = 1\nimport sys\n",
+    "import os; import sys\n",
+    "if True:\n    import os\nimport sys\n",
+    "import os\nclass A:\n    pass\nfrom b import c\n",
+    "import os \\\n    , sys\n",
+    "s = '''\nimport fake\n'''\nimport real\n",
+    "r'''raw docstring'''\nimport os\n",
+    "from pkg import (a,\n    b)\n\nprint('import x')\n",
+]
+
+
+def _check(source):
+    records = scan_imports(source)
+    if records is not None:  # None means "parse the file instead"
+        assert records == import_records(ast.parse(source.encode()))  # As bytes, a BOM is allowed
+
+
+def test_scanner_matches_ast():
+    for source in SOURCES:
+        _check(source)
+
+
+def test_scanner_matches_ast_on_the_repo():
+    scanned = 0
+    for path in sorted(REPO.rglob("*.py")):
+        if "node_modules" in path.parts or ".git" in path.parts:
+            continue
+        source = path.read_text()
+        _check(source)
+        scanned += scan_imports(source) is not None
+    assert scanned
@@ -0,0 +1,45 @@
+from graph.current_code import FolderScriptBuilder, ImportAnalyzer, ScriptAnalyzer
+from graph.watcher import GraphPatcher
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _analyze(global_path):
+    root, nodes = FolderScriptBuilder(str(global_path)).build()
+    script_analyzer = ScriptAnalyzer(nodes, str(global_path))
+    script_analyzer.analyze()
+    ImportAnalyzer(str(global_path), nodes, script_analyzer.ast_cache, summaries=script_analyzer.summaries).analyze()
+    return root, nodes, script_analyzer
+
+
+def _subtree(nodes, folder):
+    return {
+        path: (type(node).__name__, sorted(dep.path for dep in getattr(node, "script_dependencies", [])),
+               sorted(dep.path for dep in getattr(node, "class_dependencies", [])))
+        for path, node in nodes.subtree(folder)
+    }
+
+
+def test_refreshed_subtree_matches_full_build(tmp_path):
+    _write(tmp_path / ".gitignore", "generated/\n*_skip.py\n")
+    _write(tmp_path / "pkg" / ".gitignore", "local.py\n")
+    _write(tmp_path / "pkg" / "base.py", "class Base:\n    def run(self):\n        pass\n")
+    _write(tmp_path / "pkg" / "sub" / "mod.py", "from pkg.base import Base\n")
+    root, nodes, script_analyzer = _analyze(tmp_path)
+    patcher = GraphPatcher.from_analyzer(root, script_analyzer)
+
+    # Ignored by the .gitignore files above pkg/sub, which the scoped scan must still apply
+    _write(tmp_path / "pkg" / "sub" / "generated" / "out.py", "import os\n")
+    _write(tmp_path / "pkg" / "sub" / "tmp_skip.py", "import os\n")
+    _write(tmp_path / "pkg" / "sub" / "local.py", "import os\n")
+    _write(tmp_path / "pkg" / "sub" / "build" / "steps.py", "from pkg.base import Base\n")
+    _write(tmp_path / "pkg" / "sub" / "new.py", "from pkg.base import Base\n\nclass New(Base):\n    pass\n")
+    (tmp_path / "pkg" / "sub" / "mod.py").unlink()
+    patcher.refresh_folder("pkg/sub")
+
+    _, full_nodes, _ = _analyze(tmp_path)
+    assert _subtree(nodes, "pkg/sub") == _subtree(full_nodes, "pkg/sub")
+    assert "pkg/sub/new.py" in nodes and "pkg/sub/local.py" not in nodes and "pkg/sub/tmp_skip.py" not in nodes
@@ -0,0 +1,43 @@
+from graph.graph_store import EDGE_ATTRIBUTES
+from graph.shards import Shard, ShardedGraph
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _graph(nodes):
+    """The graph by path; edge order depends on the patch order, so edges are sorted."""
+    return {
+        path: (
+            type(node).__name__, sorted(child.path for child in node.children),
+            [sorted(target.path for target in getattr(node, attribute, [])) for attribute in EDGE_ATTRIBUTES],
+        )
+        for path, node in nodes.items() if path != "root"
+    }
+
+
+def _shards():
+    return [Shard("api", "services/api", ("src",)), Shard("billing", "libs/billing")]
+
+
+def test_refresh_matches_build(tmp_path):
+    billing = tmp_path / "libs" / "billing" / "billing"
+    api = tmp_path / "services" / "api" / "src" / "api"
+    _write(billing / "__init__.py")
+    _write(billing / "models.py", "class Invoice:\n    pass\n\n\nclass Refund:\n    pass\n")
+    _write(billing / "old.py", "class Old:\n    pass\n")
+    _write(api / "__init__.py")
+    _write(api / "views.py", "from billing.models import Invoice, Refund\nfrom billing.new import New\nimport billing.old\n")
+    _write(api / "refunds.py", "from billing.models import Refund\n")  # Relinked because models.py changes
+    graph = ShardedGraph(str(tmp_path), _shards(), cache_dir=str(tmp_path / ".cache"))
+    graph.build()
+
+    _write(billing / "models.py", "class Invoice:\n    pass\n")
+    _write(billing / "new.py", "class New:\n    pass\n")
+    (billing / "old.py").unlink()
+    graph.refresh("billing")
+
+    _, rebuilt = ShardedGraph(str(tmp_path), _shards()).build()
+    assert _graph(graph.nodes) == _graph(rebuilt)
@@ -0,0 +1,86 @@
+import subprocess
+
+from graph.snapshots import IncrementalAnalyzer, SnapshotStore
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _commit(repo, files):
+    for name, text in files.items():
+        path = repo / name
+        if text is None:
+            path.unlink()
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "change")
+    return _git(repo, "rev-parse", "HEAD")
+
+
+def _init(repo):
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+
+
+def _graph(manifest):
+    return manifest["scripts"], manifest["edges"], manifest["calls"]
+
+
+def _check_update_matches_create(tmp_path, repo, base, head):
+    _git(repo, "checkout", "-q", base)  # The working tree must not leak into the snapshot of head
+    incremental = IncrementalAnalyzer(str(repo), SnapshotStore(str(tmp_path / "incremental")))
+    incremental.create(base)
+    updated, _ = incremental.update(base, head)
+    created = IncrementalAnalyzer(str(repo), SnapshotStore(str(tmp_path / "full"))).create(head)
+    assert _graph(updated) == _graph(created)
+
+
+BASE = {
+    "a.py": "class A:\n    def run(self):\n        pass\n",
+    "b.py": "from a import A\n\n\nclass B(A):\n    def go(self):\n        A().run()\n",
+    "c.py": "from b import B\n\n\ndef main():\n    B().go()\n    B().run()\n",
+}
+
+
+def test_update_matches_create(tmp_path):
+    repo = tmp_path / "repo"
+    _init(repo)
+    base = _commit(repo, BASE)
+    head = _commit(repo, {
+        "a.py": "class A:\n    def run(self):\n        pass\n\n    def stop(self):\n        pass\n",
+        "c.py": None,
+        "d.py": "from b import B\n\n\ndef main():\n    B().stop()\n",
+    })
+    _check_update_matches_create(tmp_path, repo, base, head)
+
+
+def test_update_matches_create_with_broken_blob(tmp_path):
+    repo = tmp_path / "repo"
+    _init(repo)
+    base = _commit(repo, BASE)
+    head = _commit(repo, {"b.py": "def broken(:\n"})
+    _check_update_matches_create(tmp_path, repo, base, head)
+
+
+def test_update_matches_create_with_missing_blob(tmp_path):
+    repo = tmp_path / "repo"
+    _init(repo)
+    base = _commit(repo, BASE)
+    head = _commit(repo, {"b.py": "from a import A\n\n\nclass B:\n    pass\n"})
+    blob = _git(repo, "rev-parse", f"{head}:b.py")
+    (repo / ".git" / "objects" / blob[:2] / blob[2:]).unlink()  # As in a partial clone
+    _check_update_matches_create(tmp_path, repo, base, head)
+
+
+def test_update_re_resolves_calls_through_base_classes(tmp_path):
+    repo = tmp_path / "repo"
+    _init(repo)
+    base = _commit(repo, BASE)
+    # c.py calls B().run(), found in A two imports away: a.py changes, c.py does not
+    head = _commit(repo, {"a.py": "class A:\n    def start(self):\n        pass\n"})
+    _check_update_matches_create(tmp_path, repo, base, head)
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from graph.call_resolver import CallResolver
+from graph.current_code import FolderScriptBuilder, ImportAnalyzer, MethodNode, ScriptAnalyzer, ScriptNode
+from graph.graph_store import EDGE_ATTRIBUTES
+from graph.sqlite_store import SQLiteGraphStore
+
+DUMMY_FOLDER = Path(__file__).resolve().parent.parent / "dummy-folder"
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _analyze(global_path):
+    root, nodes = FolderScriptBuilder(global_path).build()
+    script_analyzer = ScriptAnalyzer(nodes, global_path)
+    script_analyzer.analyze()
+    import_analyzer = ImportAnalyzer(global_path, nodes, script_analyzer.ast_cache, summaries=script_analyzer.summaries)
+    import_analyzer.analyze()
+    CallResolver(nodes, script_analyzer.summaries, import_analyzer.module_index).resolve_all()
+    return root, nodes
+
+
+def _graph(nodes):
+    """Everything the store keeps, in order: children, edges and aliases."""
+    return {
+        path: (
+            type(node).__name__, node.name, isinstance(node, MethodNode) and node.is_static,
+            [child.path for child in node.children],
+            [[target.path for target in getattr(node, attribute, [])] for attribute in EDGE_ATTRIBUTES],
+            dict(node.aliases) if isinstance(node, ScriptNode) else None,
+        )
+        for path, node in nodes.items() if path != "root"
+    }
+
+
+def test_round_trip(tmp_path):
+    repo = tmp_path / "repo"
+    _write(repo / "pkg" / "__init__.py")
+    _write(repo / "pkg" / "base.py", "class Base:\n    def run(self):\n        pass\n\n    @staticmethod\n    def make():\n        pass\n")
+    _write(repo / "pkg" / "mod.py", "from pkg.base import Base as B\nimport pkg.base\n\n\nclass Mod(B):\n    def go(self):\n        self.run()\n        B.make()\n\n\ndef main():\n    Mod().go()\n")
+    for global_path in (str(repo), str(DUMMY_FOLDER)):
+        root, nodes = _analyze(global_path)
+        store = SQLiteGraphStore.write(str(tmp_path / "graph.db"), root, nodes, global_path)
+        loaded_root, loaded = store.load()
+        store.close()
+        assert loaded_root.name == root.name
+        assert _graph(loaded) == _graph(nodes)
@@ -0,0 +1,81 @@
+from graph.call_resolver import CallResolver
+from graph.current_code import FolderScriptBuilder, ImportAnalyzer, ScriptAnalyzer
+from graph.graph_store import EDGE_ATTRIBUTES
+from graph.watcher import GraphPatcher, PollingWatcher, poll_changes
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _analyze(global_path):
+    root, nodes = FolderScriptBuilder(global_path).build()
+    script_analyzer = ScriptAnalyzer(nodes, global_path)
+    script_analyzer.analyze()
+    ImportAnalyzer(global_path, nodes, script_analyzer.ast_cache, summaries=script_analyzer.summaries).analyze()
+    patcher = GraphPatcher.from_analyzer(root, script_analyzer)
+    resolver = CallResolver(nodes, patcher.summaries, patcher.module_index)
+    resolver.resolve_all()
+    return nodes, patcher, resolver
+
+
+def _graph(nodes):
+    """The graph by path; edge order depends on the patch order, so edges are sorted."""
+    return {
+        path: (
+            type(node).__name__, sorted(child.path for child in node.children),
+            [sorted(target.path for target in getattr(node, attribute, [])) for attribute in EDGE_ATTRIBUTES],
+        )
+        for path, node in nodes.items() if path != "root"
+    }
+
+
+class _LostEvents:
+    def poll(self):
+        raise OverflowError
+
+    def close(self):
+        pass
+
+
+def test_polling_watcher_applies_excludes_and_gitignore(tmp_path):
+    _write(tmp_path / ".gitignore", "ignored.py\n")
+    _write(tmp_path / "a.py")
+    watcher = PollingWatcher(str(tmp_path), 0, excludes=("generated",))
+    _write(tmp_path / "generated" / "out.py")
+    _write(tmp_path / "ignored.py")
+    _write(tmp_path / "b.py")
+    assert watcher.poll() == ({"b.py"}, set(), set())
+
+
+def test_overflow_keeps_the_excludes(tmp_path):
+    _write(tmp_path / "a.py")
+    _write(tmp_path / "generated" / "out.py")
+    _, nodes = FolderScriptBuilder(str(tmp_path), ("generated",)).build()
+    watcher, changes = poll_changes(_LostEvents(), str(tmp_path), nodes, 0, ("generated",))
+    watcher.close()
+    assert changes == (set(), {"a.py"}, set())
+    assert watcher.excludes == ("generated",)
+
+
+def test_apply_matches_rebuild(tmp_path):
+    _write(tmp_path / "pkg" / "__init__.py")
+    _write(tmp_path / "pkg" / "base.py", "class Base:\n    def run(self):\n        pass\n")
+    _write(tmp_path / "pkg" / "mid.py", "from pkg.base import Base\n\n\nclass Mid(Base):\n    pass\n")
+    _write(tmp_path / "pkg" / "old.py", "def old():\n    pass\n")
+    _write(tmp_path / "app.py", "from pkg.mid import Mid\n\n\ndef main():\n    Mid().run()\n    Mid().stop()\n")
+    _write(tmp_path / "tools.py", "from pkg.old import old\nfrom pkg.new import new\n\n\ndef main():\n    old()\n    new()\n")
+    nodes, patcher, resolver = _analyze(str(tmp_path))
+
+    # app.py does not change, but its calls resolve through pkg/mid.py to pkg/base.py
+    _write(tmp_path / "pkg" / "base.py", "class Base:\n    def stop(self):\n        pass\n")
+    _write(tmp_path / "pkg" / "new.py", "def new():\n    pass\n")
+    (tmp_path / "pkg" / "old.py").unlink()
+    touched = patcher.apply({"pkg/new.py"}, {"pkg/base.py"}, {"pkg/old.py"})
+    scope = patcher.resolution_scope(touched)
+    resolver.invalidate(scope)
+    resolver.resolve_all(scope)
+
+    rebuilt, _, _ = _analyze(str(tmp_path))
+    assert _graph(nodes) == _graph(rebuilt)